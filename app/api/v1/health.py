@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException, Query
 import time
 from ...services.voiceprint_service import voiceprint_service
+from ...core.executor import stage_executor
+from ...database.connection import db_connection
 from ...core.logger import get_logger
-from ...core.config import settings
+from ...core.security import is_valid_token
 
 logger = get_logger(__name__)
 
@@ -35,23 +37,94 @@ async def health_check(
 
     # 验证密钥
     key_check_start = time.time()
-    if key != settings.api_token:
+    if not is_valid_token(key):
         logger.warning(f"健康检查接口收到无效密钥: {key}")
         raise HTTPException(status_code=401, detail="密钥验证失败")
     key_check_time = time.time() - key_check_start
     logger.info(f"密钥验证完成，耗时: {key_check_time:.3f}秒")
 
+    if not voiceprint_service.ready:
+        # 启动期间数据库连接池可能尚未建立，只返回启动状态
+        stats = voiceprint_service.get_startup_stats()
+        logger.complete("健康检查请求", time.time() - start_time)
+        return {
+            "status": "failed" if stats["error"] else "starting",
+            "startup": stats,
+        }
+
     try:
         count_start = time.time()
         logger.info("开始获取声纹统计信息...")
-        count = voiceprint_service.get_voiceprint_count()
+        count = await stage_executor.run("db", voiceprint_service.get_voiceprint_count)
         count_time = time.time() - count_start
         logger.info(f"声纹统计信息获取完成，总数: {count}，耗时: {count_time:.3f}秒")
 
         total_time = time.time() - start_time
         logger.complete("健康检查请求", total_time)
-        return {"total_voiceprints": count, "status": "healthy"}
+        return {
+            "total_voiceprints": count,
+            "status": "healthy",
+        }
     except Exception as e:
         total_time = time.time() - start_time
         logger.fail(f"获取统计信息异常，总耗时: {total_time:.3f}秒，错误: {e}")
         raise HTTPException(status_code=500, detail=f"获取统计信息失败: {str(e)}")
+
+
+@router.get(
+    "/ready",
+    summary="就绪检查",
+    response_model=dict,
+    description="模型加载与预热完成后返回200，启动期间返回503，可用作负载均衡或容器的就绪探针",
+)
+async def readiness_check():
+    """
+    就绪检查接口
+
+    Returns:
+        dict: 就绪状态与各启动阶段耗时
+
+    Raises:
+        HTTPException: 启动尚未完成时返回503错误
+    """
+    stats = voiceprint_service.get_startup_stats()
+    if not stats["ready"]:
+        raise HTTPException(status_code=503, detail=stats)
+    return stats
+
+
+@router.get(
+    "/stats",
+    summary="运行统计",
+    response_model=dict,
+    description="查看启动阶段耗时、执行池各阶段的排队与执行耗时、微批调度、推理工作进程、声纹特征缓存、相同请求合并、声纹库缓存及数据库连接池统计，需要提供正确的密钥",
+)
+async def runtime_stats(
+    key: str = Query(..., description="访问密钥", example="your-secret-key")
+):
+    """
+    运行统计接口
+
+    Args:
+        key: 访问密钥，必须与配置中的authorization密钥匹配
+
+    Returns:
+        dict: 各组件运行统计
+
+    Raises:
+        HTTPException: 当密钥不正确时返回401错误
+    """
+    if not is_valid_token(key):
+        logger.warning(f"运行统计接口收到无效密钥: {key}")
+        raise HTTPException(status_code=401, detail="密钥验证失败")
+
+    return {
+        "startup": voiceprint_service.get_startup_stats(),
+        "executor": stage_executor.get_stats(),
+        "batching": voiceprint_service.get_batching_stats(),
+        "inference": voiceprint_service.get_inference_stats(),
+        "embedding_cache": voiceprint_service.get_cache_stats(),
+        "coalescing": voiceprint_service.get_coalescing_stats(),
+        "gallery": voiceprint_service.get_gallery_stats(),
+        "db_pool": db_connection.get_stats(),
+    }
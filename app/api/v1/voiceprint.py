@@ -1,11 +1,33 @@
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
+from fastapi import (
+    APIRouter,
+    File,
+    UploadFile,
+    Form,
+    HTTPException,
+    Depends,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.security import HTTPBearer
 from typing import List
 import time
-from ...models.voiceprint import VoiceprintRegisterResponse, VoiceprintIdentifyResponse
-from ...services.voiceprint_service import voiceprint_service
+from ...models.voiceprint import (
+    VoiceprintBatchIdentifyItem,
+    VoiceprintBatchIdentifyResponse,
+    VoiceprintBatchRegisterItem,
+    VoiceprintBatchRegisterResponse,
+    VoiceprintCandidate,
+    VoiceprintIdentifyResponse,
+    VoiceprintRegisterResponse,
+)
+from ...services.streaming import StreamingSession, prepare_waveform
+from ...services.voiceprint_service import IdentifyResult, voiceprint_service
 from ...api.dependencies import AuthorizationToken
+from ...core.config import settings
+from ...core.executor import ExecutorBusyError, stage_executor
 from ...core.logger import get_logger
+from ...core.security import is_valid_token
 
 # 创建安全模式
 security = HTTPBearer(description="接口令牌")
@@ -15,6 +37,12 @@ logger = get_logger(__name__)
 router = APIRouter()
 
 
+def _parse_speaker_ids(speaker_ids: str) -> List[str]:
+    """解析逗号分隔的候选说话人ID，为空或*时返回空列表表示检索全库"""
+    candidate_ids = [x.strip() for x in speaker_ids.split(",") if x.strip()]
+    return [] if candidate_ids == ["*"] else candidate_ids
+
+
 @router.post(
     "/register",
     summary="声纹注册",
@@ -47,20 +75,106 @@ async def register_voiceprint(
         audio_bytes = await file.read()
 
         # 注册声纹
-        success = voiceprint_service.register_voiceprint(speaker_id, audio_bytes)
+        result = await voiceprint_service.register_voiceprint_async(
+            speaker_id, audio_bytes
+        )
 
-        if success:
-            return VoiceprintRegisterResponse(success=True, msg=f"已登记: {speaker_id}")
+        if result.success:
+            return VoiceprintRegisterResponse(
+                success=True, msg=result.msg, speech_duration=result.speech_duration
+            )
         else:
             raise HTTPException(status_code=500, detail="声纹注册失败")
 
     except HTTPException:
         raise
+    except ExecutorBusyError as e:
+        logger.warning(f"声纹注册繁忙: {e}")
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后重试")
     except Exception as e:
         logger.fail(f"声纹注册异常: {e}")
         raise HTTPException(status_code=500, detail=f"声纹注册失败: {str(e)}")
 
 
+@router.post(
+    "/register/batch",
+    summary="批量声纹注册",
+    response_model=VoiceprintBatchRegisterResponse,
+    description="一次注册多个说话人的声纹，按顺序一一对应，返回逐条结果",
+    dependencies=[Depends(security)],
+)
+async def register_voiceprints_batch(
+    token: AuthorizationToken,
+    speaker_ids: str = Form(
+        ..., description="说话人ID，逗号分隔，与音频文件按顺序对应"
+    ),
+    files: List[UploadFile] = File(..., description="WAV音频文件列表"),
+):
+    """
+    批量注册声纹接口
+
+    Args:
+        token: 接口令牌（Header）
+        speaker_ids: 说话人ID，逗号分隔，与音频文件按顺序对应
+        files: 说话人音频文件列表（WAV）
+
+    Returns:
+        VoiceprintBatchRegisterResponse: 逐条注册结果
+    """
+    start_time = time.time()
+    try:
+        ids = [x.strip() for x in speaker_ids.split(",") if x.strip()]
+        if len(ids) != len(files):
+            raise HTTPException(
+                status_code=400,
+                detail=f"说话人ID数量({len(ids)})与音频文件数量({len(files)})不一致",
+            )
+        max_items = int(settings.batching.get("max_register_items", 100))
+        if len(ids) > max_items:
+            raise HTTPException(
+                status_code=400, detail=f"单次最多注册{max_items}个说话人"
+            )
+        for file in files:
+            if not file.filename.lower().endswith(".wav"):
+                raise HTTPException(
+                    status_code=400, detail=f"只支持WAV格式音频文件: {file.filename}"
+                )
+
+        items = [
+            (speaker_id, await file.read()) for speaker_id, file in zip(ids, files)
+        ]
+        results = await voiceprint_service.register_voiceprints_batch_async(items)
+
+        succeeded = sum(1 for x in results if x.success)
+        total_time = time.time() - start_time
+        logger.info(
+            f"批量声纹注册请求完成，成功: {succeeded}/{len(results)}，总耗时: {total_time:.3f}秒"
+        )
+        return VoiceprintBatchRegisterResponse(
+            success=succeeded == len(results),
+            total=len(results),
+            succeeded=succeeded,
+            results=[
+                VoiceprintBatchRegisterItem(
+                    speaker_id=x.speaker_id,
+                    success=x.success,
+                    msg=x.msg,
+                    speech_duration=x.speech_duration,
+                )
+                for x in results
+            ],
+        )
+
+    except HTTPException:
+        raise
+    except ExecutorBusyError as e:
+        logger.warning(f"批量声纹注册繁忙: {e}")
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后重试")
+    except Exception as e:
+        logger.fail(f"批量声纹注册异常: {e}")
+        raise HTTPException(status_code=500, detail=f"批量声纹注册失败: {str(e)}")
+
+
 @router.post(
     "/identify",
     summary="声纹识别",
@@ -70,16 +184,20 @@ async def register_voiceprint(
 )
 async def identify_voiceprint(
     token: AuthorizationToken,
-    speaker_ids: str = Form(..., description="候选说话人ID，逗号分隔"),
+    speaker_ids: str = Form(
+        "", description="候选说话人ID，逗号分隔；为空或*时在整个声纹库中检索"
+    ),
     file: UploadFile = File(..., description="WAV音频文件"),
+    top_k: int = Form(1, ge=1, le=100, description="返回的候选说话人数量"),
 ):
     """
     声纹识别接口
 
     Args:
         token: 接口令牌（Header）
-        speaker_ids: 候选说话人ID，逗号分隔
+        speaker_ids: 候选说话人ID，逗号分隔；为空或*时在整个声纹库中检索
         file: 待识别音频文件（WAV）
+        top_k: 返回的候选说话人数量，大于1时在响应中附带候选列表
 
     Returns:
         VoiceprintIdentifyResponse: 识别结果
@@ -97,13 +215,10 @@ async def identify_voiceprint(
 
         # 解析候选说话人ID
         parse_start = time.time()
-        candidate_ids = [x.strip() for x in speaker_ids.split(",") if x.strip()]
-        if not candidate_ids:
-            raise HTTPException(status_code=400, detail="候选说话人ID不能为空")
+        candidate_ids = _parse_speaker_ids(speaker_ids)
         parse_time = time.time() - parse_start
-        logger.info(
-            f"候选说话人ID解析完成，共{len(candidate_ids)}个，耗时: {parse_time:.3f}秒"
-        )
+        candidate_desc = f"共{len(candidate_ids)}个" if candidate_ids else "全库检索"
+        logger.info(f"候选说话人ID解析完成，{candidate_desc}，耗时: {parse_time:.3f}秒")
 
         # 读取音频数据
         read_start = time.time()
@@ -116,29 +231,269 @@ async def identify_voiceprint(
         # 识别声纹
         identify_start = time.time()
         logger.info("开始调用声纹识别服务...")
-        match_name, match_score = voiceprint_service.identify_voiceprint(
-            candidate_ids, audio_bytes
+        result = await voiceprint_service.identify_voiceprint_async(
+            candidate_ids, audio_bytes, top_k
         )
         identify_time = time.time() - identify_start
         logger.info(f"声纹识别服务调用完成，耗时: {identify_time:.3f}秒")
 
         total_time = time.time() - start_time
         logger.info(
-            f"声纹识别请求完成，总耗时: {total_time:.3f}秒，识别结果: {match_name}, 分数: {match_score:.4f}"
+            f"声纹识别请求完成，总耗时: {total_time:.3f}秒，识别结果: {result.speaker_id}, 分数: {result.score:.4f}"
         )
 
-        return VoiceprintIdentifyResponse(speaker_id=match_name, score=match_score)
+        candidates = None
+        if top_k > 1:
+            candidates = [
+                VoiceprintCandidate(speaker_id=name, score=score)
+                for name, score in result.candidates
+            ]
+        return VoiceprintIdentifyResponse(
+            speaker_id=result.speaker_id,
+            score=result.score,
+            margin=result.margin,
+            candidates=candidates,
+            speech_duration=result.speech_duration,
+        )
 
     except HTTPException:
         total_time = time.time() - start_time
         logger.error(f"声纹识别请求失败，总耗时: {total_time:.3f}秒")
         raise
+    except ExecutorBusyError as e:
+        total_time = time.time() - start_time
+        logger.warning(f"声纹识别繁忙，总耗时: {total_time:.3f}秒，原因: {e}")
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后重试")
     except Exception as e:
         total_time = time.time() - start_time
         logger.error(f"声纹识别异常，总耗时: {total_time:.3f}秒，错误: {e}")
         raise HTTPException(status_code=500, detail=f"声纹识别失败: {str(e)}")
 
 
+@router.post(
+    "/identify/batch",
+    summary="批量声纹识别",
+    response_model=VoiceprintBatchIdentifyResponse,
+    description="一次识别多段音频，可为每段音频单独指定候选说话人",
+    dependencies=[Depends(security)],
+)
+async def identify_voiceprints_batch(
+    token: AuthorizationToken,
+    files: List[UploadFile] = File(..., description="WAV音频文件列表"),
+    speaker_ids: str = Form(
+        "",
+        description="所有音频共用的候选说话人ID，逗号分隔；为空或*时在整个声纹库中检索",
+    ),
+    clip_speaker_ids: str = Form(
+        "",
+        description="每段音频各自的候选说话人ID，段与段之间用;分隔、段内用逗号分隔，"
+        "与音频文件按顺序对应；某段为空时使用speaker_ids",
+    ),
+    top_k: int = Form(1, ge=1, le=100, description="每段返回的候选说话人数量"),
+):
+    """
+    批量声纹识别接口
+
+    Args:
+        token: 接口令牌（Header）
+        files: 待识别音频文件列表（WAV）
+        speaker_ids: 所有音频共用的候选说话人ID，逗号分隔
+        clip_speaker_ids: 每段音频各自的候选说话人ID，段间用;分隔
+        top_k: 每段返回的候选说话人数量，大于1时附带候选列表
+
+    Returns:
+        VoiceprintBatchIdentifyResponse: 逐段识别结果
+    """
+    start_time = time.time()
+    try:
+        max_items = int(settings.batching.get("max_identify_items", 100))
+        if len(files) > max_items:
+            raise HTTPException(
+                status_code=400, detail=f"单次最多识别{max_items}段音频"
+            )
+        for file in files:
+            if not file.filename.lower().endswith(".wav"):
+                raise HTTPException(
+                    status_code=400, detail=f"只支持WAV格式音频文件: {file.filename}"
+                )
+
+        shared_ids = _parse_speaker_ids(speaker_ids)
+        candidate_lists = [shared_ids] * len(files)
+        if clip_speaker_ids.strip():
+            clips = clip_speaker_ids.split(";")
+            if len(clips) != len(files):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"候选说话人分段数量({len(clips)})与音频文件数量({len(files)})不一致",
+                )
+            candidate_lists = [
+                _parse_speaker_ids(clip) if clip.strip() else shared_ids
+                for clip in clips
+            ]
+
+        audio_list = [await file.read() for file in files]
+        results = await voiceprint_service.identify_voiceprints_batch_async(
+            candidate_lists, audio_list, top_k
+        )
+
+        total_time = time.time() - start_time
+        logger.info(
+            f"批量声纹识别请求完成，音频数量: {len(results)}，总耗时: {total_time:.3f}秒"
+        )
+        return VoiceprintBatchIdentifyResponse(
+            total=len(results),
+            results=[
+                VoiceprintBatchIdentifyItem(
+                    speaker_id=result.speaker_id,
+                    score=result.score,
+                    margin=result.margin,
+                    candidates=(
+                        [
+                            VoiceprintCandidate(speaker_id=name, score=score)
+                            for name, score in result.candidates
+                        ]
+                        if top_k > 1
+                        else None
+                    ),
+                    speech_duration=result.speech_duration,
+                    error=result.error,
+                )
+                for result in results
+            ],
+        )
+
+    except HTTPException:
+        raise
+    except ExecutorBusyError as e:
+        logger.warning(f"批量声纹识别繁忙: {e}")
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后重试")
+    except Exception as e:
+        logger.error(f"批量声纹识别异常: {e}")
+        raise HTTPException(status_code=500, detail=f"批量声纹识别失败: {str(e)}")
+
+
+def _stream_message(
+    result: IdentifyResult, session: StreamingSession, final: bool, top_k: int
+) -> dict:
+    """构造流式识别推送给客户端的消息"""
+    message = {
+        "type": "final" if final else "interim",
+        "speaker_id": result.speaker_id,
+        "score": result.score,
+        "margin": result.margin,
+        "duration": session.received_seconds,
+        "speech_duration": result.speech_duration,
+    }
+    if top_k > 1:
+        message["candidates"] = [
+            {"speaker_id": name, "score": score} for name, score in result.candidates
+        ]
+    return message
+
+
+@router.websocket("/identify/stream")
+async def identify_voiceprint_stream(
+    websocket: WebSocket,
+    key: str = Query("", description="访问密钥，也可通过Authorization头传入"),
+    speaker_ids: str = Query(
+        "", description="候选说话人ID，逗号分隔；为空或*时在整个声纹库中检索"
+    ),
+    sample_rate: int = Query(16000, description="PCM音频采样率"),
+    top_k: int = Query(1, description="返回的候选说话人数量"),
+):
+    """
+    流式声纹识别接口
+
+    客户端以二进制消息发送PCM16小端序单声道音频块，发送文本消息"end"表示音频结束。
+    服务端每积累一定时长的新音频就对缓冲区识别一次并推送interim结果；
+    识别分数超过阈值且领先第二名足够多、收到"end"或达到时长上限时推送final结果并关闭连接。
+
+    Args:
+        websocket: WebSocket连接
+        key: 访问密钥
+        speaker_ids: 候选说话人ID，逗号分隔
+        sample_rate: PCM音频采样率
+        top_k: 返回的候选说话人数量，大于1时附带候选列表
+    """
+    authorization = websocket.headers.get("authorization", "")
+    token = key or authorization.removeprefix("Bearer ").strip()
+    if not is_valid_token(token):
+        logger.warning("流式识别接口收到无效令牌")
+        await websocket.close(code=1008, reason="无效的接口令牌")
+        return
+    if not 8000 <= sample_rate <= 48000 or not 1 <= top_k <= 100:
+        await websocket.close(code=1003, reason="采样率或top_k参数无效")
+        return
+    if not voiceprint_service.ready:
+        await websocket.close(code=1013, reason="服务启动中，请稍后重试")
+        return
+
+    await websocket.accept()
+    candidate_ids = _parse_speaker_ids(speaker_ids)
+    session = StreamingSession(sample_rate)
+    start_time = time.time()
+    logger.info(
+        f"开始流式声纹识别，候选说话人: {len(candidate_ids) or '全库'}，采样率: {sample_rate}"
+    )
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                logger.info("流式识别客户端已断开")
+                return
+
+            ended = False
+            if message.get("bytes"):
+                session.append(message["bytes"])
+            elif message.get("text") is not None:
+                ended = message["text"].strip().lower() == "end"
+
+            finished = ended or session.is_finished()
+            if not finished and not session.is_due():
+                continue
+
+            if session.buffered_seconds > 0:
+                # 重采样与静音裁剪放到音频执行池，不阻塞事件循环
+                waveform = await stage_executor.run(
+                    "audio", prepare_waveform, session.snapshot(), session.sample_rate
+                )
+                result = await voiceprint_service.identify_waveform_async(
+                    candidate_ids, waveform, top_k
+                )
+            else:
+                result = IdentifyResult()
+            final = finished or session.should_stop(result.speaker_id, result.margin)
+            await websocket.send_json(_stream_message(result, session, final, top_k))
+
+            if final:
+                logger.info(
+                    f"流式声纹识别完成，识别结果: {result.speaker_id}，分数: {result.score:.4f}，"
+                    f"音频时长: {session.received_seconds:.2f}秒，识别次数: {session.evaluations}，"
+                    f"总耗时: {time.time() - start_time:.3f}秒"
+                )
+                await websocket.close()
+                return
+
+    except WebSocketDisconnect:
+        logger.info("流式识别客户端已断开")
+    except ExecutorBusyError as e:
+        logger.warning(f"流式声纹识别繁忙: {e}")
+        await _close_with_error(websocket, "服务繁忙，请稍后重试", 1013)
+    except Exception as e:
+        logger.error(f"流式声纹识别异常: {e}")
+        await _close_with_error(websocket, f"声纹识别失败: {str(e)}", 1011)
+
+
+async def _close_with_error(websocket: WebSocket, detail: str, code: int) -> None:
+    """推送错误消息并关闭连接，客户端已断开时忽略发送失败"""
+    try:
+        await websocket.send_json({"type": "error", "detail": detail})
+        await websocket.close(code=code)
+    except (WebSocketDisconnect, RuntimeError) as e:
+        logger.debug(f"流式识别客户端已断开，未能推送错误: {e}")
+
+
 @router.delete(
     "/{speaker_id}",
     summary="删除声纹",
@@ -160,7 +515,9 @@ async def delete_voiceprint(
         dict: 删除结果
     """
     try:
-        success = voiceprint_service.delete_voiceprint(speaker_id)
+        success = await stage_executor.run(
+            "db", voiceprint_service.delete_voiceprint, speaker_id
+        )
 
         if success:
             return {"success": True, "msg": f"已删除: {speaker_id}"}
@@ -169,6 +526,9 @@ async def delete_voiceprint(
 
     except HTTPException:
         raise
+    except ExecutorBusyError as e:
+        logger.warning(f"删除声纹繁忙 {speaker_id}: {e}")
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后重试")
     except Exception as e:
         logger.error(f"删除声纹异常 {speaker_id}: {e}")
         raise HTTPException(status_code=500, detail=f"删除声纹失败: {str(e)}")
@@ -1,15 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.security import HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from fastapi.openapi.utils import get_openapi
 
 from .api.v1.api import api_router
+from .core.executor import stage_executor
+from .database.connection import db_connection
+from .services.voiceprint_service import voiceprint_service
 from loguru import logger
 from .core.version import VERSION
 import time
 
+# 启动完成前仍可访问的路径：健康检查、就绪检查与文档
+STARTUP_EXEMPT_PATHS = (
+    "/voiceprint/health",
+    "/voiceprint/stats",
+    "/voiceprint/ready",
+    "/voiceprint/docs",
+    "/voiceprint/redoc",
+    "/voiceprint/openapi.json",
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：后台加载模型与预热，关闭时释放资源
+
+    uvicorn在lifespan启动返回后才开始接受连接，模型加载与预热放在后台任务中，
+    期间就绪检查与业务请求由readiness_gate返回503
+    """
+    startup_task = asyncio.create_task(voiceprint_service.startup())
+    yield
+    # 启动尚未完成时先取消，再停止推理工作进程并释放执行池与数据库连接
+    if not startup_task.done():
+        startup_task.cancel()
+        try:
+            await startup_task
+        except asyncio.CancelledError:
+            pass
+    voiceprint_service.shutdown()
+    stage_executor.shutdown()
+    db_connection.close()
+
 
 def create_app() -> FastAPI:
     """创建FastAPI应用实例"""
@@ -24,6 +60,7 @@ def create_app() -> FastAPI:
         version=VERSION,
         docs_url=None,  # 禁用默认的docs路径
         redoc_url=None,  # 禁用默认的redoc路径
+        lifespan=lifespan,
     )
 
     # 添加CORS中间件
@@ -35,6 +72,23 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # 启动预热完成前拒绝业务请求
+    @app.middleware("http")
+    async def readiness_gate(request: Request, call_next):
+        path = request.url.path
+        if (
+            not voiceprint_service.ready
+            and path.startswith("/voiceprint/")
+            and not path.startswith(STARTUP_EXEMPT_PATHS)
+        ):
+            detail = (
+                "服务启动失败"
+                if voiceprint_service.startup_error
+                else "服务启动中，请稍后重试"
+            )
+            return JSONResponse(status_code=503, content={"detail": detail})
+        return await call_next(request)
+
     # 注册API路由
     app.include_router(api_router, prefix="/voiceprint")
 
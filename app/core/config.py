@@ -7,6 +7,9 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# 声纹模型ID
+MODEL_ID = "iic/speech_campplus_sv_zh-cn_3dspeaker_16k"
+
 
 class Settings:
     """应用配置管理类"""
@@ -67,6 +70,61 @@ class Settings:
         """日志配置"""
         return self._config.get("logging", {})
 
+    @property
+    def executor(self) -> Dict[str, Any]:
+        """执行器配置"""
+        return self._config.get("executor", {})
+
+    @property
+    def batching(self) -> Dict[str, Any]:
+        """微批调度配置"""
+        return self._config.get("batching", {})
+
+    @property
+    def inference(self) -> Dict[str, Any]:
+        """模型推理配置"""
+        return self._config.get("inference", {})
+
+    @property
+    def embedding_cache(self) -> Dict[str, Any]:
+        """声纹特征缓存配置"""
+        return self._config.get("embedding_cache", {})
+
+    @property
+    def coalescing(self) -> Dict[str, Any]:
+        """相同请求合并配置"""
+        return self._config.get("coalescing", {})
+
+    @property
+    def gallery(self) -> Dict[str, Any]:
+        """声纹库缓存配置"""
+        return self._config.get("gallery", {})
+
+    @property
+    def ann(self) -> Dict[str, Any]:
+        """全库近似检索索引配置"""
+        return self._config.get("ann", {})
+
+    @property
+    def audio(self) -> Dict[str, Any]:
+        """音频处理配置"""
+        return self._config.get("audio", {})
+
+    @property
+    def stream(self) -> Dict[str, Any]:
+        """流式识别配置"""
+        return self._config.get("stream", {})
+
+    @property
+    def startup(self) -> Dict[str, Any]:
+        """服务启动配置"""
+        return self._config.get("startup", {})
+
+    @property
+    def embedding_storage(self) -> Dict[str, Any]:
+        """声纹特征存储格式配置"""
+        return self._config.get("embedding_storage", {})
+
     @property
     def api_token(self) -> str:
         """API访问令牌"""
@@ -0,0 +1,184 @@
+"""
+执行器模块 - 将CPU密集与阻塞IO阶段移出事件循环
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Tuple
+from .config import settings
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# 阶段名称 -> 执行池名称
+STAGE_POOLS = {
+    "audio": "audio",
+    "inference": "inference",
+    "db": "io",
+}
+
+
+class ExecutorBusyError(RuntimeError):
+    """阶段排队任务数超过上限"""
+
+
+def _timed_call(func: Callable, *args, **kwargs) -> Tuple[Any, float, float]:
+    """
+    在执行池中运行函数并记录开始/结束时间
+
+    进程池中同样可用，时间使用time.time()以便跨进程比较
+
+    Returns:
+        Tuple[Any, float, float]: (返回值, 开始时间, 结束时间)
+    """
+    started_at = time.time()
+    result = func(*args, **kwargs)
+    return result, started_at, time.time()
+
+
+class StageExecutor:
+    """分阶段执行器，为每个阶段提供有界的线程池或进程池"""
+
+    def __init__(self):
+        config = settings.executor
+        self.audio_pool_type = config.get("audio_pool", "thread")
+        self.audio_workers = int(config.get("audio_workers", 4))
+        self.inference_workers = int(config.get("inference_workers", 2))
+        self.io_workers = int(config.get("io_workers", 8))
+        self.max_pending = int(config.get("max_pending", 64))
+
+        self._pools: Dict[str, Executor] = {}
+        self._lock = threading.Lock()
+        self._pending: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _get_pool(self, name: str) -> Executor:
+        """按需创建执行池"""
+        with self._lock:
+            pool = self._pools.get(name)
+            if pool is not None:
+                return pool
+
+            if name == "audio" and self.audio_pool_type == "process":
+                pool = ProcessPoolExecutor(max_workers=self.audio_workers)
+            elif name == "audio":
+                pool = ThreadPoolExecutor(
+                    max_workers=self.audio_workers, thread_name_prefix="audio"
+                )
+            elif name == "inference":
+                pool = ThreadPoolExecutor(
+                    max_workers=self.inference_workers, thread_name_prefix="inference"
+                )
+            else:
+                pool = ThreadPoolExecutor(
+                    max_workers=self.io_workers, thread_name_prefix="io"
+                )
+
+            self._pools[name] = pool
+            logger.init_component(f"执行池[{name}]")
+            return pool
+
+    def _acquire(self, stage: str) -> None:
+        """占用阶段排队名额"""
+        with self._lock:
+            pending = self._pending.get(stage, 0)
+            if pending >= self.max_pending:
+                raise ExecutorBusyError(f"阶段 {stage} 排队任务已满({pending})")
+            self._pending[stage] = pending + 1
+
+    def _release(self, stage: str) -> None:
+        """释放阶段排队名额"""
+        with self._lock:
+            self._pending[stage] = self._pending.get(stage, 1) - 1
+
+    def _record(self, stage: str, wait_time: float, run_time: float) -> None:
+        """记录阶段耗时统计"""
+        with self._lock:
+            stats = self._stats.setdefault(
+                stage,
+                {
+                    "count": 0,
+                    "total_wait": 0.0,
+                    "max_wait": 0.0,
+                    "total_run": 0.0,
+                    "max_run": 0.0,
+                },
+            )
+            stats["count"] += 1
+            stats["total_wait"] += wait_time
+            stats["max_wait"] = max(stats["max_wait"], wait_time)
+            stats["total_run"] += run_time
+            stats["max_run"] = max(stats["max_run"], run_time)
+
+    async def run(self, stage: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        在阶段对应的执行池中运行阻塞函数
+
+        Args:
+            stage: 阶段名称（audio / inference / db）
+            func: 阻塞函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            Any: 函数返回值
+
+        Raises:
+            ExecutorBusyError: 阶段排队任务已满
+        """
+        pool = self._get_pool(STAGE_POOLS.get(stage, "io"))
+        self._acquire(stage)
+        submit_time = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started_at, finished_at = await loop.run_in_executor(
+                pool, partial(_timed_call, func, *args, **kwargs)
+            )
+        finally:
+            self._release(stage)
+
+        wait_time = max(0.0, started_at - submit_time)
+        run_time = finished_at - started_at
+        self._record(stage, wait_time, run_time)
+        logger.debug(
+            f"阶段[{stage}]完成，排队等待: {wait_time:.3f}秒，执行耗时: {run_time:.3f}秒"
+        )
+        return result
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各阶段的排队与执行耗时统计
+
+        Returns:
+            Dict[str, Dict[str, float]]: {阶段: 统计信息}
+        """
+        with self._lock:
+            result = {}
+            for stage, stats in self._stats.items():
+                count = stats["count"] or 1
+                result[stage] = {
+                    "count": stats["count"],
+                    "pending": self._pending.get(stage, 0),
+                    "avg_wait_ms": stats["total_wait"] / count * 1000,
+                    "max_wait_ms": stats["max_wait"] * 1000,
+                    "avg_run_ms": stats["total_run"] / count * 1000,
+                    "max_run_ms": stats["max_run"] * 1000,
+                }
+            return result
+
+    def shutdown(self) -> None:
+        """关闭所有执行池"""
+        with self._lock:
+            pools = list(self._pools.items())
+            self._pools.clear()
+
+        for name, pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+            logger.info(f"执行池[{name}]已关闭")
+
+
+# 全局阶段执行器实例
+stage_executor = StageExecutor()
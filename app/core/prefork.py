@@ -0,0 +1,114 @@
+"""
+预派生服务模块 - 主进程加载一次模型，fork出多个HTTP工作进程共享模型权重
+"""
+
+import gc
+import os
+import signal
+import time
+from typing import Dict
+import uvicorn
+from .config import settings
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PreforkServer:
+    """预派生多进程HTTP服务
+
+    主进程绑定监听端口并加载模型权重（不启动线程、不做推理），再fork出N个
+    uvicorn工作进程。权重张量在fork后只读，各工作进程通过写时复制共享同一份内存。
+    工作进程处理limit_max_requests个请求后退出，主进程立即fork新进程替换，
+    新进程直接继承内存中的模型，无需从磁盘重新加载。
+    """
+
+    def __init__(self, app, uvicorn_options: Dict):
+        self.app = app
+        self.workers = max(1, int(settings.server.get("workers", 1)))
+        self.respawn_delay = float(settings.server.get("respawn_delay", 1.0))
+        self.uvicorn_options = uvicorn_options
+        self._children: Dict[int, int] = {}  # pid -> 工作进程序号
+        self._stopping = False
+
+    def _child_main(self, sock) -> None:
+        """工作进程入口"""
+        # 恢复默认信号处理，由uvicorn接管
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        config = uvicorn.Config(self.app, **self.uvicorn_options)
+        server = uvicorn.Server(config)
+        server.run(sockets=[sock])
+
+    def _spawn(self, sock, index: int) -> None:
+        """fork一个工作进程"""
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._child_main(sock)
+            except BaseException as e:
+                logger.fail(f"HTTP工作进程[{index}]异常退出: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[pid] = index
+        logger.info(f"HTTP工作进程[{index}]已启动，pid: {pid}")
+
+    def _handle_stop(self, signum, frame) -> None:
+        """主进程收到停止信号时通知所有工作进程优雅退出"""
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info(
+            f"收到信号 {signum}，正在停止{len(self._children)}个HTTP工作进程..."
+        )
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self, preload) -> None:
+        """
+        绑定端口、预加载模型并看护工作进程，直到收到停止信号
+
+        Args:
+            preload: 在fork前调用的模型加载函数
+        """
+        config = uvicorn.Config(self.app, **self.uvicorn_options)
+        sock = config.bind_socket()
+
+        start_time = time.time()
+        logger.start(f"预派生模式: 主进程加载模型，HTTP工作进程数: {self.workers}")
+        preload()
+        # 冻结现有对象，避免子进程的垃圾回收触碰这些对象导致内存页被复制
+        gc.freeze()
+        logger.complete("主进程加载模型", time.time() - start_time)
+
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        for index in range(self.workers):
+            self._spawn(sock, index)
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = self._children.pop(pid, None)
+            if index is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                # 异常退出时稍等再重启，避免反复崩溃占满CPU
+                logger.warning(f"HTTP工作进程[{index}]异常退出(退出码: {code})")
+                time.sleep(self.respawn_delay)
+            else:
+                logger.info(f"HTTP工作进程[{index}]已回收，正在替换")
+            self._spawn(sock, index)
+
+        sock.close()
+        logger.info("所有HTTP工作进程已退出")
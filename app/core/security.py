@@ -1,3 +1,4 @@
+import hmac
 from fastapi import HTTPException, Header
 from typing import Optional
 from .config import settings
@@ -6,6 +7,21 @@ from .logger import get_logger
 logger = get_logger(__name__)
 
 
+def is_valid_token(token: str) -> bool:
+    """
+    以常量时间比较访问令牌，供HTTP依赖、WebSocket与带key参数的接口共用
+
+    Args:
+        token: 客户端提供的令牌
+
+    Returns:
+        bool: 是否与配置的authorization一致
+    """
+    return hmac.compare_digest(
+        str(token or "").encode("utf-8"), f"{settings.api_token}".encode("utf-8")
+    )
+
+
 def verify_token(authorization: str = Header(..., description="接口令牌")) -> bool:
     """
     验证API访问令牌
@@ -19,9 +35,7 @@ def verify_token(authorization: str = Header(..., description="接口令牌")) -
     Raises:
         HTTPException: 令牌无效时抛出401错误
     """
-    expected_token = f"{settings.api_token}"
-
-    if authorization != expected_token:
+    if not is_valid_token(authorization):
         logger.warning(f"无效的接口令牌: {authorization[:20]}...")
         raise HTTPException(status_code=401, detail="无效的接口令牌")
 
@@ -1,5 +1,8 @@
 import pymysql
-from typing import Optional
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
 from contextlib import contextmanager
 from ..core.config import settings
 from ..core.logger import get_logger
@@ -7,14 +10,59 @@ from ..core.logger import get_logger
 logger = get_logger(__name__)
 
 
+class PoolTimeoutError(RuntimeError):
+    """在超时时间内未能从连接池获取连接"""
+
+
 class DatabaseConnection:
-    """数据库连接管理类"""
+    """数据库连接池管理类
+
+    维护min_size到max_size个连接，获取时做健康检查，空闲过久的多余连接自动回收。
+    每个连接同一时间只被一个线程使用。创建实例不连接数据库，由open()预先建立连接。
+    """
 
     def __init__(self):
-        self._connection: Optional[pymysql.Connection] = None
-        self._connect()
+        mysql_config = settings.mysql
+        self.min_size = int(mysql_config.get("pool_min_size", 1))
+        self.max_size = max(self.min_size, int(mysql_config.get("pool_max_size", 10)))
+        self.checkout_timeout = float(mysql_config.get("pool_timeout", 10))
+        self.idle_timeout = float(mysql_config.get("pool_idle_timeout", 300))
+        self.ping_interval = float(mysql_config.get("pool_ping_interval", 30))
+
+        # 空闲连接栈: (连接, 最后使用时间)，后进先出以复用最近使用的连接
+        self._idle: Deque[Tuple[pymysql.Connection, float]] = deque()
+        self._total = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "created": 0,
+            "closed": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+        }
+
+    def open(self) -> None:
+        """建立最小数量的连接，服务启动时调用；未调用时连接在首次使用时按需建立"""
+        with self._cond:
+            missing = max(0, self.min_size - self._total)
+            self._total += missing
+
+        connections = []
+        try:
+            for _ in range(missing):
+                connections.append(self._connect())
+        finally:
+            with self._cond:
+                self._total -= missing - len(connections)
+                now = time.time()
+                self._idle.extend((connection, now) for connection in connections)
+                self._cond.notify_all()
+        logger.success(
+            f"数据库连接池初始化成功，连接数: {self.min_size}~{self.max_size}"
+        )
 
-    def _connect(self) -> None:
+    def _connect(self) -> pymysql.Connection:
         """建立数据库连接"""
         try:
             mysql_config = settings.mysql
@@ -24,7 +72,7 @@ class DatabaseConnection:
                 else ""
             )
 
-            self._connection = pymysql.connect(
+            connection = pymysql.connect(
                 host=mysql_config["host"],
                 port=mysql_config["port"],
                 user=mysql_config["user"],
@@ -32,41 +80,165 @@ class DatabaseConnection:
                 database=mysql_config["database"],
                 charset="utf8mb4",
                 autocommit=True,
-                # 连接池配置，提高并发性能
                 max_allowed_packet=16777216,  # 16MB
                 connect_timeout=10,
                 read_timeout=30,
                 write_timeout=30,
             )
-            logger.success("数据库连接成功")
+            with self._cond:
+                self._stats["created"] += 1
+            logger.debug("数据库连接成功")
+            return connection
         except Exception as e:
             logger.fail(f"数据库连接失败: {e}")
             raise
 
-    @contextmanager
-    def get_cursor(self):
-        """获取数据库游标的上下文管理器"""
-        if not self._connection or not self._connection.open:
-            self._connect()
+    def _close_quietly(self, connection: pymysql.Connection) -> None:
+        """关闭连接并忽略异常"""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["closed"] += 1
+
+    def _reap_idle(self, now: float) -> list:
+        """取出空闲过久且超出最小连接数的连接（需持有锁）"""
+        expired = []
+        while (
+            self._idle
+            and self._total > self.min_size
+            and now - self._idle[0][1] > self.idle_timeout
+        ):
+            expired.append(self._idle.popleft()[0])
+            self._total -= 1
+        return expired
+
+    def _checkout(self) -> pymysql.Connection:
+        """从连接池获取连接，必要时新建，超时抛出PoolTimeoutError"""
+        start_time = time.time()
+        deadline = start_time + self.checkout_timeout
+        connection = None
+        last_used = 0.0
+
+        with self._cond:
+            expired = self._reap_idle(start_time)
+            while True:
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._total < self.max_size:
+                    self._total += 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"获取数据库连接超时({self.checkout_timeout}秒)，连接数已达上限: {self.max_size}"
+                    )
+                self._cond.wait(remaining)
+
+        for expired_connection in expired:
+            self._close_quietly(expired_connection)
 
-        cursor = None
         try:
-            cursor = self._connection.cursor()
-            yield cursor
-        except Exception as e:
-            logger.fail(f"数据库操作失败: {e}")
-            if self._connection:
-                self._connection.rollback()
+            if connection is None:
+                connection = self._connect()
+            elif time.time() - last_used > self.ping_interval:
+                # 空闲较久的连接先做健康检查，断开时自动重连
+                connection.ping(reconnect=True)
+        except Exception:
+            if connection is not None:
+                self._close_quietly(connection)
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        wait_time = time.time() - start_time
+        with self._cond:
+            self._stats["checkouts"] += 1
+            self._stats["total_wait"] += wait_time
+            self._stats["max_wait"] = max(self._stats["max_wait"], wait_time)
+        return connection
+
+    def _checkin(self, connection: pymysql.Connection, broken: bool = False) -> None:
+        """归还连接，异常断开的连接直接关闭"""
+        if broken or not connection.open:
+            self._close_quietly(connection)
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append((connection, time.time()))
+            self._cond.notify()
+
+    @contextmanager
+    def get_connection(self):
+        """获取连接池中连接的上下文管理器，退出时自动归还"""
+        connection = self._checkout()
+        broken = False
+        try:
+            yield connection
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            broken = True
             raise
         finally:
-            if cursor:
-                cursor.close()
+            self._checkin(connection, broken)
+
+    @contextmanager
+    def get_cursor(self):
+        """获取数据库游标的上下文管理器"""
+        with self.get_connection() as connection:
+            cursor = None
+            try:
+                cursor = connection.cursor()
+                yield cursor
+            except Exception as e:
+                logger.fail(f"数据库操作失败: {e}")
+                if connection.open:
+                    connection.rollback()
+                raise
+            finally:
+                if cursor:
+                    cursor.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取连接池统计
+
+        Returns:
+            Dict[str, Any]: 连接数、使用中数量、获取等待耗时与超时次数
+        """
+        with self._cond:
+            checkouts = self._stats["checkouts"] or 1
+            return {
+                "size": self._total,
+                "idle": len(self._idle),
+                "in_use": self._total - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": self._stats["checkouts"],
+                "timeouts": self._stats["timeouts"],
+                "created": self._stats["created"],
+                "closed": self._stats["closed"],
+                "avg_wait_ms": self._stats["total_wait"] / checkouts * 1000,
+                "max_wait_ms": self._stats["max_wait"] * 1000,
+            }
 
     def close(self) -> None:
-        """关闭数据库连接"""
-        if self._connection and self._connection.open:
-            self._connection.close()
-            logger.info("数据库连接已关闭")
+        """关闭连接池中的所有空闲连接"""
+        with self._cond:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._total -= len(idle)
+
+        for connection in idle:
+            self._close_quietly(connection)
+        if idle:
+            logger.info(f"数据库连接池已关闭，关闭连接数: {len(idle)}")
 
     def __del__(self):
         """析构函数，确保连接被关闭"""
@@ -0,0 +1,116 @@
+import hashlib
+import struct
+from typing import Dict, NamedTuple, Optional
+import numpy as np
+
+# 带版本的声纹特征二进制格式：
+#   魔数(4) | 格式版本(1) | 数据类型(1) | 维度(2) | 模型标识(4) | 原始L2范数(4) | int8缩放系数(4) | 向量
+# 向量在写入前已L2归一化；模型标识为模型ID的4字节哈希，用于发现不同模型提取的特征。
+# 不带魔数的旧数据为原始float32字节，读取时按旧格式解析。
+MAGIC = b"\x93VPE"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sBBHIff")
+
+DTYPES: Dict[str, int] = {"float32": 0, "float16": 1, "int8": 2}
+_NUMPY_DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<f2"), 2: np.dtype("i1")}
+
+
+class DecodedEmbedding(NamedTuple):
+    """解码后的声纹特征"""
+
+    vector: np.ndarray  # float32向量
+    dtype: str  # 存储数据类型，旧数据为legacy
+    model_tag: Optional[int]  # 模型标识，旧数据为None
+    norm: Optional[float]  # 归一化前的L2范数，旧数据为None
+
+
+def model_tag(model_id: str) -> int:
+    """
+    计算模型ID的4字节标识
+
+    Args:
+        model_id: 模型ID
+
+    Returns:
+        int: 无符号32位整数
+    """
+    digest = hashlib.blake2b(model_id.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little")
+
+
+def encode_embedding(
+    emb: np.ndarray, dtype: str, model_id: str, norm: Optional[float] = None
+) -> bytes:
+    """
+    把声纹特征编码为带版本头的二进制，向量先L2归一化
+
+    Args:
+        emb: 声纹特征向量
+        dtype: 存储数据类型（float32 / float16 / int8）
+        model_id: 提取特征的模型ID
+        norm: 记录的原始L2范数，为空时使用emb的范数（重新编码已归一化的数据时传入原值）
+
+    Returns:
+        bytes: 编码后的二进制
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"不支持的声纹特征存储类型: {dtype}")
+    emb = np.asarray(emb, dtype=np.float32).reshape(-1)
+    length = float(np.linalg.norm(emb))
+    if length > 0:
+        emb = emb / length
+    if norm is None:
+        norm = length
+
+    scale = 1.0
+    if dtype == "int8":
+        # 对称量化，按向量最大绝对值计算缩放系数
+        peak = float(np.abs(emb).max()) if emb.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        payload = np.clip(np.rint(emb / scale), -127, 127).astype(np.int8)
+    else:
+        payload = emb.astype(_NUMPY_DTYPES[DTYPES[dtype]])
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, DTYPES[dtype], emb.size, model_tag(model_id), norm, scale
+    )
+    return header + payload.tobytes()
+
+
+def decode_embedding(data: bytes, dim: int = 0) -> DecodedEmbedding:
+    """
+    解码声纹特征，兼容不带版本头的旧float32数据
+
+    Args:
+        data: 数据库中的二进制
+        dim: 期望的特征维度，0表示不校验
+
+    Returns:
+        DecodedEmbedding: 解码结果
+
+    Raises:
+        ValueError: 数据损坏、格式版本不支持或维度不符时
+    """
+    data = bytes(data)
+    if len(data) >= _HEADER.size and data[:4] == MAGIC:
+        _, version, code, size, tag, norm, scale = _HEADER.unpack_from(data)
+        dtype = _NUMPY_DTYPES.get(code)
+        if version != FORMAT_VERSION or dtype is None:
+            raise ValueError(f"不支持的声纹特征格式: 版本{version}，类型{code}")
+        if len(data) - _HEADER.size != size * dtype.itemsize:
+            raise ValueError(f"声纹特征长度与维度{size}不符")
+        if dim and size != dim:
+            raise ValueError(f"声纹特征维度{size}与期望维度{dim}不符")
+        vector = np.frombuffer(data, dtype=dtype, offset=_HEADER.size).astype(
+            np.float32
+        )
+        if code == DTYPES["int8"]:
+            vector *= scale
+        name = next(key for key, value in DTYPES.items() if value == code)
+        return DecodedEmbedding(vector, name, tag, norm)
+
+    if len(data) % 4:
+        raise ValueError(f"声纹特征长度{len(data)}不是float32的整数倍")
+    if dim and len(data) // 4 != dim:
+        raise ValueError(f"旧格式声纹特征维度{len(data) // 4}与期望维度{dim}不符")
+    return DecodedEmbedding(np.frombuffer(data, dtype=np.float32), "legacy", None, None)
@@ -1,14 +1,88 @@
+import os
+import socket
 import numpy as np
 import time
-from typing import Dict, List, Optional
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
 from .connection import db_connection
+from .embedding_codec import decode_embedding, encode_embedding, model_tag
+from ..core.config import MODEL_ID, settings
 from ..core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 声纹变更日志表，多个服务进程据此同步各自的声纹库缓存
+CHANGES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS voiceprint_changes (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    speaker_id VARCHAR(255) NOT NULL,
+    op VARCHAR(8) NOT NULL,
+    source VARCHAR(128) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+_HOSTNAME = socket.gethostname()
+
+
+def change_source() -> str:
+    """
+    当前进程的变更来源标识，fork出的工作进程各不相同
+
+    Returns:
+        str: 主机名:进程号
+    """
+    return f"{_HOSTNAME}:{os.getpid()}"
+
 
 class VoiceprintDB:
-    """声纹数据库操作类，负责声纹特征的存储与读取"""
+    """声纹数据库操作类，负责声纹特征的存储与读取
+
+    声纹特征按embedding_storage.dtype编码为带版本头的二进制（见embedding_codec），
+    读取时兼容旧的原始float32数据，并跳过其他模型提取的特征。
+    """
+
+    def __init__(self):
+        self.dtype = settings.embedding_storage.get("dtype", "float16")
+        self.dim = int(settings.embedding_storage.get("dim", 192))
+        self._model_tag = model_tag(MODEL_ID)
+
+    def encode(self, emb: np.ndarray, norm: Optional[float] = None) -> bytes:
+        """
+        按配置的存储类型编码声纹特征
+
+        Args:
+            emb: 声纹特征向量
+            norm: 记录的原始L2范数，为空时按emb计算
+
+        Returns:
+            bytes: 编码后的二进制
+        """
+        return encode_embedding(emb, self.dtype, MODEL_ID, norm)
+
+    @contextmanager
+    def _transaction(self):
+        """在一个事务中执行的游标，异常时回滚"""
+        with db_connection.get_connection() as connection:
+            try:
+                connection.begin()
+                with connection.cursor() as cursor:
+                    yield cursor
+                connection.commit()
+            except Exception:
+                if connection.open:
+                    connection.rollback()
+                raise
+
+    @staticmethod
+    def _log_changes(cursor, speaker_ids: List[str], op: str) -> None:
+        """在当前事务中记录声纹变更"""
+        source = change_source()
+        cursor.executemany(
+            "INSERT INTO voiceprint_changes (speaker_id, op, source) VALUES (%s, %s, %s)",
+            [(speaker_id, op, source) for speaker_id in speaker_ids],
+        )
 
     def save_voiceprint(self, speaker_id: str, emb: np.ndarray) -> bool:
         """
@@ -22,30 +96,71 @@ class VoiceprintDB:
             bool: 操作是否成功
         """
         try:
-            with db_connection.get_cursor() as cursor:
+            with self._transaction() as cursor:
                 sql = """
                 INSERT INTO voiceprints (speaker_id, feature_vector)
                 VALUES (%s, %s)
                 ON DUPLICATE KEY UPDATE feature_vector=VALUES(feature_vector)
                 """
-                cursor.execute(sql, (speaker_id, emb.tobytes()))
-                logger.success(f"声纹特征保存成功: {speaker_id}")
-                return True
+                cursor.execute(sql, (speaker_id, self.encode(emb)))
+                self._log_changes(cursor, [speaker_id], "upsert")
+            logger.success(f"声纹特征保存成功: {speaker_id}")
+            return True
         except Exception as e:
             logger.fail(f"保存声纹特征失败 {speaker_id}: {e}")
             return False
 
+    def save_voiceprints(self, items: List[Tuple[str, np.ndarray]]) -> bool:
+        """
+        批量保存或更新声纹特征，单次executemany在一个事务中完成
+
+        Args:
+            items: [(说话人ID, 声纹特征向量)]
+
+        Returns:
+            bool: 操作是否成功，失败时整批回滚
+        """
+        if not items:
+            return True
+
+        start_time = time.time()
+        try:
+            with self._transaction() as cursor:
+                sql = """
+                INSERT INTO voiceprints (speaker_id, feature_vector)
+                VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE feature_vector=VALUES(feature_vector)
+                """
+                cursor.executemany(
+                    sql,
+                    [(speaker_id, self.encode(emb)) for speaker_id, emb in items],
+                )
+                self._log_changes(cursor, [x[0] for x in items], "upsert")
+
+            total_time = time.time() - start_time
+            logger.success(
+                f"批量保存声纹特征成功，数量: {len(items)}，耗时: {total_time:.3f}秒"
+            )
+            return True
+        except Exception as e:
+            total_time = time.time() - start_time
+            logger.fail(
+                f"批量保存声纹特征失败，数量: {len(items)}，耗时: {total_time:.3f}秒，错误: {e}"
+            )
+            return False
+
     def get_voiceprints(
-        self, speaker_ids: Optional[List[str]] = None
+        self, speaker_ids: Optional[List[str]] = None, strict: bool = False
     ) -> Dict[str, np.ndarray]:
         """
         获取指定说话人ID的声纹特征（如未指定则获取全部）
 
         Args:
             speaker_ids: 说话人ID列表
+            strict: 为True时数据库错误直接抛出，否则记录日志并返回空字典
 
         Returns:
-            Dict[str, np.ndarray]: {speaker_id: 特征向量}
+            Dict[str, np.ndarray]: {speaker_id: 特征向量}，不存在或无法解码的说话人不在其中
         """
         start_time = time.time()
         query_type = (
@@ -74,9 +189,11 @@ class VoiceprintDB:
 
                 # 将数据库中的二进制特征转为numpy数组
                 convert_start = time.time()
-                voiceprints = {
-                    row[0]: np.frombuffer(row[1], dtype=np.float32) for row in results
-                }
+                voiceprints = {}
+                for speaker_id, data in results:
+                    emb = self._decode(speaker_id, data)
+                    if emb is not None:
+                        voiceprints[speaker_id] = emb
                 convert_time = time.time() - convert_start
                 logger.info(f"数据转换完成，转换耗时: {convert_time:.3f}秒")
 
@@ -88,8 +205,74 @@ class VoiceprintDB:
         except Exception as e:
             total_time = time.time() - start_time
             logger.error(f"获取声纹特征失败，总耗时: {total_time:.3f}秒，错误: {e}")
+            if strict:
+                raise
             return {}
 
+    def _decode(self, speaker_id: str, data: bytes) -> Optional[np.ndarray]:
+        """解码一条声纹特征，损坏或由其他模型提取的特征返回None"""
+        try:
+            decoded = decode_embedding(data, self.dim)
+        except ValueError as e:
+            logger.warning(f"跳过无法解析的声纹特征 {speaker_id}: {e}")
+            return None
+        if decoded.model_tag is not None and decoded.model_tag != self._model_tag:
+            logger.warning(f"跳过其他模型提取的声纹特征: {speaker_id}")
+            return None
+        return decoded.vector
+
+    def scan_raw_voiceprints(
+        self, after: str = "", limit: int = 1000
+    ) -> List[Tuple[str, bytes]]:
+        """
+        按说话人ID顺序分页读取未解码的声纹特征
+
+        Args:
+            after: 从大于该ID的记录开始
+            limit: 每页记录数
+
+        Returns:
+            List[Tuple[str, bytes]]: [(说话人ID, 二进制特征)]
+        """
+        with db_connection.get_cursor() as cursor:
+            sql = """
+            SELECT speaker_id, feature_vector FROM voiceprints
+            WHERE speaker_id > %s ORDER BY speaker_id LIMIT %s
+            """
+            cursor.execute(sql, (after, limit))
+            return [(row[0], bytes(row[1])) for row in cursor.fetchall()]
+
+    def replace_feature_vectors(self, items: List[Tuple[str, bytes, bytes]]) -> int:
+        """
+        批量替换声纹特征的存储格式，只更新内容仍为旧值的记录，
+        避免覆盖迁移期间新写入的特征
+
+        Args:
+            items: [(说话人ID, 旧二进制, 新二进制)]
+
+        Returns:
+            int: 实际更新的记录数
+        """
+        if not items:
+            return 0
+        with db_connection.get_connection() as connection:
+            try:
+                connection.begin()
+                with connection.cursor() as cursor:
+                    sql = """
+                    UPDATE voiceprints SET feature_vector=%s
+                    WHERE speaker_id=%s AND feature_vector=%s
+                    """
+                    updated = cursor.executemany(
+                        sql, [(new, speaker_id, old) for speaker_id, old, new in items]
+                    )
+                connection.commit()
+                return updated or 0
+            except Exception:
+                if connection.open:
+                    connection.rollback()
+                raise
+
     def delete_voiceprint(self, speaker_id: str) -> bool:
         """
         删除指定说话人的声纹特征
@@ -101,19 +284,76 @@ class VoiceprintDB:
             bool: 操作是否成功
         """
         try:
-            with db_connection.get_cursor() as cursor:
+            with self._transaction() as cursor:
                 sql = "DELETE FROM voiceprints WHERE speaker_id = %s"
                 cursor.execute(sql, (speaker_id,))
-                if cursor.rowcount > 0:
-                    logger.info(f"声纹特征删除成功: {speaker_id}")
-                    return True
-                else:
-                    logger.warning(f"未找到要删除的声纹特征: {speaker_id}")
-                    return False
+                deleted = cursor.rowcount > 0
+                if deleted:
+                    self._log_changes(cursor, [speaker_id], "delete")
+            if deleted:
+                logger.info(f"声纹特征删除成功: {speaker_id}")
+            else:
+                logger.warning(f"未找到要删除的声纹特征: {speaker_id}")
+            return deleted
         except Exception as e:
             logger.error(f"删除声纹特征失败 {speaker_id}: {e}")
             return False
 
+    def ensure_change_log(self) -> None:
+        """创建声纹变更日志表（已存在时不做任何操作）"""
+        with db_connection.get_cursor() as cursor:
+            cursor.execute(CHANGES_TABLE_SQL)
+
+    def latest_change_id(self) -> int:
+        """
+        获取最新的声纹变更序号
+
+        Returns:
+            int: 最大变更序号，没有变更时为0
+        """
+        with db_connection.get_cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM voiceprint_changes")
+            return int(cursor.fetchone()[0])
+
+    def get_changes(
+        self, after_id: int, limit: int = 1000
+    ) -> List[Tuple[int, str, str, str]]:
+        """
+        按序号读取声纹变更
+
+        Args:
+            after_id: 从大于该序号的变更开始
+            limit: 最多返回的变更数
+
+        Returns:
+            List[Tuple[int, str, str, str]]: [(序号, 说话人ID, 操作, 来源)]
+        """
+        with db_connection.get_cursor() as cursor:
+            sql = """
+            SELECT id, speaker_id, op, source FROM voiceprint_changes
+            WHERE id > %s ORDER BY id LIMIT %s
+            """
+            cursor.execute(sql, (after_id, limit))
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def prune_changes(self, retention_seconds: float) -> int:
+        """
+        删除超过保留时长的声纹变更
+
+        Args:
+            retention_seconds: 保留秒数
+
+        Returns:
+            int: 删除的记录数
+        """
+        with db_connection.get_cursor() as cursor:
+            sql = """
+            DELETE FROM voiceprint_changes
+            WHERE created_at < NOW() - INTERVAL %s SECOND
+            """
+            cursor.execute(sql, (int(retention_seconds),))
+            return cursor.rowcount
+
     def count_voiceprints(self) -> int:
         """
         获取声纹特征总数
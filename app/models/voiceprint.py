@@ -16,9 +16,52 @@ class VoiceprintRegisterResponse(BaseModel):
 
     success: bool
     msg: str
+    speech_duration: Optional[float] = None  # 裁剪静音后的语音时长（秒）
 
     class Config:
-        schema_extra = {"example": {"success": True, "msg": "已登记: user_001"}}
+        schema_extra = {
+            "example": {
+                "success": True,
+                "msg": "已登记: user_001",
+                "speech_duration": 4.62,
+            }
+        }
+
+
+class VoiceprintBatchRegisterItem(BaseModel):
+    """批量注册中单个说话人的结果"""
+
+    speaker_id: str
+    success: bool
+    msg: str
+    speech_duration: Optional[float] = None  # 裁剪静音后的语音时长（秒）
+
+
+class VoiceprintBatchRegisterResponse(BaseModel):
+    """批量声纹注册响应模型"""
+
+    success: bool  # 全部注册成功时为True
+    total: int
+    succeeded: int
+    results: List[VoiceprintBatchRegisterItem]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "success": False,
+                "total": 2,
+                "succeeded": 1,
+                "results": [
+                    {
+                        "speaker_id": "user_001",
+                        "success": True,
+                        "msg": "已登记: user_001",
+                        "speech_duration": 4.62,
+                    },
+                    {"speaker_id": "user_002", "success": False, "msg": "音频文件过小"},
+                ],
+            }
+        }
 
 
 class VoiceprintIdentifyRequest(BaseModel):
@@ -30,11 +73,66 @@ class VoiceprintIdentifyRequest(BaseModel):
         schema_extra = {"example": {"speaker_ids": "user_001,user_002,user_003"}}
 
 
+class VoiceprintCandidate(BaseModel):
+    """声纹识别候选说话人"""
+
+    speaker_id: str
+    score: float
+
+
 class VoiceprintIdentifyResponse(BaseModel):
     """声纹识别响应模型"""
 
     speaker_id: str
     score: float
+    margin: Optional[float] = None  # 第一名与第二名的分差
+    candidates: Optional[List[VoiceprintCandidate]] = None  # top_k>1时返回
+    speech_duration: Optional[float] = None  # 裁剪静音后的语音时长（秒）
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "speaker_id": "user_001",
+                "score": 0.85,
+                "margin": 0.32,
+                "candidates": [
+                    {"speaker_id": "user_001", "score": 0.85},
+                    {"speaker_id": "user_002", "score": 0.53},
+                ],
+                "speech_duration": 3.18,
+            }
+        }
+
+
+class VoiceprintBatchIdentifyItem(BaseModel):
+    """批量识别中单段音频的结果"""
+
+    speaker_id: str
+    score: float
+    margin: Optional[float] = None
+    candidates: Optional[List[VoiceprintCandidate]] = None
+    speech_duration: Optional[float] = None  # 裁剪静音后的语音时长（秒）
+    error: Optional[str] = None  # 该段音频处理失败的原因
+
+
+class VoiceprintBatchIdentifyResponse(BaseModel):
+    """批量声纹识别响应模型"""
+
+    total: int
+    results: List[VoiceprintBatchIdentifyItem]
 
     class Config:
-        schema_extra = {"example": {"speaker_id": "user_001", "score": 0.85}}
+        schema_extra = {
+            "example": {
+                "total": 2,
+                "results": [
+                    {
+                        "speaker_id": "user_001",
+                        "score": 0.85,
+                        "margin": 0.32,
+                        "speech_duration": 3.18,
+                    },
+                    {"speaker_id": "", "score": 0.0, "error": "音频文件过小"},
+                ],
+            }
+        }
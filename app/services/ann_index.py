@@ -0,0 +1,239 @@
+import numpy as np
+from typing import List, Optional
+from ..core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    用部分排序取分数最高的k个下标
+
+    Args:
+        scores: 分数向量
+        k: 需要的数量
+
+    Returns:
+        np.ndarray: 按分数从高到低排列的下标
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(scores.shape[0])
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class IVFIndex:
+    """倒排文件(IVF)近似最近邻索引，纯NumPy实现
+
+    用球面k-means把归一化向量划分到nlist个簇，查询时只扫描与查询向量
+    最接近的nprobe个簇。索引只保存行号，向量本身由声纹库矩阵持有。
+    本类不加锁，由调用方保证线程安全。
+    """
+
+    def __init__(
+        self,
+        nlist: int = 0,
+        nprobe: int = 16,
+        train_iters: int = 10,
+        train_sample: int = 100000,
+        seed: int = 0,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iters = train_iters
+        self.train_sample = train_sample
+        self.trained_size = 0
+        self._rng = np.random.default_rng(seed)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._list_sizes = np.zeros(0, dtype=np.int64)
+        self._row_list = np.zeros(0, dtype=np.int64)
+        self._row_pos = np.zeros(0, dtype=np.int64)
+
+    @property
+    def is_trained(self) -> bool:
+        """是否已完成训练"""
+        return self._centroids is not None
+
+    @property
+    def ntotal(self) -> int:
+        """索引中的向量数量"""
+        return int(self._list_sizes.sum())
+
+    def assign(self, vectors: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        """
+        计算每个向量所属的簇
+
+        Args:
+            vectors: 归一化向量矩阵
+            chunk_size: 分块大小，控制临时矩阵内存
+
+        Returns:
+            np.ndarray: 簇编号
+        """
+        result = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], chunk_size):
+            block = vectors[start : start + chunk_size]
+            result[start : start + chunk_size] = np.argmax(
+                block @ self._centroids.T, axis=1
+            )
+        return result
+
+    def train(self, vectors: np.ndarray) -> None:
+        """
+        用球面k-means训练簇中心
+
+        Args:
+            vectors: 归一化向量矩阵
+        """
+        n = vectors.shape[0]
+        nlist = self.nlist or int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        if n > self.train_sample:
+            sample = vectors[self._rng.choice(n, self.train_sample, replace=False)]
+        else:
+            sample = vectors
+        self._centroids = sample[
+            self._rng.choice(sample.shape[0], nlist, replace=False)
+        ].copy()
+
+        for _ in range(self.train_iters):
+            assign = self.assign(sample)
+            counts = np.bincount(assign, minlength=nlist)
+            order = np.argsort(assign, kind="stable")
+            nonempty = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+            centroids = np.empty_like(self._centroids)
+            centroids[nonempty] = np.add.reduceat(sample[order], starts, axis=0)
+
+            # 空簇重新随机选取中心
+            empty = np.flatnonzero(counts == 0)
+            if empty.size:
+                centroids[empty] = sample[
+                    self._rng.choice(sample.shape[0], empty.size, replace=False)
+                ]
+
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            self._centroids = centroids / np.maximum(norms, 1e-12)
+
+        self.nlist = nlist
+        self.trained_size = n
+
+    def build(self, vectors: np.ndarray) -> None:
+        """
+        把全部向量加入索引，vectors的第i行对应行号i
+
+        Args:
+            vectors: 归一化向量矩阵
+        """
+        n = vectors.shape[0]
+        assign = self.assign(vectors)
+        counts = np.bincount(assign, minlength=self.nlist)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+
+        self._lists = []
+        for list_id in range(self.nlist):
+            rows = order[bounds[list_id] : bounds[list_id + 1]]
+            block = np.empty(max(16, rows.shape[0] * 2), dtype=np.int64)
+            block[: rows.shape[0]] = rows
+            self._lists.append(block)
+        self._list_sizes = counts.astype(np.int64)
+
+        self._row_list = np.full(max(16, n * 2), -1, dtype=np.int64)
+        self._row_pos = np.zeros_like(self._row_list)
+        self._row_list[order] = assign[order]
+        self._row_pos[order] = np.arange(n) - bounds[assign[order]]
+
+    def _ensure_row(self, row: int) -> None:
+        """确保行号映射数组足够大"""
+        if row < self._row_list.shape[0]:
+            return
+        size = max(row + 1, self._row_list.shape[0] * 2)
+        row_list = np.full(size, -1, dtype=np.int64)
+        row_pos = np.zeros(size, dtype=np.int64)
+        row_list[: self._row_list.shape[0]] = self._row_list
+        row_pos[: self._row_pos.shape[0]] = self._row_pos
+        self._row_list = row_list
+        self._row_pos = row_pos
+
+    def add(self, row: int, vector: np.ndarray) -> None:
+        """
+        增量加入一个向量
+
+        Args:
+            row: 向量在声纹库矩阵中的行号
+            vector: 归一化向量
+        """
+        list_id = int(np.argmax(self._centroids @ vector))
+        size = int(self._list_sizes[list_id])
+        block = self._lists[list_id]
+        if size >= block.shape[0]:
+            grown = np.empty(block.shape[0] * 2, dtype=np.int64)
+            grown[:size] = block[:size]
+            self._lists[list_id] = block = grown
+        block[size] = row
+        self._list_sizes[list_id] = size + 1
+
+        self._ensure_row(row)
+        self._row_list[row] = list_id
+        self._row_pos[row] = size
+
+    def remove(self, row: int) -> None:
+        """
+        删除一个向量，用簇内最后一个元素填补空位
+
+        Args:
+            row: 向量在声纹库矩阵中的行号
+        """
+        if row >= self._row_list.shape[0] or self._row_list[row] < 0:
+            return
+        list_id = int(self._row_list[row])
+        pos = int(self._row_pos[row])
+        last = int(self._list_sizes[list_id]) - 1
+        block = self._lists[list_id]
+        moved = int(block[last])
+        block[pos] = moved
+        self._row_pos[moved] = pos
+        self._list_sizes[list_id] = last
+        self._row_list[row] = -1
+
+    def move(self, old_row: int, new_row: int) -> None:
+        """
+        声纹库矩阵行号变化时更新索引（new_row必须已从索引中删除）
+
+        Args:
+            old_row: 原行号
+            new_row: 新行号
+        """
+        if old_row >= self._row_list.shape[0] or self._row_list[old_row] < 0:
+            return
+        list_id = int(self._row_list[old_row])
+        pos = int(self._row_pos[old_row])
+        self._lists[list_id][pos] = new_row
+        self._ensure_row(new_row)
+        self._row_list[new_row] = list_id
+        self._row_pos[new_row] = pos
+        self._row_list[old_row] = -1
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """
+        获取查询向量所在的nprobe个簇内的全部行号
+
+        Args:
+            query: 归一化查询向量
+            nprobe: 扫描的簇数量，越大召回越高、耗时越长
+
+        Returns:
+            np.ndarray: 候选行号
+        """
+        nprobe = max(1, min(nprobe or self.nprobe, self.nlist))
+        probe = top_k_indices(self._centroids @ query, nprobe)
+        return np.concatenate(
+            [self._lists[list_id][: self._list_sizes[list_id]] for list_id in probe]
+        )
@@ -0,0 +1,231 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from ..core.config import settings
+from ..core.executor import ExecutorBusyError
+from ..core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class _BatchItem:
+    """等待批处理的单个请求"""
+
+    __slots__ = ("audio", "duration", "future", "enqueued_at")
+
+    def __init__(self, audio: Any, duration: float):
+        self.audio = audio
+        self.duration = duration
+        self.future: Future = Future()
+        self.enqueued_at = time.time()
+
+
+class EmbeddingBatcher:
+    """声纹特征提取的动态微批调度器
+
+    在max_wait_ms内或凑满max_batch_size条请求后，将并发请求按时长分桶，
+    每个桶调用一次批量提取函数，再把结果分发回各个调用方。
+    一个桶需要几次模型前向由推理后端决定（direct后端把桶内片段填充到同一长度一次完成，
+    pipeline后端逐条计算），实际前向次数见推理统计的forward_passes。
+    max_inflight大于1时最多同时执行这么多批，供多个模型副本并行推理。
+    排队与执行中的请求数达到max_pending时拒绝新请求，与执行池的排队上限一致。
+    """
+
+    def __init__(
+        self,
+        extract_fn: Callable[[List[Any]], List[np.ndarray]],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        bucket_ratio: Optional[float] = None,
+        max_inflight: int = 1,
+        max_pending: Optional[int] = None,
+    ):
+        config = settings.batching
+        self._extract_fn = extract_fn
+        self.max_batch_size = int(max_batch_size or config.get("max_batch_size", 8))
+        self.max_wait = float(max_wait_ms or config.get("max_wait_ms", 10)) / 1000
+        self.bucket_ratio = float(bucket_ratio or config.get("bucket_ratio", 1.5))
+        self.max_inflight = max(1, int(max_inflight))
+        self.max_pending = int(max_pending or settings.executor.get("max_pending", 64))
+
+        # 所有执行槽都在忙时才继续收集，批次会随负载自然变大
+        self._slots = threading.Semaphore(self.max_inflight)
+        self._runner: Optional[ThreadPoolExecutor] = None
+        if self.max_inflight > 1:
+            self._runner = ThreadPoolExecutor(
+                max_workers=self.max_inflight, thread_name_prefix="embedding-batch"
+            )
+
+        self._queue: "queue.Queue[Optional[_BatchItem]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "items": 0,
+            "buckets": 0,
+            "wait": 0.0,
+            "rejected": 0,
+        }
+        self._pending = 0
+        self._thread = threading.Thread(
+            target=self._loop, name="embedding-batcher", daemon=True
+        )
+        self._thread.start()
+        logger.init_component(
+            f"声纹微批调度器(批大小: {self.max_batch_size}, 等待: {self.max_wait * 1000:.0f}ms, "
+            f"并行批次: {self.max_inflight})"
+        )
+
+    def submit(self, audio: Any, duration: float) -> Future:
+        """
+        提交一个待提取的音频
+
+        Args:
+            audio: 传给批量提取函数的音频输入
+            duration: 音频时长（秒），用于分桶
+
+        Returns:
+            Future: 完成后结果为声纹特征向量
+
+        Raises:
+            ExecutorBusyError: 排队与执行中的请求数已满
+        """
+        with self._stats_lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise ExecutorBusyError(f"微批调度排队任务已满({self._pending})")
+            self._pending += 1
+        item = _BatchItem(audio, duration)
+        item.future.add_done_callback(self._release)
+        self._queue.put(item)
+        return item.future
+
+    def _release(self, _: Future) -> None:
+        """请求完成后释放排队名额"""
+        with self._stats_lock:
+            self._pending -= 1
+
+    def _collect(self, first: _BatchItem) -> List[_BatchItem]:
+        """以第一个请求为起点收集一批请求"""
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is None:
+                # 停止信号放回队列，处理完当前批次后退出
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _bucketize(self, batch: List[_BatchItem]) -> List[List[_BatchItem]]:
+        """按时长排序分桶，桶内最长与最短时长之比不超过bucket_ratio"""
+        buckets: List[List[_BatchItem]] = []
+        for item in sorted(batch, key=lambda x: x.duration):
+            if (
+                buckets
+                and item.duration
+                <= max(buckets[-1][0].duration, 1e-3) * self.bucket_ratio
+            ):
+                buckets[-1].append(item)
+            else:
+                buckets.append([item])
+        return buckets
+
+    def _run_batch(self, batch: List[_BatchItem]) -> None:
+        """执行一批请求并分发结果"""
+        start_time = time.time()
+        buckets = self._bucketize(batch)
+        for bucket in buckets:
+            try:
+                embs = self._extract_fn([item.audio for item in bucket])
+                if len(embs) != len(bucket):
+                    raise RuntimeError(
+                        f"批量提取结果数量不匹配: {len(embs)} != {len(bucket)}"
+                    )
+            except Exception as e:
+                for item in bucket:
+                    item.future.set_exception(e)
+                continue
+            for item, emb in zip(bucket, embs):
+                item.future.set_result(emb)
+
+        wait_time = sum(start_time - item.enqueued_at for item in batch)
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["items"] += len(batch)
+            self._stats["buckets"] += len(buckets)
+            self._stats["wait"] += wait_time
+        logger.debug(
+            f"微批处理完成，请求数: {len(batch)}，分桶数: {len(buckets)}，"
+            f"耗时: {time.time() - start_time:.3f}秒"
+        )
+
+    def _loop(self) -> None:
+        """调度线程主循环"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._runner is None:
+                self._run_guarded(self._collect(item))
+                continue
+            self._slots.acquire()
+            self._runner.submit(self._run_guarded, self._collect(item), True)
+
+    def _run_guarded(self, batch: List[_BatchItem], release: bool = False) -> None:
+        """执行一批请求，异常只记录日志"""
+        try:
+            self._run_batch(batch)
+        except Exception as e:
+            logger.error(f"微批调度异常: {e}")
+        finally:
+            if release:
+                self._slots.release()
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        获取微批调度统计
+
+        Returns:
+            Dict[str, float]: 批次数、平均批大小、平均排队等待等
+        """
+        with self._stats_lock:
+            batches = self._stats["batches"] or 1
+            items = self._stats["items"] or 1
+            return {
+                "batches": self._stats["batches"],
+                "items": self._stats["items"],
+                "buckets": self._stats["buckets"],
+                "avg_batch_size": self._stats["items"] / batches,
+                "avg_wait_ms": self._stats["wait"] / items * 1000,
+                "queued": self._queue.qsize(),
+                "pending": self._pending,
+                "rejected": self._stats["rejected"],
+            }
+
+    def shutdown(self) -> None:
+        """停止调度线程"""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        if self._runner is not None:
+            self._runner.shutdown(wait=True)
+
+        # 停止后仍在队列中的请求直接失败，避免调用方永久等待
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item.future.set_exception(RuntimeError("声纹微批调度器已停止"))
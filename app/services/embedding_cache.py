@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from ..core.config import settings
+from ..core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class EmbeddingCache:
+    """按上传音频内容哈希缓存声纹特征的LRU缓存
+
+    键为原始音频字节与模型版本（模型、推理后端、量化模式及音频预处理配置）的哈希，
+    命中时跳过解码、重采样与推理。条目数超过max_entries时淘汰最久未使用的条目，
+    配置了disk_dir时被淘汰的条目写入本地磁盘，内存未命中时再从磁盘读取。
+    """
+
+    def __init__(self, model_version: str):
+        config = settings.embedding_cache
+        self.max_entries = int(config.get("max_entries", 10000))
+        self.ttl = float(config.get("ttl_seconds", 3600))
+        self.disk_dir = config.get("disk_dir", "")
+        self.disk_max_entries = int(config.get("disk_max_entries", 100000))
+        # 模型版本参与哈希，切换模型或预处理配置后旧条目自然失效
+        self._salt = hashlib.blake2b(
+            model_version.encode("utf-8"), digest_size=16
+        ).digest()
+
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, Optional[float], float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._disk_writes = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+        logger.init_component(
+            f"声纹特征缓存(条目上限: {self.max_entries}, TTL: {self.ttl:.0f}秒, "
+            f"磁盘: {self.disk_dir or '关闭'})"
+        )
+
+    def key(self, audio_bytes: bytes) -> str:
+        """
+        计算音频内容的缓存键
+
+        Args:
+            audio_bytes: 上传的原始音频字节
+
+        Returns:
+            str: 十六进制哈希
+        """
+        return hashlib.blake2b(audio_bytes, digest_size=20, key=self._salt).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.npy")
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, Optional[float]]]:
+        """
+        读取缓存的声纹特征
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Tuple[np.ndarray, Optional[float]]]: (声纹特征, 语音时长)，未命中为None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[2]):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0], entry[1]
+
+        entry = self._read_disk(key) if self.disk_dir else None
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            evicted = self._insert_locked(key, entry)
+        for evicted_key, evicted_entry in evicted:
+            self._write_disk(evicted_key, evicted_entry)
+        return entry[0], entry[1]
+
+    def put(self, key: str, emb: np.ndarray, duration: Optional[float]) -> None:
+        """
+        写入声纹特征
+
+        Args:
+            key: 缓存键
+            emb: 声纹特征
+            duration: 裁剪静音后的语音时长（秒）
+        """
+        emb = np.array(emb, dtype=np.float32)
+        emb.setflags(write=False)
+        with self._lock:
+            evicted = self._insert_locked(key, (emb, duration, time.time()))
+        for evicted_key, entry in evicted:
+            self._write_disk(evicted_key, entry)
+
+    def _insert_locked(self, key: str, entry: Tuple) -> list:
+        """在持有锁的情况下插入条目，返回被淘汰的条目"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._entries.popitem(last=False))
+            self._stats["evictions"] += 1
+        return evicted if self.disk_dir else []
+
+    def _write_disk(self, key: str, entry: Tuple) -> None:
+        """把淘汰的条目写入磁盘，特征之后附加语音时长与写入时间"""
+        emb, duration, created_at = entry
+        if self._expired(created_at):
+            return
+        try:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, emb)
+                f.write(json.dumps([duration, created_at]).encode("utf-8"))
+            os.replace(tmp_path, path)
+            # 每写入一定数量的文件才扫描一次目录
+            self._disk_writes += 1
+            if self._disk_writes % 256 == 0:
+                self._trim_disk()
+        except Exception as e:
+            logger.debug(f"声纹特征缓存写入磁盘失败 {key}: {e}")
+
+    def _read_disk(self, key: str) -> Optional[Tuple]:
+        """从磁盘读取条目，过期或损坏的文件直接删除"""
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                emb = np.load(f)
+                duration, created_at = json.loads(f.read().decode("utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"声纹特征缓存磁盘文件损坏 {key}: {e}")
+            created_at = 0.0
+            emb = duration = None
+        if emb is None or self._expired(created_at):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        emb.setflags(write=False)
+        return emb, duration, created_at
+
+    def _trim_disk(self) -> None:
+        """磁盘条目超过上限时删除最旧的文件"""
+        files = [x for x in os.scandir(self.disk_dir) if x.name.endswith(".npy")]
+        if len(files) <= self.disk_max_entries:
+            return
+        files.sort(key=lambda x: x.stat().st_mtime)
+        for entry in files[: len(files) - self.disk_max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            Dict[str, Any]: 条目数、命中/未命中次数与命中率
+        """
+        with self._lock:
+            lookups = (
+                self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            )
+            return {
+                "entries": len(self._entries),
+                **self._stats,
+                "hit_rate": (self._stats["hits"] + self._stats["disk_hits"])
+                / (lookups or 1),
+            }
@@ -0,0 +1,697 @@
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from ..core.config import settings
+from ..core.logger import get_logger
+from ..database.voiceprint_db import change_source, voiceprint_db
+from .ann_index import IVFIndex, top_k_indices
+
+logger = get_logger(__name__)
+
+
+def normalize_embedding(emb: np.ndarray) -> np.ndarray:
+    """
+    L2归一化声纹特征
+
+    Args:
+        emb: 声纹特征向量
+
+    Returns:
+        np.ndarray: 归一化后的float32向量
+    """
+    emb = np.asarray(emb, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(emb)
+    return emb / norm if norm > 0 else emb
+
+
+def normalize_embeddings(embs: np.ndarray) -> np.ndarray:
+    """
+    按行L2归一化声纹特征矩阵
+
+    Args:
+        embs: 声纹特征矩阵，每行一个向量
+
+    Returns:
+        np.ndarray: 归一化后的float32矩阵
+    """
+    embs = np.asarray(embs, dtype=np.float32)
+    embs = embs.reshape(embs.shape[0], -1)
+    norms = np.linalg.norm(embs, axis=1, keepdims=True)
+    return embs / np.maximum(norms, 1e-12)
+
+
+class VoiceprintGallery:
+    """进程内声纹库缓存
+
+    所有声纹以L2归一化后的float32连续矩阵保存，配合speaker_id到行号的映射，
+    打分时只需一次矩阵-向量乘法。注册与删除时同步更新。
+    声纹数量达到ann.min_size后在后台构建IVF索引，用于全库检索。
+    多个服务进程各自持有缓存，后台线程按sync_interval_seconds轮询数据库的声纹变更日志，
+    应用其他进程的注册与删除。预派生模式下由主进程在fork前加载，工作进程只追赶变更。
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        gallery_config = settings.gallery
+        self.negative_ttl = float(gallery_config.get("negative_ttl_seconds", 30))
+        self.negative_max_entries = int(
+            gallery_config.get("negative_max_entries", 100000)
+        )
+        self.sync_interval = float(gallery_config.get("sync_interval_seconds", 1.0))
+        self.change_retention = (
+            float(gallery_config.get("change_retention_hours", 24)) * 3600
+        )
+        self.sync_gap_timeout = float(gallery_config.get("sync_gap_timeout_seconds", 5))
+        ann_config = settings.ann
+        self.ann_enabled = ann_config.get("enabled", True)
+        self.ann_min_size = int(ann_config.get("min_size", 50000))
+        self.ann_nlist = int(ann_config.get("nlist", 0))
+        self.ann_nprobe = int(ann_config.get("nprobe", 16))
+        self.ann_train_iters = int(ann_config.get("train_iters", 10))
+        self.ann_train_sample = int(ann_config.get("train_sample", 100000))
+        self.ann_rebuild_factor = float(ann_config.get("rebuild_factor", 2.0))
+
+        self._index: Optional[IVFIndex] = None
+        self._index_building = False
+        self._index_generation = 0
+        self._pending_ops: Optional[List[Tuple[Any, ...]]] = None
+
+        self._initial_capacity = initial_capacity
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # 数据库中不存在的说话人 -> 过期时间，避免反复查询未注册的ID
+        self._absent: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        # 主进程fork前预加载的时间，工作进程据此决定追赶变更还是全量加载
+        self._preloaded_at: Optional[float] = None
+
+        # 已应用到的变更日志序号
+        self._change_cursor = 0
+        self._sync_stop = threading.Event()
+        self._sync_thread: Optional[threading.Thread] = None
+        self._sync_stats = {"changes": 0, "errors": 0}
+        self._gap_since: Optional[float] = None
+
+    @property
+    def size(self) -> int:
+        """缓存中的声纹数量"""
+        return self._size
+
+    @property
+    def dim(self) -> int:
+        """声纹特征维度，未加载任何声纹时为0"""
+        return self._matrix.shape[1] if self._matrix is not None else 0
+
+    def _ensure_capacity(self, rows: int, dim: int) -> None:
+        """确保矩阵容量足够，不足时按倍数扩容"""
+        if self._matrix is None:
+            capacity = max(self._initial_capacity, rows)
+            self._matrix = np.empty((capacity, dim), dtype=np.float32)
+            return
+
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        matrix = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+        matrix[: self._size] = self._matrix[: self._size]
+        self._matrix = matrix
+
+    def _upsert_locked(self, speaker_id: str, emb: np.ndarray) -> bool:
+        """在持有锁的情况下插入或更新一行"""
+        emb = normalize_embedding(emb)
+        if self._matrix is not None and emb.shape[0] != self._matrix.shape[1]:
+            logger.warning(
+                f"声纹维度不一致，跳过缓存: {speaker_id} ({emb.shape[0]} != {self._matrix.shape[1]})"
+            )
+            return False
+
+        self._absent.pop(speaker_id, None)
+        row = self._rows.get(speaker_id)
+        if row is None:
+            self._ensure_capacity(self._size + 1, emb.shape[0])
+            row = self._size
+            self._size += 1
+            self._ids.append(speaker_id)
+            self._rows[speaker_id] = row
+        else:
+            self._index_op("remove", row)
+        self._matrix[row] = emb
+        self._index_op("add", row, emb)
+        return True
+
+    def _index_op(self, op: str, *args) -> None:
+        """同步索引变更，索引构建期间先记录，构建完成后回放"""
+        if self._pending_ops is not None:
+            self._pending_ops.append((op, *args))
+        if self._index is not None:
+            getattr(self._index, op)(*args)
+
+    def load(
+        self, voiceprints: Dict[str, np.ndarray], build_index: bool = True
+    ) -> None:
+        """
+        用给定声纹整体替换缓存内容
+
+        Args:
+            voiceprints: {speaker_id: 特征向量}
+            build_index: 是否按需在后台构建IVF索引
+        """
+        ids: List[str] = []
+        vectors: List[np.ndarray] = []
+        dim = 0
+        for speaker_id, emb in voiceprints.items():
+            emb = np.asarray(emb, dtype=np.float32).reshape(-1)
+            dim = dim or emb.shape[0]
+            if emb.shape[0] != dim:
+                logger.warning(
+                    f"声纹维度不一致，跳过缓存: {speaker_id} ({emb.shape[0]} != {dim})"
+                )
+                continue
+            ids.append(speaker_id)
+            vectors.append(emb)
+
+        matrix = None
+        if vectors:
+            matrix = np.empty(
+                (max(self._initial_capacity, len(vectors)), dim), dtype=np.float32
+            )
+            block = matrix[: len(vectors)]
+            np.stack(vectors, out=block)
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            np.divide(block, norms, out=block, where=norms > 0)
+
+        with self._lock:
+            self._matrix = matrix
+            self._size = len(ids)
+            self._ids = ids
+            self._rows = {speaker_id: row for row, speaker_id in enumerate(ids)}
+            self._absent.clear()
+            self._index = None
+            self._index_generation += 1
+            self._loaded = True
+        if build_index:
+            self._maybe_build_index()
+
+    def ensure_loaded(self) -> None:
+        """
+        首次使用时从数据库加载全部声纹
+
+        已由preload()在fork前加载时只从变更日志追赶之后的变更；主进程的快照早于
+        变更日志的保留时长（之后的变更可能已被清理）或追赶失败时，重新全量加载
+        """
+        if self._loaded and self._preloaded_at is None:
+            return
+
+        with self._load_lock:
+            if self._preloaded_at is not None:
+                age = time.time() - self._preloaded_at
+                self._preloaded_at = None
+                if self._catch_up(age):
+                    return
+                self._loaded = False
+            if self._loaded:
+                return
+            start_time = time.time()
+            logger.start("加载声纹库缓存")
+            self._load_from_db()
+            logger.complete(
+                f"加载声纹库缓存，共{self._size}个", time.time() - start_time
+            )
+            self._start_sync()
+
+    def preload(self) -> None:
+        """
+        在预派生模式的主进程中、fork前加载全部声纹
+
+        不启动同步线程也不构建索引，工作进程通过写时复制共享声纹矩阵，
+        在ensure_loaded()中只追赶加载之后的变更，回收重启的工作进程也不再全量加载
+        """
+        with self._load_lock:
+            start_time = time.time()
+            logger.start("主进程预加载声纹库缓存")
+            self._load_from_db(build_index=False)
+            self._preloaded_at = time.time()
+            logger.complete(
+                f"主进程预加载声纹库缓存，共{self._size}个", time.time() - start_time
+            )
+
+    def _load_from_db(self, build_index: bool = True) -> None:
+        """从数据库全量加载声纹"""
+        # 先记下变更序号再全量加载，加载期间其他进程的变更会在之后同步
+        voiceprint_db.ensure_change_log()
+        self._change_cursor = voiceprint_db.latest_change_id()
+        self.load(voiceprint_db.get_voiceprints(), build_index)
+
+    def _catch_up(self, age: float) -> bool:
+        """
+        工作进程从主进程预加载的快照追赶变更
+
+        Args:
+            age: 快照距今的秒数
+
+        Returns:
+            bool: 是否追赶成功，失败时需要全量加载
+        """
+        if self.change_retention > 0 and age > self.change_retention / 2:
+            logger.info(
+                f"主进程的声纹库快照已加载{age / 3600:.1f}小时，接近变更日志保留时长，重新全量加载"
+            )
+            return False
+        start_time = time.time()
+        try:
+            applied = self.sync_changes()
+        except Exception as e:
+            logger.warning(f"从变更日志追赶声纹库缓存失败，重新全量加载: {e}")
+            return False
+        logger.complete(
+            f"从主进程快照追赶声纹变更{applied}个，共{self._size}个",
+            time.time() - start_time,
+        )
+        self._start_sync()
+        self._maybe_build_index()
+        return True
+
+    def upsert(self, speaker_id: str, emb: np.ndarray) -> None:
+        """
+        插入或更新一个说话人的声纹
+
+        Args:
+            speaker_id: 说话人ID
+            emb: 声纹特征向量
+        """
+        with self._lock:
+            self._upsert_locked(speaker_id, emb)
+        self._maybe_build_index()
+
+    def remove(self, speaker_id: str) -> bool:
+        """
+        删除一个说话人的声纹，用最后一行填补空位保持矩阵连续
+
+        Args:
+            speaker_id: 说话人ID
+
+        Returns:
+            bool: 缓存中是否存在该说话人
+        """
+        with self._lock:
+            return self._remove_locked(speaker_id)
+
+    def _remove_locked(self, speaker_id: str) -> bool:
+        """在持有锁的情况下删除一行"""
+        row = self._rows.pop(speaker_id, None)
+        if row is None:
+            return False
+
+        last = self._size - 1
+        self._index_op("remove", row)
+        if row != last:
+            last_id = self._ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._ids[row] = last_id
+            self._rows[last_id] = row
+            self._index_op("move", last, row)
+        self._ids.pop()
+        self._size -= 1
+        return True
+
+    def _start_sync(self) -> None:
+        """启动变更同步线程"""
+        if self.sync_interval <= 0 or self._sync_thread is not None:
+            return
+        self._sync_thread = threading.Thread(
+            target=self._sync_loop, name="gallery-sync", daemon=True
+        )
+        self._sync_thread.start()
+
+    def _sync_loop(self) -> None:
+        """定期同步其他进程的声纹变更，并清理过期的变更日志"""
+        last_prune = 0.0
+        while not self._sync_stop.wait(self.sync_interval):
+            try:
+                self.sync_changes()
+                if self.change_retention > 0 and time.time() - last_prune > 3600:
+                    voiceprint_db.prune_changes(self.change_retention)
+                    last_prune = time.time()
+            except Exception as e:
+                self._sync_stats["errors"] += 1
+                logger.warning(f"同步声纹变更失败: {e}")
+
+    def sync_changes(self, batch_size: int = 1000) -> int:
+        """
+        应用其他进程写入的声纹变更
+
+        同一说话人只看最后一次变更，本进程写入的变更已在本地生效，直接跳过。
+        注册变更对应的声纹已不存在（之后又被删除）或无法解码（其他模型提取、维度不符）时
+        按删除处理，序号照常推进
+
+        Args:
+            batch_size: 每次读取的变更数
+
+        Returns:
+            int: 应用的变更数
+
+        Raises:
+            Exception: 读取数据库失败时，不推进序号，下次重试
+        """
+        source = change_source()
+        applied = 0
+        while True:
+            fetched = voiceprint_db.get_changes(self._change_cursor, batch_size)
+            changes = self._contiguous_changes(fetched)
+            if not changes:
+                break
+
+            latest: Dict[str, Tuple[str, str]] = {}
+            for _, speaker_id, op, change_source_id in changes:
+                latest[speaker_id] = (op, change_source_id)
+            latest = {k: op for k, (op, src) in latest.items() if src != source}
+            upserts = [k for k, op in latest.items() if op == "upsert"]
+            voiceprints = (
+                voiceprint_db.get_voiceprints(upserts, strict=True) if upserts else {}
+            )
+            skipped = len(upserts) - len(voiceprints)
+            if skipped:
+                logger.debug(f"{skipped}个变更的声纹已删除或无法解码，按删除处理")
+
+            with self._lock:
+                for speaker_id, op in latest.items():
+                    if speaker_id in voiceprints:
+                        self._upsert_locked(speaker_id, voiceprints[speaker_id])
+                    else:
+                        self._remove_locked(speaker_id)
+            self._change_cursor = changes[-1][0]
+            applied += len(latest)
+            if len(changes) < len(fetched) or len(fetched) < batch_size:
+                break
+
+        if applied:
+            self._sync_stats["changes"] += applied
+            logger.info(f"已同步其他进程的声纹变更: {applied}个")
+            self._maybe_build_index()
+        return applied
+
+    def _contiguous_changes(self, changes: List[Tuple]) -> List[Tuple]:
+        """
+        只返回序号连续的变更
+
+        自增序号在事务提交前就已分配，序号出现空缺时可能有更早的事务尚未提交，
+        先停在空缺之前；空缺超过sync_gap_timeout_seconds（如事务已回滚）后再跳过
+        """
+        if not changes:
+            return []
+        if changes[0][0] != self._change_cursor + 1:
+            now = time.time()
+            if self._gap_since is None:
+                self._gap_since = now
+            if now - self._gap_since < self.sync_gap_timeout:
+                return []
+        self._gap_since = None
+        # 从第一条开始截到下一个空缺之前
+        count = 1
+        while count < len(changes) and changes[count][0] == changes[0][0] + count:
+            count += 1
+        return changes[:count]
+
+    def stop_sync(self) -> None:
+        """停止变更同步线程"""
+        self._sync_stop.set()
+
+    def _fetch_missing(self, speaker_ids: List[str]) -> None:
+        """从数据库补齐缓存中缺失的说话人（如由其他进程注册），
+        数据库中也不存在的说话人在negative_ttl_seconds内不再查询"""
+        now = time.time()
+        with self._lock:
+            missing = [
+                x
+                for x in speaker_ids
+                if x not in self._rows and self._absent.get(x, 0.0) <= now
+            ]
+        if not missing:
+            return
+
+        voiceprints = voiceprint_db.get_voiceprints(missing)
+        with self._lock:
+            for speaker_id, emb in voiceprints.items():
+                self._upsert_locked(speaker_id, emb)
+            if self.negative_ttl > 0:
+                self._remember_absent_locked(
+                    [x for x in missing if x not in voiceprints], now
+                )
+        if voiceprints:
+            self._maybe_build_index()
+
+    def _remember_absent_locked(self, speaker_ids: List[str], now: float) -> None:
+        """在持有锁的情况下记录不存在的说话人，超过条目上限时先清理过期条目"""
+        if len(self._absent) + len(speaker_ids) > self.negative_max_entries:
+            self._absent = {k: v for k, v in self._absent.items() if v > now}
+            if len(self._absent) + len(speaker_ids) > self.negative_max_entries:
+                self._absent.clear()
+        expires_at = now + self.negative_ttl
+        for speaker_id in speaker_ids:
+            self._absent[speaker_id] = expires_at
+
+    def _maybe_build_index(self) -> None:
+        """声纹数量达到阈值或较上次训练增长过多时，在后台（重新）构建索引"""
+        if not self.ann_enabled:
+            return
+
+        with self._lock:
+            if self._index_building or self._size < self.ann_min_size:
+                return
+            if (
+                self._index is not None
+                and self._size < self._index.trained_size * self.ann_rebuild_factor
+            ):
+                return
+            self._index_building = True
+
+        threading.Thread(
+            target=self._build_index, name="ivf-index-build", daemon=True
+        ).start()
+
+    def _build_index(self) -> None:
+        """构建IVF索引，构建期间的增删操作记录后回放"""
+        start_time = time.time()
+        try:
+            with self._lock:
+                snapshot = self._matrix[: self._size].copy()
+                generation = self._index_generation
+                self._pending_ops = []
+            logger.start(f"构建IVF索引，声纹数量: {snapshot.shape[0]}")
+
+            index = IVFIndex(
+                nlist=self.ann_nlist,
+                nprobe=self.ann_nprobe,
+                train_iters=self.ann_train_iters,
+                train_sample=self.ann_train_sample,
+            )
+            index.train(snapshot)
+            index.build(snapshot)
+
+            with self._lock:
+                if generation != self._index_generation:
+                    logger.info("声纹库已重新加载，丢弃本次构建的索引")
+                    return
+                for op, *args in self._pending_ops:
+                    getattr(index, op)(*args)
+                self._index = index
+            logger.complete(
+                f"构建IVF索引，簇数量: {index.nlist}", time.time() - start_time
+            )
+        except Exception as e:
+            logger.fail(
+                f"构建IVF索引失败，耗时: {time.time() - start_time:.3f}秒，错误: {e}"
+            )
+        finally:
+            with self._lock:
+                self._pending_ops = None
+                self._index_building = False
+
+    def score(
+        self, emb: np.ndarray, speaker_ids: Optional[List[str]] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        计算声纹与候选说话人的余弦相似度
+
+        Args:
+            emb: 待识别声纹特征向量
+            speaker_ids: 候选说话人ID列表，为空时与全部声纹打分
+
+        Returns:
+            Tuple[List[str], np.ndarray]: (说话人ID列表, 对应的相似度分数)
+        """
+        self.ensure_loaded()
+        if speaker_ids:
+            self._fetch_missing(speaker_ids)
+
+        query = normalize_embedding(emb)
+        with self._lock:
+            if self._size == 0:
+                return [], np.empty(0, dtype=np.float32)
+
+            if not speaker_ids:
+                return list(self._ids), self._matrix[: self._size] @ query
+
+            ids, rows = self._resolve_rows(speaker_ids)
+            if not rows:
+                return [], np.empty(0, dtype=np.float32)
+            return ids, self._matrix[rows] @ query
+
+    def _resolve_rows(self, speaker_ids: List[str]) -> Tuple[List[str], List[int]]:
+        """把说话人ID去重并映射为行号，忽略缓存中不存在的ID（需持有锁）"""
+        ids = []
+        rows = []
+        for speaker_id in dict.fromkeys(speaker_ids):
+            row = self._rows.get(speaker_id)
+            if row is not None:
+                ids.append(speaker_id)
+                rows.append(row)
+        return ids, rows
+
+    def score_batch(
+        self, embs: np.ndarray, speaker_ids: Optional[List[str]] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        计算多段声纹与候选说话人的相似度矩阵，一次矩阵乘法完成
+
+        Args:
+            embs: 待识别声纹特征矩阵，形状为(N, dim)
+            speaker_ids: 候选说话人ID列表，为空时与全部声纹打分
+
+        Returns:
+            Tuple[List[str], np.ndarray]: (说话人ID列表, 形状为(N, M)的相似度矩阵)
+        """
+        self.ensure_loaded()
+        if speaker_ids:
+            self._fetch_missing(speaker_ids)
+
+        queries = normalize_embeddings(embs)
+        with self._lock:
+            if self._size == 0:
+                return [], np.empty((queries.shape[0], 0), dtype=np.float32)
+
+            if not speaker_ids:
+                return list(self._ids), queries @ self._matrix[: self._size].T
+
+            ids, rows = self._resolve_rows(speaker_ids)
+            if not rows:
+                return [], np.empty((queries.shape[0], 0), dtype=np.float32)
+            return ids, queries @ self._matrix[rows].T
+
+    def search(
+        self, emb: np.ndarray, k: int = 1, nprobe: Optional[int] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        在整个声纹库中检索最相似的k个说话人
+
+        索引可用时只扫描候选簇，否则对全部声纹精确打分
+
+        Args:
+            emb: 待识别声纹特征向量
+            k: 返回数量
+            nprobe: 扫描的簇数量，为空时使用配置值
+
+        Returns:
+            Tuple[List[str], np.ndarray]: (说话人ID列表, 相似度分数)，按分数从高到低
+        """
+        self.ensure_loaded()
+
+        query = normalize_embedding(emb)
+        with self._lock:
+            if self._size == 0:
+                return [], np.empty(0, dtype=np.float32)
+
+            if self._index is not None:
+                rows = self._index.candidates(query, nprobe)
+                scores = self._matrix[rows] @ query
+            else:
+                rows = None
+                scores = self._matrix[: self._size] @ query
+
+            top = top_k_indices(scores, k)
+            if rows is not None:
+                ids = [self._ids[rows[i]] for i in top]
+            else:
+                ids = [self._ids[i] for i in top]
+            return ids, scores[top]
+
+    def search_batch(
+        self,
+        embs: np.ndarray,
+        k: int = 1,
+        nprobe: Optional[int] = None,
+        max_block: int = 1 << 24,
+    ) -> List[Tuple[List[str], np.ndarray]]:
+        """
+        在整个声纹库中为多段声纹分别检索最相似的k个说话人
+
+        索引可用时逐条扫描候选簇，否则按块做矩阵乘法精确打分
+
+        Args:
+            embs: 待识别声纹特征矩阵，形状为(N, dim)
+            k: 每段返回的数量
+            nprobe: 扫描的簇数量，为空时使用配置值
+            max_block: 单次矩阵乘法结果的最大元素数，控制临时内存
+
+        Returns:
+            List[Tuple[List[str], np.ndarray]]: 每段的(说话人ID列表, 相似度分数)，按分数从高到低
+        """
+        self.ensure_loaded()
+
+        queries = normalize_embeddings(embs)
+        results: List[Tuple[List[str], np.ndarray]] = []
+        with self._lock:
+            if self._size == 0:
+                return [([], np.empty(0, dtype=np.float32)) for _ in queries]
+
+            if self._index is not None:
+                for query in queries:
+                    rows = self._index.candidates(query, nprobe)
+                    scores = self._matrix[rows] @ query
+                    top = top_k_indices(scores, k)
+                    results.append(([self._ids[rows[i]] for i in top], scores[top]))
+                return results
+
+            matrix = self._matrix[: self._size]
+            step = max(1, max_block // self._size)
+            for start in range(0, queries.shape[0], step):
+                block = queries[start : start + step] @ matrix.T
+                for scores in block:
+                    top = top_k_indices(scores, k)
+                    results.append(([self._ids[i] for i in top], scores[top]))
+            return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取声纹库缓存统计
+
+        Returns:
+            Dict[str, Any]: 缓存规模与索引状态
+        """
+        with self._lock:
+            stats = {
+                "size": self._size,
+                "dim": self.dim,
+                "loaded": self._loaded,
+                "absent": len(self._absent),
+                "sync": {"cursor": self._change_cursor, **self._sync_stats},
+                "index_building": self._index_building,
+            }
+            if self._index is not None:
+                stats["index"] = {
+                    "nlist": self._index.nlist,
+                    "nprobe": self._index.nprobe,
+                    "ntotal": self._index.ntotal,
+                    "trained_size": self._index.trained_size,
+                }
+            return stats
+
+
+# 全局声纹库缓存实例
+voiceprint_gallery = VoiceprintGallery()
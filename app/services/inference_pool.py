@@ -0,0 +1,323 @@
+"""
+多进程推理池 - 每个工作进程持有独立的声纹模型副本
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional
+import numpy as np
+from ..core.config import settings
+from ..core.executor import ExecutorBusyError
+from ..core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _worker_main(conn, device: str, num_threads: int) -> None:
+    """
+    工作进程入口：加载模型、预热，然后循环处理推理请求
+
+    Args:
+        conn: 与主进程通信的管道端
+        device: 推理设备
+        num_threads: torch线程数
+    """
+    import torch
+    from ..core.logger import setup_logging
+    from .model_loader import load_backend
+    from .quantization import apply_configured_quantization
+
+    setup_logging()
+    torch.set_num_threads(num_threads)
+    start_time = time.time()
+    # 工作进程跳过一致性与精度校验，避免每次重启都重复校准
+    backend, _ = load_backend(device)
+    apply_configured_quantization([backend], device, verify=False)
+    rng = np.random.default_rng(42)
+    backend.embed([rng.standard_normal(16000).astype(np.float32) * 0.1])
+    conn.send(("ready", time.time() - start_time))
+
+    while True:
+        try:
+            audios = conn.recv()
+        except EOFError:
+            break
+        if audios is None:
+            break
+        try:
+            conn.send(("ok", backend.embed(audios)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Task:
+    """等待工作进程处理的推理请求"""
+
+    __slots__ = ("audios", "future", "enqueued_at")
+
+    def __init__(self, audios: List[Any]):
+        self.audios = audios
+        self.future: Future = Future()
+        self.enqueued_at = time.time()
+
+
+class _Worker:
+    """工作进程及其在主进程中的调度线程"""
+
+    def __init__(self, pool: "InferencePool", index: int):
+        self.pool = pool
+        self.index = index
+        self.process: Optional[mp.process.BaseProcess] = None
+        self.conn = None
+        self.ready = False
+        self.busy = False
+        self.restarts = 0
+        self.tasks = 0
+        self.failures = 0
+        self.thread = threading.Thread(
+            target=self._loop, name=f"inference-worker-{index}", daemon=True
+        )
+
+    def _spawn(self) -> bool:
+        """启动工作进程并等待模型加载完成"""
+        parent_conn, child_conn = self.pool.context.Pipe()
+        process = self.pool.context.Process(
+            target=_worker_main,
+            args=(child_conn, self.pool.device, self.pool.threads_per_worker),
+            name=f"voiceprint-inference-{self.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self.process, self.conn = process, parent_conn
+
+        deadline = time.time() + self.pool.start_timeout
+        while time.time() < deadline and not self.pool.stopped:
+            if parent_conn.poll(self.pool.health_interval):
+                try:
+                    status, load_time = parent_conn.recv()
+                except EOFError:
+                    break
+                if status == "ready":
+                    self.ready = True
+                    logger.init_component(
+                        f"推理工作进程[{self.index}](pid: {process.pid}, 加载耗时: {load_time:.3f}秒)"
+                    )
+                    return True
+            if not process.is_alive():
+                break
+
+        logger.fail(f"推理工作进程[{self.index}]启动失败")
+        self._terminate()
+        return False
+
+    def _terminate(self) -> None:
+        """结束工作进程"""
+        self.ready = False
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=5)
+        if self.conn is not None:
+            self.conn.close()
+        self.process, self.conn = None, None
+
+    def _restart(self, reason: str) -> None:
+        """重启异常的工作进程"""
+        logger.warning(f"推理工作进程[{self.index}]{reason}，正在重启")
+        self._terminate()
+        self.restarts += 1
+
+    def _run(self, task: _Task) -> None:
+        """把一个请求交给工作进程并等待结果，期间检查进程是否存活"""
+        self.busy = True
+        deadline = time.time() + self.pool.task_timeout
+        try:
+            self.conn.send(task.audios)
+            while not self.conn.poll(self.pool.health_interval):
+                if not self.process.is_alive():
+                    raise RuntimeError("推理工作进程异常退出")
+                if time.time() > deadline:
+                    raise TimeoutError(f"推理超时({self.pool.task_timeout:.0f}秒)")
+            status, payload = self.conn.recv()
+        except (EOFError, OSError, RuntimeError, TimeoutError) as e:
+            self.failures += 1
+            task.future.set_exception(RuntimeError(f"推理工作进程失败: {e}"))
+            self._restart(str(e))
+            return
+        finally:
+            self.busy = False
+
+        self.tasks += 1
+        if status == "ok":
+            task.future.set_result(payload)
+        else:
+            self.failures += 1
+            task.future.set_exception(RuntimeError(payload))
+
+    def _loop(self) -> None:
+        """调度线程主循环：保证进程可用后从共享队列取请求"""
+        while not self.pool.stopped:
+            if not self.ready and not self._spawn():
+                time.sleep(self.pool.restart_delay)
+                continue
+            try:
+                task = self.pool.tasks.get(timeout=self.pool.health_interval)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    self._restart("已退出")
+                continue
+            if task is None:
+                break
+            if time.time() - task.enqueued_at > self.pool.task_timeout:
+                # 排队已超时的请求不再执行，调用方可能已经放弃等待
+                if task.future.set_running_or_notify_cancel():
+                    task.future.set_exception(
+                        ExecutorBusyError(
+                            f"推理请求排队超时({self.pool.task_timeout:.0f}秒)"
+                        )
+                    )
+                continue
+            if task.future.set_running_or_notify_cancel():
+                self._run(task)
+
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=5)
+            except (OSError, ValueError):
+                pass
+        self._terminate()
+
+
+class InferencePool:
+    """多进程推理池
+
+    启动K个工作进程，各自加载模型副本并固定torch线程数，
+    主进程通过共享请求队列分发推理请求。每个工作进程由一个调度线程看护，
+    进程退出或推理超时时，正在处理的请求失败并自动重启该进程。
+    """
+
+    def __init__(self, device: str, workers: Optional[int] = None):
+        config = settings.inference
+        self.device = device
+        self.workers = int(workers or config.get("process_workers", 0))
+        self.threads_per_worker = int(config.get("threads_per_worker", 0)) or max(
+            1, mp.cpu_count() // max(self.workers, 1)
+        )
+        self.health_interval = float(config.get("health_interval", 1.0))
+        self.task_timeout = float(config.get("task_timeout", 60))
+        self.start_timeout = float(config.get("start_timeout", 300))
+        self.restart_delay = float(config.get("restart_delay", 1.0))
+
+        self.context = mp.get_context("spawn")
+        self.tasks: "queue.Queue[Optional[_Task]]" = queue.Queue()
+        self.stopped = False
+        self._workers = [_Worker(self, i) for i in range(self.workers)]
+
+    def start(self, wait: bool = True) -> None:
+        """
+        启动所有工作进程
+
+        Args:
+            wait: 是否等待至少一个工作进程就绪
+        """
+        start_time = time.time()
+        logger.start(
+            f"启动推理工作进程，数量: {self.workers}，每进程线程数: {self.threads_per_worker}"
+        )
+        for worker in self._workers:
+            worker.thread.start()
+        while wait and not any(w.ready for w in self._workers):
+            if time.time() - start_time > self.start_timeout:
+                raise RuntimeError("推理工作进程启动超时")
+            time.sleep(0.1)
+        logger.complete("启动推理工作进程", time.time() - start_time)
+
+    def submit(self, audios: List[Any]) -> Future:
+        """
+        提交一次批量推理
+
+        Args:
+            audios: 16kHz波形或音频文件路径列表
+
+        Returns:
+            Future: 完成后结果为float32特征矩阵
+        """
+        if self.stopped:
+            raise RuntimeError("推理工作进程池已停止")
+        task = _Task(audios)
+        self.tasks.put(task)
+        return task.future
+
+    def infer(self, audios: List[Any]) -> np.ndarray:
+        """
+        同步批量推理
+
+        排队与执行各自最多task_timeout秒；没有就绪的工作进程时直接失败，
+        不让请求在进程反复重启期间无限等待
+
+        Args:
+            audios: 16kHz波形或音频文件路径列表
+
+        Returns:
+            np.ndarray: float32特征矩阵，每行对应一个输入
+
+        Raises:
+            ExecutorBusyError: 没有就绪的工作进程，或等待超时
+        """
+        if not any(worker.ready for worker in self._workers):
+            raise ExecutorBusyError("没有就绪的推理工作进程")
+        future = self.submit(audios)
+        try:
+            return future.result(timeout=self.task_timeout * 2 + self.health_interval)
+        except FutureTimeoutError:
+            future.cancel()
+            raise ExecutorBusyError(
+                f"推理请求等待超时({self.task_timeout * 2:.0f}秒)"
+            ) from None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取工作进程状态统计
+
+        Returns:
+            Dict[str, Any]: 进程数、就绪/忙碌数、重启次数及各进程明细
+        """
+        return {
+            "workers": self.workers,
+            "threads_per_worker": self.threads_per_worker,
+            "ready": sum(1 for w in self._workers if w.ready),
+            "busy": sum(1 for w in self._workers if w.busy),
+            "queued": self.tasks.qsize(),
+            "restarts": sum(w.restarts for w in self._workers),
+            "processes": [
+                {
+                    "pid": w.process.pid if w.process is not None else None,
+                    "ready": w.ready,
+                    "busy": w.busy,
+                    "tasks": w.tasks,
+                    "failures": w.failures,
+                    "restarts": w.restarts,
+                }
+                for w in self._workers
+            ],
+        }
+
+    def shutdown(self) -> None:
+        """停止所有工作进程，排队中的请求直接失败"""
+        self.stopped = True
+        while True:
+            try:
+                task = self.tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None:
+                task.future.set_exception(RuntimeError("推理工作进程池已停止"))
+        for _ in self._workers:
+            self.tasks.put(None)
+        for worker in self._workers:
+            worker.thread.join(timeout=5)
+        logger.info("推理工作进程池已关闭")
@@ -0,0 +1,623 @@
+import os
+import time
+import numpy as np
+import torch
+from typing import Any, Dict, List, Optional, Tuple
+from ..core.config import MODEL_ID, settings
+from ..core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def select_device() -> str:
+    """
+    选择推理设备
+
+    Returns:
+        str: 有CUDA时为gpu，否则为cpu
+    """
+    if torch.cuda.is_available():
+        logger.info(f"使用GPU设备: {torch.cuda.get_device_name(0)}")
+        return "gpu"
+    logger.info("使用CPU设备")
+    return "cpu"
+
+
+def split_threads(parts: int) -> int:
+    """
+    把torch线程数平分给多个同时推理的模型副本
+
+    Args:
+        parts: 副本数量
+
+    Returns:
+        int: 每个副本的torch线程数
+    """
+    threads = max(1, torch.get_num_threads() // max(parts, 1))
+    torch.set_num_threads(threads)
+    return threads
+
+
+def load_pipeline(device: str) -> Any:
+    """
+    加载modelscope声纹识别pipeline
+
+    Args:
+        device: 推理设备（gpu / cpu）
+
+    Returns:
+        Any: modelscope pipeline实例
+    """
+    from modelscope.pipelines import pipeline
+    from modelscope.utils.constant import Tasks
+
+    start_time = time.time()
+    logger.info(f"开始加载模型: {MODEL_ID}")
+    model = pipeline(task=Tasks.speaker_verification, model=MODEL_ID, device=device)
+    logger.debug(f"模型加载完成，耗时: {time.time() - start_time:.3f}秒")
+    return model
+
+
+def to_numpy(x) -> np.ndarray:
+    """
+    将torch tensor或其他类型转为numpy数组
+
+    Args:
+        x: 输入数据
+
+    Returns:
+        np.ndarray: numpy数组
+    """
+    return x.cpu().numpy() if torch.is_tensor(x) else np.asarray(x)
+
+
+def run_pipeline(model: Any, audios: List[Any]) -> np.ndarray:
+    """
+    调用pipeline批量提取声纹特征
+
+    Args:
+        model: modelscope pipeline实例
+        audios: 16kHz波形或音频文件路径列表
+
+    Returns:
+        np.ndarray: float32特征矩阵，每行对应一个输入
+    """
+    result = model(audios, output_emb=True)
+    embs = to_numpy(result["embs"]).astype(np.float32)
+    return embs.reshape(len(audios), -1)
+
+
+class PipelineBackend:
+    """modelscope pipeline推理后端，每次调用经过pipeline的预处理与输出封装"""
+
+    name = "pipeline"
+    quantizable = True
+
+    def __init__(self, pipeline: Any):
+        self.pipeline = pipeline
+        self.forward_calls = 0
+
+    @property
+    def module(self) -> torch.nn.Module:
+        """pipeline内的torch模型"""
+        return self.pipeline.model
+
+    @module.setter
+    def module(self, module: torch.nn.Module) -> None:
+        self.pipeline.model = module
+
+    def embed(self, audios: List[Any]) -> np.ndarray:
+        """
+        批量提取声纹特征
+
+        Args:
+            audios: 16kHz波形或音频文件路径列表
+
+        Returns:
+            np.ndarray: float32特征矩阵，每行对应一个输入
+        """
+        # pipeline内部逐条调用模型，每个输入各算一次前向
+        self.forward_calls += len(audios)
+        return run_pipeline(self.pipeline, audios)
+
+
+class DirectBackend:
+    """直接调用CAM++网络的推理后端
+
+    用torchaudio.compliance.kaldi计算与modelscope一致的fbank特征（减去均值），
+    按帧数排序分组，组内最长与最短帧数之比不超过pad_ratio，
+    每组填充到组内最长帧数后在inference_mode下一次前向计算。
+    填充方式为循环重复片段自身的特征：CAM++的上下文均值与统计池化看到的仍是该片段的分布，
+    不需要网络支持长度掩码（导出的TorchScript/ONNX图同样适用），与逐条推理的差异很小；
+    pad_ratio为1时只把等长片段拼成一批，结果与逐条推理完全一致。
+    """
+
+    name = "direct"
+    quantizable = True
+
+    def __init__(
+        self,
+        module: torch.nn.Module,
+        feature_dim: int = 80,
+        sample_rate: int = 16000,
+        pad_ratio: Optional[float] = None,
+    ):
+        self.module = module
+        self.feature_dim = feature_dim
+        self.sample_rate = sample_rate
+        # 默认与微批调度的分桶比例一致，同一个桶在一次前向中完成
+        self.pad_ratio = max(
+            1.0, float(pad_ratio or settings.batching.get("bucket_ratio", 1.5))
+        )
+        self.forward_calls = 0
+
+    @classmethod
+    def from_pipeline(cls, pipeline: Any) -> "DirectBackend":
+        """
+        从已加载的pipeline中取出CAM++网络，丢弃pipeline封装
+
+        Args:
+            pipeline: modelscope pipeline实例
+
+        Returns:
+            DirectBackend: 推理后端
+        """
+        model = pipeline.model
+        module = getattr(model, "embedding_model", None)
+        if not isinstance(module, torch.nn.Module):
+            raise RuntimeError("pipeline中未找到CAM++网络(embedding_model)")
+        module.eval()
+        return cls(module, int(getattr(model, "feature_dim", 80)))
+
+    @property
+    def device(self) -> torch.device:
+        """模型参数所在设备"""
+        for param in self.module.parameters():
+            return param.device
+        return torch.device("cpu")
+
+    def _features(self, audio: Any) -> torch.Tensor:
+        """计算一段音频的fbank特征，形状为(帧数, feature_dim)"""
+        import torchaudio.compliance.kaldi as kaldi
+
+        if isinstance(audio, str):
+            import soundfile as sf
+
+            audio, _ = sf.read(audio, dtype="float32")
+        waveform = torch.as_tensor(np.ascontiguousarray(audio, dtype=np.float32))
+        feature = kaldi.fbank(
+            waveform.reshape(1, -1),
+            num_mel_bins=self.feature_dim,
+            sample_frequency=self.sample_rate,
+        )
+        return feature - feature.mean(dim=0, keepdim=True)
+
+    def _groups(self, frames: List[int]) -> List[List[int]]:
+        """按帧数排序分组，组内最长与最短帧数之比不超过pad_ratio"""
+        groups: List[List[int]] = []
+        for i in sorted(range(len(frames)), key=lambda i: frames[i]):
+            if groups and frames[i] <= frames[groups[-1][0]] * self.pad_ratio:
+                groups[-1].append(i)
+            else:
+                groups.append([i])
+        return groups
+
+    @staticmethod
+    def _pad(feature: torch.Tensor, frames: int) -> torch.Tensor:
+        """循环重复特征直到指定帧数"""
+        if feature.shape[0] >= frames:
+            return feature
+        repeats = -(-frames // feature.shape[0])
+        return feature.repeat(repeats, 1)[:frames]
+
+    def embed(self, audios: List[Any]) -> np.ndarray:
+        """
+        批量提取声纹特征
+
+        Args:
+            audios: 16kHz波形或音频文件路径列表
+
+        Returns:
+            np.ndarray: float32特征矩阵，每行对应一个输入
+        """
+        embs: List[Optional[np.ndarray]] = [None] * len(audios)
+        with torch.inference_mode():
+            features = [self._features(audio) for audio in audios]
+            for indices in self._groups([feature.shape[0] for feature in features]):
+                frames = max(features[i].shape[0] for i in indices)
+                batch = torch.stack([self._pad(features[i], frames) for i in indices])
+                out = to_numpy(self._forward(batch)).astype(np.float32)
+                self.forward_calls += 1
+                for i, emb in zip(indices, out.reshape(len(indices), -1)):
+                    embs[i] = emb
+        return np.stack(embs)
+
+    def _forward(self, batch: torch.Tensor) -> Any:
+        """对形状为(batch, 帧数, feature_dim)的特征做一次前向计算"""
+        return self.module(batch.to(self.device))
+
+
+class TorchScriptBackend(DirectBackend):
+    """运行export_model.py导出的TorchScript图，不依赖modelscope"""
+
+    name = "torchscript"
+    quantizable = False
+
+    @classmethod
+    def load(cls, path: str, device: str) -> "TorchScriptBackend":
+        """
+        加载TorchScript模型
+
+        Args:
+            path: 模型文件路径
+            device: 推理设备（gpu / cpu）
+
+        Returns:
+            TorchScriptBackend: 推理后端
+        """
+        map_location = "cuda" if device == "gpu" else "cpu"
+        module = torch.jit.load(path, map_location=map_location)
+        module.eval()
+        return cls(module, int(settings.inference.get("feature_dim", 80)))
+
+
+class OnnxBackend(DirectBackend):
+    """用ONNX Runtime运行export_model.py导出的ONNX图，不依赖modelscope"""
+
+    name = "onnx"
+    quantizable = False
+
+    def __init__(self, session: Any, feature_dim: int = 80, sample_rate: int = 16000):
+        super().__init__(None, feature_dim, sample_rate)
+        self.session = session
+        self._input_name = session.get_inputs()[0].name
+
+    @classmethod
+    def load(cls, path: str, device: str) -> "OnnxBackend":
+        """
+        创建ONNX Runtime会话，线程数读取inference.onnx_intra_threads/onnx_inter_threads
+
+        Args:
+            path: 模型文件路径
+            device: 推理设备（gpu / cpu）
+
+        Returns:
+            OnnxBackend: 推理后端
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("onnx推理后端需要安装onnxruntime") from e
+
+        config = settings.inference
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = int(config.get("onnx_intra_threads", 0))
+        options.inter_op_num_threads = int(config.get("onnx_inter_threads", 0))
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = ["CPUExecutionProvider"]
+        if device == "gpu" and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+        session = ort.InferenceSession(path, options, providers=providers)
+        return cls(session, int(config.get("feature_dim", 80)))
+
+    @property
+    def device(self) -> torch.device:
+        """特征在CPU上计算后交给ONNX Runtime"""
+        return torch.device("cpu")
+
+    def _forward(self, batch: torch.Tensor) -> Any:
+        return self.session.run(None, {self._input_name: batch.numpy()})[0]
+
+
+# 离线模型包的清单文件名、权重文件名与格式版本
+BUNDLE_MANIFEST = "manifest.json"
+BUNDLE_WEIGHTS = "weights.pt"
+BUNDLE_FORMAT_VERSION = 1
+
+
+class BundleBackend(DirectBackend):
+    """加载pack_model.py打包的离线模型包，不经过modelscope hub解析
+
+    只导入CAM++网络类所在的模块，在meta设备上构建网络结构，
+    再把内存映射的权重直接挂到参数上，加载时不复制权重数据。
+    """
+
+    name = "bundle"
+    quantizable = True
+
+    @classmethod
+    def load(cls, path: str, device: str) -> "BundleBackend":
+        """
+        加载离线模型包
+
+        Args:
+            path: 模型包目录
+            device: 推理设备（gpu / cpu）
+
+        Returns:
+            BundleBackend: 推理后端
+        """
+        import importlib
+        import json
+
+        with open(os.path.join(path, BUNDLE_MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+            raise RuntimeError(
+                f"不支持的模型包格式版本: {manifest.get('format_version')}，"
+                "请用pack_model.py重新打包"
+            )
+
+        module_name, class_name = manifest["network"].split(":")
+        network = getattr(importlib.import_module(module_name), class_name)
+        with torch.device("meta"):
+            module = network(**manifest["init_kwargs"])
+        state_dict = torch.load(
+            os.path.join(path, manifest["weights"]),
+            map_location="cpu",
+            mmap=True,
+            weights_only=True,
+        )
+        module.load_state_dict(state_dict, assign=True)
+        missing = [
+            name
+            for name, tensor in [*module.named_parameters(), *module.named_buffers()]
+            if tensor.is_meta
+        ]
+        if missing:
+            raise RuntimeError(f"模型包缺少权重: {', '.join(missing)}")
+        if device == "gpu":
+            module = module.cuda()
+        module.eval()
+        return cls(module, manifest["feature_dim"], manifest["sample_rate"])
+
+
+def bundle_path() -> str:
+    """
+    离线模型包目录
+
+    Returns:
+        str: inference.bundle_dir，默认为export_dir下的campplus_bundle
+    """
+    config = settings.inference
+    return config.get("bundle_dir") or os.path.join(
+        config.get("export_dir", "models"), "campplus_bundle"
+    )
+
+
+def save_bundle(backend: DirectBackend, path: str) -> Dict[str, Any]:
+    """
+    把direct后端的CAM++网络打包为离线模型包
+
+    Args:
+        backend: direct推理后端
+        path: 模型包目录
+
+    Returns:
+        Dict[str, Any]: 写入的清单
+    """
+    import inspect
+    import json
+
+    module = backend.module
+    with torch.inference_mode():
+        dim = module(torch.zeros(1, 200, backend.feature_dim)).shape[-1]
+    # 只记录网络构造函数接受的参数，其余沿用默认值
+    params = inspect.signature(type(module)).parameters
+    init_kwargs = {
+        key: value
+        for key, value in {
+            "feat_dim": backend.feature_dim,
+            "embedding_size": int(dim),
+        }.items()
+        if key in params
+    }
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "model_id": MODEL_ID,
+        "network": f"{type(module).__module__}:{type(module).__qualname__}",
+        "init_kwargs": init_kwargs,
+        "feature_dim": backend.feature_dim,
+        "sample_rate": backend.sample_rate,
+        "embedding_dim": int(dim),
+        "weights": BUNDLE_WEIGHTS,
+        "torch_version": torch.__version__,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    os.makedirs(path, exist_ok=True)
+    # 先写临时文件再替换，清单最后写入，中途失败不会留下不完整的模型包
+    state_dict = {
+        name: tensor.detach().cpu().contiguous()
+        for name, tensor in module.state_dict().items()
+    }
+    weights_path = os.path.join(path, BUNDLE_WEIGHTS)
+    torch.save(state_dict, f"{weights_path}.tmp")
+    os.replace(f"{weights_path}.tmp", weights_path)
+    manifest_path = os.path.join(path, BUNDLE_MANIFEST)
+    with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    return manifest
+
+
+# 导出模型的推理后端 -> (后端类, 默认文件名)
+EXPORTED_BACKENDS = {
+    "torchscript": (TorchScriptBackend, "campplus.ts"),
+    "onnx": (OnnxBackend, "campplus.onnx"),
+}
+
+
+def exported_model_path(name: str) -> str:
+    """
+    导出模型文件路径，inference.model_path优先，否则为export_dir下的默认文件名
+
+    Args:
+        name: 后端名称（torchscript / onnx）
+
+    Returns:
+        str: 模型文件路径
+    """
+    config = settings.inference
+    if config.get("model_path"):
+        return config["model_path"]
+    return os.path.join(config.get("export_dir", "models"), EXPORTED_BACKENDS[name][1])
+
+
+def load_calibration_audios() -> List[np.ndarray]:
+    """
+    加载精度校验用的校准音频
+
+    优先读取inference.calibration_dir下的音频，没有时生成随机波形代替
+
+    Returns:
+        List[np.ndarray]: 16kHz单声道float32波形列表
+    """
+    from ..utils.audio_utils import audio_processor
+
+    config = settings.inference
+    calibration_dir = config.get("calibration_dir", "")
+    size = int(config.get("calibration_size", 16))
+
+    audios = []
+    if calibration_dir and os.path.isdir(calibration_dir):
+        for name in sorted(os.listdir(calibration_dir))[:size]:
+            try:
+                with open(os.path.join(calibration_dir, name), "rb") as f:
+                    audios.append(audio_processor.load_waveform(f.read()))
+            except Exception as e:
+                logger.warning(f"校准音频读取失败 {name}: {e}")
+    if audios:
+        return audios
+
+    logger.warning("未找到校准音频，使用随机波形进行精度校验")
+    rng = np.random.default_rng(42)
+    return [
+        rng.standard_normal(int(16000 * seconds)).astype(np.float32) * 0.1
+        for seconds in np.linspace(1.0, 5.0, size)
+    ]
+
+
+def timed_embeddings(
+    backend: Any, audios: List[np.ndarray], batched: bool = False
+) -> Tuple[np.ndarray, float]:
+    """
+    提取校准音频的归一化特征并计时
+
+    Args:
+        backend: 推理后端
+        audios: 校准音频
+        batched: 是否一次调用完成全部音频，否则逐条推理
+
+    Returns:
+        Tuple[np.ndarray, float]: (L2归一化特征矩阵, 总耗时秒数)
+    """
+    start_time = time.time()
+    if batched:
+        embs = backend.embed(audios)
+    else:
+        embs = np.concatenate([backend.embed([audio]) for audio in audios])
+    embs /= np.maximum(np.linalg.norm(embs, axis=1, keepdims=True), 1e-12)
+    return embs, time.time() - start_time
+
+
+def check_parity(
+    backend: Any, reference: Any, audios: Optional[List[np.ndarray]] = None
+) -> Dict[str, Any]:
+    """
+    在校准音频上比较两个推理后端的特征余弦差异与耗时
+
+    两个后端都逐条推理，差异只反映后端本身，不受同批其他音频影响；
+    另外比较待校验后端整批推理（组内填充）与逐条推理的差异
+
+    Args:
+        backend: 待校验的推理后端
+        reference: 参照推理后端
+        audios: 校准音频，为空时调用load_calibration_audios
+
+    Returns:
+        Dict[str, Any]: 平均/最大余弦差异与两者的单条平均耗时
+    """
+    audios = audios or load_calibration_audios()
+    ref_embs, ref_time = timed_embeddings(reference, audios)
+    embs, run_time = timed_embeddings(backend, audios)
+    batched_embs, _ = timed_embeddings(backend, audios, batched=True)
+    cosine = np.einsum("ij,ij->i", ref_embs, embs)
+    batched_cosine = np.einsum("ij,ij->i", embs, batched_embs)
+    return {
+        "calibration_size": len(audios),
+        "mean_cosine_drift": float(1.0 - cosine.mean()),
+        "max_cosine_drift": float(1.0 - cosine.min()),
+        "batched_cosine_drift": float(1.0 - batched_cosine.min()),
+        f"{reference.name}_ms": ref_time / len(audios) * 1000,
+        f"{backend.name}_ms": run_time / len(audios) * 1000,
+    }
+
+
+def load_backend(
+    device: str, name: Optional[str] = None, verify: bool = False
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    按inference.backend加载推理后端
+
+    bundle后端内存映射离线模型包的权重，torchscript/onnx后端直接加载导出的模型文件；
+    direct后端加载失败，或verify时与pipeline的特征差异超过
+    inference.direct_max_drift，回退到pipeline后端
+
+    Args:
+        device: 推理设备
+        name: 后端名称，为空时读取inference.backend
+        verify: 是否校验direct后端与pipeline的一致性
+
+    Returns:
+        Tuple[Any, Dict[str, Any]]: (推理后端, 一致性校验报告)
+    """
+    name = name or settings.inference.get("backend", "pipeline")
+    if name == "bundle":
+        # 离线模型包：内存映射权重，不经过hub解析，也不导入modelscope pipeline
+        path = bundle_path()
+        start_time = time.time()
+        backend = BundleBackend.load(path, device)
+        load_seconds = time.time() - start_time
+        logger.info(f"已加载离线模型包: {path}，耗时: {load_seconds:.3f}秒")
+        return backend, {"backend": "bundle", "load_seconds": round(load_seconds, 4)}
+    if name in EXPORTED_BACKENDS:
+        # 导出图只依赖torch/onnxruntime，不加载modelscope
+        path = exported_model_path(name)
+        start_time = time.time()
+        backend = EXPORTED_BACKENDS[name][0].load(path, device)
+        logger.info(f"已加载{name}模型: {path}，耗时: {time.time() - start_time:.3f}秒")
+        return backend, {}
+
+    pipeline = load_pipeline(device)
+    fallback = PipelineBackend(pipeline)
+    if name == "pipeline":
+        return fallback, {}
+    if name != "direct":
+        raise ValueError(f"不支持的推理后端: {name}")
+
+    try:
+        backend = DirectBackend.from_pipeline(pipeline)
+    except Exception as e:
+        logger.warning(f"direct推理后端加载失败，回退到pipeline: {e}")
+        return fallback, {"backend": "pipeline", "error": str(e)}
+    if not verify:
+        return backend, {}
+
+    report = check_parity(backend, fallback)
+    max_drift = float(settings.inference.get("direct_max_drift", 0.01))
+    logger.info(
+        f"direct后端一致性校验: 平均余弦差异 {report['mean_cosine_drift']:.5f}，"
+        f"最大差异 {report['max_cosine_drift']:.5f}"
+    )
+    if report["mean_cosine_drift"] > max_drift:
+        logger.warning(f"direct后端与pipeline差异超过阈值({max_drift})，回退到pipeline")
+        return fallback, {"backend": "pipeline", **report}
+    if report["batched_cosine_drift"] > max_drift:
+        logger.warning(
+            f"direct后端填充批处理与逐条推理差异({report['batched_cosine_drift']:.5f})"
+            f"超过阈值({max_drift})，只把等长片段拼成一批"
+        )
+        backend.pad_ratio = 1.0
+    report["pad_ratio"] = backend.pad_ratio
+    return backend, {"backend": "direct", **report}
@@ -0,0 +1,208 @@
+"""
+量化模块 - CPU推理的int8量化与精度校验
+"""
+
+import copy
+import time
+import numpy as np
+import torch
+from typing import Any, Dict, List, Optional
+from ..core.config import settings
+from ..core.logger import get_logger
+from .model_loader import DirectBackend, load_calibration_audios, timed_embeddings
+
+logger = get_logger(__name__)
+
+# 支持动态量化的层类型；CAM++几乎全部由卷积层构成，动态量化通常不会替换任何层
+QUANTIZABLE_LAYERS = {torch.nn.Linear}
+
+# 支持的量化模式
+QUANTIZE_MODES = ("dynamic_int8", "static_int8")
+
+
+def count_quantized_modules(module: torch.nn.Module) -> int:
+    """
+    统计模型中已被替换为int8实现的层数
+
+    Args:
+        module: torch模型
+
+    Returns:
+        int: 量化层数量
+    """
+    count = 0
+    for submodule in module.modules():
+        path = type(submodule).__module__
+        if path.startswith("torch.ao.nn") and ".quantized" in path:
+            count += 1
+    return count
+
+
+def _network(backend: Any) -> torch.nn.Module:
+    """推理后端中的CAM++网络，pipeline后端为其模型的embedding_model"""
+    return getattr(backend.module, "embedding_model", backend.module)
+
+
+def _set_network(backend: Any, network: torch.nn.Module) -> None:
+    """替换推理后端中的CAM++网络"""
+    if hasattr(backend.module, "embedding_model"):
+        backend.module.embedding_model = network
+    else:
+        backend.module = network
+
+
+def _static_quantize(
+    backend: Any, audios: List[np.ndarray]
+) -> Optional[torch.nn.Module]:
+    """
+    用FX图模式做训练后静态量化：融合Conv+BN+ReLU，在校准音频的fbank特征上
+    统计激活范围后把卷积层转换为int8实现
+
+    Returns:
+        Optional[torch.nn.Module]: 量化后的网络，无法追踪网络结构时为None
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    network = _network(backend)
+    feature_dim = getattr(backend, "feature_dim", None) or getattr(
+        backend.module, "feature_dim", 80
+    )
+    featurizer = DirectBackend(network, int(feature_dim))
+    with torch.inference_mode():
+        features = [featurizer._features(audio).unsqueeze(0) for audio in audios]
+
+    qconfig_mapping = get_default_qconfig_mapping(torch.backends.quantized.engine)
+    try:
+        prepared = prepare_fx(
+            copy.deepcopy(network).eval(), qconfig_mapping, (features[0],)
+        )
+    except Exception as e:
+        logger.warning(f"CAM++网络无法被FX追踪，不能静态量化: {e}")
+        return None
+    with torch.inference_mode():
+        for feature in features:
+            prepared(feature)
+    return convert_fx(prepared)
+
+
+def quantize_backend(
+    backend: Any,
+    verify: bool = True,
+    audios: Optional[List[np.ndarray]] = None,
+    max_drift: Optional[float] = None,
+    mode: str = "static_int8",
+) -> Dict[str, Any]:
+    """
+    对推理后端中的torch模型做int8量化
+
+    dynamic_int8只量化全连接层；static_int8在校准音频上统计激活范围，量化卷积层。
+    没有任何层被替换时保持fp32模型。verify为True时在校准音频上比较量化前后的特征，
+    统计余弦漂移与加速比；平均漂移超过max_drift时恢复fp32模型。
+
+    Args:
+        backend: 推理后端，量化后原地替换其中的模型
+        verify: 是否进行精度校验
+        audios: 校准音频，为空时调用load_calibration_audios
+        max_drift: 允许的最大平均余弦漂移，为空时读取inference.quantize_max_drift
+        mode: 量化模式（dynamic_int8 / static_int8）
+
+    Returns:
+        Dict[str, Any]: 量化报告，applied表示最终是否使用量化模型
+    """
+    start_time = time.time()
+    logger.start(f"int8量化声纹模型({mode})")
+    if max_drift is None:
+        max_drift = float(settings.inference.get("quantize_max_drift", 0.02))
+
+    fp32_module = backend.module
+    fp32_network = _network(backend)
+    if verify or mode == "static_int8":
+        audios = audios or load_calibration_audios()
+    if verify:
+        fp32_embs, fp32_time = timed_embeddings(backend, audios)
+
+    report: Dict[str, Any] = {"mode": mode, "applied": False, "quantized_layers": 0}
+    if mode == "static_int8":
+        quantized = _static_quantize(backend, audios)
+        if quantized is not None:
+            report["quantized_layers"] = count_quantized_modules(quantized)
+            if report["quantized_layers"]:
+                _set_network(backend, quantized)
+    else:
+        quantized = torch.ao.quantization.quantize_dynamic(
+            fp32_module, QUANTIZABLE_LAYERS, dtype=torch.qint8
+        )
+        report["quantized_layers"] = count_quantized_modules(quantized)
+        if report["quantized_layers"]:
+            backend.module = quantized
+
+    if not report["quantized_layers"]:
+        logger.warning(f"{mode}没有替换任何层，保持fp32模型")
+        logger.complete(f"int8量化声纹模型({mode})", time.time() - start_time)
+        return report
+
+    report["applied"] = True
+    logger.info(f"已量化{report['quantized_layers']}个层")
+    if verify:
+        quant_embs, quant_time = timed_embeddings(backend, audios)
+        cosine = np.einsum("ij,ij->i", fp32_embs, quant_embs)
+        report.update(
+            {
+                "calibration_size": len(audios),
+                "mean_cosine_drift": float(1.0 - cosine.mean()),
+                "max_cosine_drift": float(1.0 - cosine.min()),
+                "fp32_ms": fp32_time / len(audios) * 1000,
+                "int8_ms": quant_time / len(audios) * 1000,
+                "speedup": fp32_time / max(quant_time, 1e-9),
+            }
+        )
+        logger.info(
+            f"量化精度校验: 平均余弦漂移 {report['mean_cosine_drift']:.5f}，"
+            f"最大漂移 {report['max_cosine_drift']:.5f}，加速比 {report['speedup']:.2f}x"
+        )
+        if report["mean_cosine_drift"] > max_drift:
+            logger.warning(f"量化后平均余弦漂移超过阈值({max_drift})，恢复fp32模型")
+            backend.module = fp32_module
+            _set_network(backend, fp32_network)
+            report["applied"] = False
+
+    logger.complete(f"int8量化声纹模型({mode})", time.time() - start_time)
+    return report
+
+
+def apply_configured_quantization(
+    backends: List[Any], device: str, verify: bool = True
+) -> Dict[str, Any]:
+    """
+    按inference.quantize配置量化一组模型副本
+
+    只在第一个副本上做精度校验，校验未通过时其余副本也保持fp32
+
+    Args:
+        backends: 推理后端列表
+        device: 推理设备，只有cpu支持int8量化
+        verify: 是否进行精度校验
+
+    Returns:
+        Dict[str, Any]: 量化报告，未启用量化时为空
+    """
+    mode = settings.inference.get("quantize", "none")
+    if mode in (None, "", "none") or not backends:
+        return {}
+    if mode not in QUANTIZE_MODES:
+        raise ValueError(f"不支持的量化模式: {mode}")
+    if device != "cpu":
+        logger.warning("int8量化只支持CPU推理，已忽略量化配置")
+        return {}
+
+    if not backends[0].quantizable:
+        logger.warning(f"{backends[0].name}推理后端不支持量化，已忽略量化配置")
+        return {}
+
+    audios = load_calibration_audios() if mode == "static_int8" else None
+    report = quantize_backend(backends[0], verify=verify, audios=audios, mode=mode)
+    if report["applied"]:
+        for backend in backends[1:]:
+            quantize_backend(backend, verify=False, audios=audios, mode=mode)
+    return report
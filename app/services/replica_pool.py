@@ -0,0 +1,83 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+from ..core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ModelReplicaPool:
+    """进程内模型副本池
+
+    持有N个独立的模型实例，每个实例同一时刻只被一个线程使用。
+    PyTorch计算期间会释放GIL，多个线程可在不同副本上并行推理。
+    """
+
+    def __init__(self, replicas: List[Any]):
+        if not replicas:
+            raise ValueError("模型副本池至少需要一个副本")
+        self.size = len(replicas)
+        self.replicas = list(replicas)
+        self._idle: "queue.Queue[Any]" = queue.Queue()
+        for replica in replicas:
+            self._idle.put(replica)
+
+        self._stats_lock = threading.Lock()
+        self._in_use = 0
+        self._stats = {"acquisitions": 0, "waits": 0, "wait": 0.0, "max_wait": 0.0}
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        """
+        独占一个空闲副本，用完后自动归还
+
+        Yields:
+            Any: 模型副本
+        """
+        start_time = time.time()
+        try:
+            replica = self._idle.get_nowait()
+            waited = False
+        except queue.Empty:
+            replica = self._idle.get()
+            waited = True
+        wait_time = time.time() - start_time
+
+        with self._stats_lock:
+            self._in_use += 1
+            self._stats["acquisitions"] += 1
+            self._stats["waits"] += int(waited)
+            self._stats["wait"] += wait_time
+            self._stats["max_wait"] = max(self._stats["max_wait"], wait_time)
+        if waited:
+            logger.debug(f"等待空闲模型副本，耗时: {wait_time:.3f}秒")
+
+        try:
+            yield replica
+        finally:
+            with self._stats_lock:
+                self._in_use -= 1
+            self._idle.put(replica)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        获取副本池统计
+
+        Returns:
+            Dict[str, float]: 副本数、使用中数量、等待次数、等待耗时与模型前向次数
+        """
+        with self._stats_lock:
+            acquisitions = self._stats["acquisitions"] or 1
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "acquisitions": self._stats["acquisitions"],
+                "waits": self._stats["waits"],
+                "avg_wait_ms": self._stats["wait"] / acquisitions * 1000,
+                "max_wait_ms": self._stats["max_wait"] * 1000,
+                "forward_passes": sum(
+                    getattr(replica, "forward_calls", 0) for replica in self.replicas
+                ),
+            }
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from ..core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SingleFlight:
+    """合并相同键的并发请求
+
+    同一键第一个到达的请求（leader）在独立的任务中执行，
+    执行期间到达的相同请求（follower）直接等待该任务的结果，不再重复计算。
+    任务与调用方解耦，leader的调用方被取消不会影响follower。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或加入一个相同键的请求
+
+        Args:
+            key: 请求键
+            func: 无参协程函数，只有leader会调用
+
+        Returns:
+            Any: 协程结果，leader与follower得到同一个对象
+        """
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = asyncio.ensure_future(func())
+                self._tasks[key] = task
+                task.add_done_callback(lambda _: self._forget(key, task))
+                self._stats["leaders"] += 1
+            else:
+                self._stats["followers"] += 1
+                logger.debug(f"合并进行中的相同请求[{self.name}]")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        """任务完成后移除键，之后的相同请求重新计算"""
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            # 取出异常，避免没有follower时出现未读取异常的警告
+            task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取合并统计
+
+        Returns:
+            Dict[str, int]: 执行次数、被合并的请求数与当前进行中的键数
+        """
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._tasks)}
@@ -0,0 +1,130 @@
+import numpy as np
+from typing import Optional
+from ..core.config import settings
+from ..core.logger import get_logger
+from ..utils.audio_utils import audio_processor
+from ..utils.resampler import resampler
+
+logger = get_logger(__name__)
+
+
+def prepare_waveform(waveform: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    把会话缓冲区快照重采样到目标采样率并裁剪静音
+
+    Args:
+        waveform: StreamingSession.snapshot()返回的波形
+        sample_rate: 会话采样率
+
+    Returns:
+        np.ndarray: 16kHz float32波形
+    """
+    waveform = resampler.resample(waveform, sample_rate, settings.target_sample_rate)
+    return audio_processor.trim_silence(waveform)
+
+
+class StreamingSession:
+    """流式识别会话
+
+    以PCM16单声道分块接收音频，保存最近max_buffer_seconds秒的滚动缓冲区，
+    每收到interval_seconds秒新音频后对缓冲区整体提取一次声纹。
+    """
+
+    def __init__(self, sample_rate: Optional[int] = None):
+        config = settings.stream
+        self.sample_rate = int(sample_rate or settings.target_sample_rate)
+        self.min_seconds = float(config.get("min_seconds", 1.0))
+        self.interval_seconds = float(config.get("interval_seconds", 0.5))
+        self.max_buffer_seconds = float(config.get("max_buffer_seconds", 10))
+        self.max_seconds = float(config.get("max_seconds", 30))
+        self.early_stop_margin = float(config.get("early_stop_margin", 0.1))
+
+        # 缓冲区预留两倍容量，写满时整体前移，均摊每次追加为O(1)
+        self._window = max(1, int(self.max_buffer_seconds * self.sample_rate))
+        self._buffer = np.zeros(self._window * 2, dtype=np.float32)
+        self._start = 0
+        self._end = 0
+        self._remainder = b""
+        self.total_samples = 0
+        self._evaluated_samples = 0
+        self.evaluations = 0
+
+    @property
+    def buffered_seconds(self) -> float:
+        """缓冲区中的音频时长（秒）"""
+        return (self._end - self._start) / self.sample_rate
+
+    @property
+    def received_seconds(self) -> float:
+        """会话累计收到的音频时长（秒）"""
+        return self.total_samples / self.sample_rate
+
+    def append(self, data: bytes) -> None:
+        """
+        追加一块PCM16小端序音频数据
+
+        Args:
+            data: 音频字节数据，可以不是完整的采样点，剩余字节留到下一块
+        """
+        data = self._remainder + data
+        usable = len(data) - len(data) % 2
+        self._remainder = data[usable:]
+        if not usable:
+            return
+
+        samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32)
+        samples /= 32768.0
+        if samples.shape[0] >= self._window:
+            samples = samples[-self._window :]
+            self._start = 0
+            self._end = 0
+        elif self._end + samples.shape[0] > self._buffer.shape[0]:
+            keep = min(self._end - self._start, self._window - samples.shape[0])
+            self._buffer[:keep] = self._buffer[self._end - keep : self._end]
+            self._start = 0
+            self._end = keep
+
+        self._buffer[self._end : self._end + samples.shape[0]] = samples
+        self._end += samples.shape[0]
+        self._start = max(self._start, self._end - self._window)
+        self.total_samples += samples.shape[0]
+
+    def is_due(self) -> bool:
+        """缓冲区足够长且距上次提取已收到足够多的新音频"""
+        return (
+            self.buffered_seconds >= self.min_seconds
+            and self.total_samples - self._evaluated_samples
+            >= self.interval_seconds * self.sample_rate
+        )
+
+    def is_finished(self) -> bool:
+        """会话累计音频是否达到上限"""
+        return self.received_seconds >= self.max_seconds
+
+    def snapshot(self) -> np.ndarray:
+        """
+        复制当前缓冲区，同时记录本次提取位置
+
+        重采样与静音裁剪由prepare_waveform在音频执行池中完成
+
+        Returns:
+            np.ndarray: 原采样率的float32波形
+        """
+        self._evaluated_samples = self.total_samples
+        self.evaluations += 1
+        return self._buffer[self._start : self._end].copy()
+
+    def should_stop(self, speaker_id: str, margin: Optional[float]) -> bool:
+        """
+        判断是否可以提前结束：已超过阈值识别出说话人，且领先第二名足够多
+
+        Args:
+            speaker_id: 本次识别出的说话人ID，未超过阈值时为空
+            margin: 第一名与第二名的分差，只有一个候选时为None
+
+        Returns:
+            bool: 是否提前结束
+        """
+        if not speaker_id:
+            return False
+        return margin is None or margin >= self.early_stop_margin
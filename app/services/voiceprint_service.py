@@ -1,48 +1,212 @@
+import asyncio
+import dataclasses
+import hashlib
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import torch
+import soundfile as sf
 import time
-import threading
-from typing import Dict, List, Tuple
-from modelscope.pipelines import pipeline
-from modelscope.utils.constant import Tasks
-from ..core.config import settings
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from ..core.config import MODEL_ID, settings
+from ..core.executor import ExecutorBusyError, stage_executor
 from ..core.logger import get_logger
+from ..database.connection import db_connection
 from ..database.voiceprint_db import voiceprint_db
-from ..utils.audio_utils import audio_processor
+from ..utils.audio_utils import AudioInput, audio_processor
+from .ann_index import top_k_indices
+from .batcher import EmbeddingBatcher
+from .embedding_cache import EmbeddingCache
+from .gallery import normalize_embeddings, voiceprint_gallery
+from .inference_pool import InferencePool
+from .model_loader import load_backend, select_device, split_threads
+from .quantization import apply_configured_quantization
+from .replica_pool import ModelReplicaPool
+from .single_flight import SingleFlight
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class IdentifyResult:
+    """声纹识别结果"""
+
+    speaker_id: str = ""
+    score: float = 0.0
+    # 按分数从高到低排列的 (说话人ID, 相似度分数)
+    candidates: List[Tuple[str, float]] = field(default_factory=list)
+    # 第一名与第二名的分差，候选不足两个时为None
+    margin: Optional[float] = None
+    # 批量识别中该段音频处理失败的原因
+    error: Optional[str] = None
+    # 裁剪静音后送入模型的语音时长（秒）
+    speech_duration: Optional[float] = None
+
+
+@dataclass
+class RegisterResult:
+    """单个说话人的注册结果"""
+
+    speaker_id: str
+    success: bool = False
+    msg: str = ""
+    # 裁剪静音后送入模型的语音时长（秒）
+    speech_duration: Optional[float] = None
+
+
 class VoiceprintService:
     """声纹识别服务类"""
 
     def __init__(self):
-        self._pipeline = None
         self.similarity_threshold = settings.similarity_threshold
-        self._pipeline_lock = threading.Lock()  # 添加线程锁
-        self._init_pipeline()
-        self._warmup_model()  # 添加模型预热
+        # 模型副本池，每个副本同一时刻只被一个线程使用
+        self._replicas: Optional[ModelReplicaPool] = None
+        self._device = "cpu"
+        # 预派生模式下推迟到fork后的量化
+        self._quantize_after_fork = False
+        self._process_pool: Optional[InferencePool] = None
+        self._quantization: Dict[str, Any] = {}
+        self._backend_report: Dict[str, Any] = {}
+        self._batcher: Optional[EmbeddingBatcher] = None
+        self._cache: Optional[EmbeddingCache] = None
+        # 合并进行中的相同音频特征提取与相同识别请求
+        self._embed_flight: Optional[SingleFlight] = None
+        self._identify_flight: Optional[SingleFlight] = None
+        if settings.coalescing.get("enabled", True):
+            self._embed_flight = SingleFlight("embed")
+            self._identify_flight = SingleFlight("identify")
+        self._gallery_enabled = settings.gallery.get("enabled", True)
+        # 模型在startup()中加载，导入模块时不做任何重量级初始化
+        self.ready = False
+        self.startup_error: Optional[str] = None
+        self._startup_timings: Dict[str, float] = {}
+
+    async def startup(self) -> None:
+        """
+        服务启动：并行加载模型、建立数据库连接池并预热声纹库缓存，再预热模型
+
+        由lifespan作为后台任务启动，服务在此期间已开始监听，就绪检查与业务请求返回503；
+        全部完成后ready置为True。失败时记录startup_error，服务保持未就绪
+        """
+        start_time = time.time()
+        logger.start("服务启动初始化")
+        loop = asyncio.get_running_loop()
+
+        async def run_phase(name: str, func) -> None:
+            phase_start = time.time()
+            await loop.run_in_executor(None, func)
+            self._startup_timings[name] = time.time() - phase_start
+
+        async def open_storage() -> None:
+            # 声纹库缓存依赖数据库连接，在连接池建立后加载
+            await run_phase("db_pool", db_connection.open)
+            if self._gallery_enabled:
+                await run_phase("gallery", voiceprint_gallery.ensure_loaded)
+
+        try:
+            await asyncio.gather(run_phase("model", self.load_model), open_storage())
+            await run_phase("warmup", self._warmup_model)
+        except Exception as e:
+            self.startup_error = str(e)
+            logger.fail(
+                f"服务启动初始化失败，耗时: {time.time() - start_time:.3f}秒，错误: {e}"
+            )
+            return
+        self._startup_timings["total"] = time.time() - start_time
+        self.ready = True
+        logger.complete("服务启动初始化", self._startup_timings["total"])
+
+    @property
+    def model_loaded(self) -> bool:
+        """模型是否已加载"""
+        return self._replicas is not None or self._process_pool is not None
+
+    def load_model(self) -> None:
+        """
+        加载模型，并创建依赖模型的特征缓存与微批调度器
+
+        模型已由preload_model()在fork前加载时直接复用，配置了量化时在本进程中量化，
+        再创建本进程的缓存与调度线程
+        """
+        if not self.model_loaded:
+            self._init_pipeline()
+        elif self._quantize_after_fork:
+            # 预派生模式：量化需要推理，在fork后的工作进程中进行
+            self._quantize_after_fork = False
+            self._quantization = apply_configured_quantization(
+                self._replicas.replicas, self._device, verify=False
+            )
+        if settings.embedding_cache.get("enabled", True):
+            self._cache = EmbeddingCache(self._model_version())
+        if settings.batching.get("enabled", True):
+            # 每个模型副本或工作进程同时处理一批
+            self._batcher = EmbeddingBatcher(
+                self.extract_voiceprints,
+                max_inflight=self._inference_slots,
+                max_pending=stage_executor.max_pending,
+            )
+
+    def preload_model(self) -> None:
+        """
+        只加载模型权重，不启动任何线程也不做推理
+
+        供预派生模式的主进程在fork前调用，子进程通过写时复制共享模型权重。
+        跳过需要推理的后端校验与量化（静态量化要在校准音频上前向计算），
+        避免fork前初始化推理线程池；量化由工作进程在load_model()中完成
+        """
+        self._init_pipeline(verify=False, quantize=False)
+
+    def preload_gallery(self) -> None:
+        """
+        在fork前加载声纹库缓存，工作进程通过写时复制共享，启动时只追赶变更日志
 
-    def _init_pipeline(self) -> None:
-        """初始化声纹识别模型"""
+        加载完成后关闭本进程的数据库连接，避免子进程继承同一个连接
+        """
+        if not self._gallery_enabled:
+            return
+        db_connection.open()
+        try:
+            voiceprint_gallery.preload()
+        finally:
+            db_connection.close()
+
+    def _init_pipeline(self, verify: bool = True, quantize: bool = True) -> None:
+        """初始化声纹识别模型，quantize为False时推迟到load_model()中量化"""
         start_time = time.time()
         logger.start("初始化声纹识别模型")
 
         try:
             # 检查CUDA可用性
-            if torch.cuda.is_available():
-                device = "gpu"
-                logger.info(f"使用GPU设备: {torch.cuda.get_device_name(0)}")
+            device = select_device()
+            self._device = device
+
+            if int(settings.inference.get("process_workers", 0)) > 0:
+                # 多进程模式：模型只在工作进程中加载，主进程不持有模型
+                self._process_pool = InferencePool(device)
+                self._process_pool.start()
             else:
-                device = "cpu"
-                logger.info("使用CPU设备")
-
-            logger.info("开始加载模型: iic/speech_campplus_sv_zh-cn_3dspeaker_16k")
-            self._pipeline = pipeline(
-                task=Tasks.speaker_verification,
-                model="iic/speech_campplus_sv_zh-cn_3dspeaker_16k",
-                device=device,
-            )
+                replicas = max(1, int(settings.inference.get("replicas", 1)))
+                if replicas > 1:
+                    threads = split_threads(replicas)
+                    logger.info(
+                        f"模型副本数: {replicas}，每个副本torch线程数: {threads}"
+                    )
+                # 只在第一个副本上校验后端一致性，其余副本沿用校验后的后端
+                backend, self._backend_report = load_backend(device, verify=verify)
+                backends = [backend] + [
+                    load_backend(device, backend.name)[0] for _ in range(replicas - 1)
+                ]
+                for replica in backends[1:]:
+                    if hasattr(backend, "pad_ratio"):
+                        replica.pad_ratio = backend.pad_ratio
+                if quantize:
+                    self._quantization = apply_configured_quantization(
+                        backends, device, verify=verify
+                    )
+                else:
+                    self._quantize_after_fork = True
+                self._replicas = ModelReplicaPool(backends)
 
             init_time = time.time() - start_time
             logger.complete("初始化声纹识别模型", init_time)
@@ -52,66 +216,43 @@ class VoiceprintService:
             raise
 
     def _warmup_model(self) -> None:
-        """模型预热，避免第一次推理的延迟"""
+        """模型预热，避免第一次推理的延迟，全部在内存中完成"""
         start_time = time.time()
         logger.start("开始模型预热")
 
         try:
-            # 预热librosa重采样组件
-            logger.debug("预热librosa重采样组件...")
-            import librosa
-            import soundfile as sf
-            import tempfile
-
-            # 生成一个更真实的测试音频（1秒的随机音频，模拟真实语音）
-            sample_rate = 16000
-            duration = 1.0  # 1秒
-            samples = int(sample_rate * duration)
-
-            # 生成随机音频数据，模拟真实语音
-            np.random.seed(42)  # 固定随机种子，确保可重现
-            test_audio = (
-                np.random.randn(samples).astype(np.float32) * 0.1
-            )  # 小幅度随机音频
-
-            # 创建不同采样率的音频文件进行预热
-            test_rates = [8000, 22050, 44100, 16000]  # 测试不同采样率
-
-            for test_rate in test_rates:
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmpf:
-                    # 生成测试采样率的音频
-                    test_samples = int(test_rate * duration)
-                    test_audio_resampled = librosa.resample(
-                        test_audio, orig_sr=sample_rate, target_sr=test_rate
-                    )
-                    sf.write(tmpf.name, test_audio_resampled, test_rate)
-                    temp_audio_path = tmpf.name
-
-                try:
-                    # 使用音频处理器处理这个文件（预热音频处理流程）
-                    with open(temp_audio_path, "rb") as f:
-                        audio_bytes = f.read()
-
-                    # 预热音频处理
-                    processed_path = audio_processor.ensure_16k_wav(audio_bytes)
-
-                    # 预热模型推理
-                    with self._pipeline_lock:
-                        result = self._pipeline([processed_path], output_emb=True)
-                        emb = self._to_numpy(result["embs"][0]).astype(np.float32)
-                        logger.debug(
-                            f"模型预热完成 ({test_rate}Hz -> 16kHz)，特征维度: {emb.shape}"
-                        )
-
-                    # 清理处理后的文件
-                    audio_processor.cleanup_temp_file(processed_path)
-
-                finally:
-                    # 清理临时文件
-                    import os
+            rng = np.random.default_rng(42)  # 固定随机种子，确保可重现
+
+            # 预热内存解码、重采样与VAD
+            logger.debug("预热音频处理组件...")
+            for rate in self._warmup_config.get("sample_rates", [8000, 44100, 16000]):
+                buffer = io.BytesIO()
+                sf.write(
+                    buffer,
+                    rng.standard_normal(int(rate)).astype(np.float32) * 0.1,
+                    int(rate),
+                    format="WAV",
+                )
+                audio_processor.release_audio(
+                    audio_processor.prepare_audio(buffer.getvalue())
+                )
 
-                    if os.path.exists(temp_audio_path):
-                        os.unlink(temp_audio_path)
+            # 按配置的(批大小, 时长)预热模型，每个副本或工作进程各推理一次
+            slots = self._inference_slots
+            for batch_size, seconds in self._warmup_config.get(
+                "batch_shapes", [[1, 1.0]]
+            ):
+                audios = [
+                    rng.standard_normal(int(16000 * seconds)).astype(np.float32) * 0.1
+                    for _ in range(int(batch_size))
+                ]
+                shape_start = time.time()
+                with ThreadPoolExecutor(max_workers=slots) as pool:
+                    embs = list(pool.map(lambda _: self._infer(audios), range(slots)))
+                logger.debug(
+                    f"模型预热完成 (批大小: {batch_size}，时长: {seconds}秒)，"
+                    f"特征维度: {embs[0].shape}，耗时: {time.time() - shape_start:.3f}秒"
+                )
 
             warmup_time = time.time() - start_time
             logger.complete("模型预热完成", warmup_time)
@@ -121,215 +262,831 @@ class VoiceprintService:
             logger.warning(f"模型预热失败，耗时: {warmup_time:.3f}秒，错误: {e}")
             # 预热失败不影响服务启动，只记录警告
 
-    def _to_numpy(self, x) -> np.ndarray:
+    @property
+    def _warmup_config(self) -> Dict[str, Any]:
+        """预热配置"""
+        return settings.startup.get("warmup", {})
+
+    def _model_version(self) -> str:
+        """
+        模型版本标识：模型、推理后端、量化模式与音频预处理配置，
+        其中任何一项变化都会改变提取出的声纹特征
+
+        Returns:
+            str: 版本字符串
+        """
+        backend = self._backend_report.get(
+            "backend", settings.inference.get("backend", "pipeline")
+        )
+        quantize = settings.inference.get("quantize", "none")
+        if self._quantization and not self._quantization.get("applied"):
+            quantize = "none"
+        audio_config = json.dumps(settings.audio, sort_keys=True, default=str)
+        return f"{MODEL_ID}|{backend}|{quantize}|{settings.target_sample_rate}|{audio_config}"
+
+    @property
+    def _inference_slots(self) -> int:
+        """可同时执行的推理数量"""
+        if self._process_pool is not None:
+            return self._process_pool.workers
+        return self._replicas.size if self._replicas is not None else 1
+
+    def _infer(self, audios: List[AudioInput]) -> np.ndarray:
         """
-        将torch tensor或其他类型转为numpy数组
+        执行一次模型推理，多进程模式下交给工作进程，否则独占一个模型副本
 
         Args:
-            x: 输入数据
+            audios: 16kHz波形或音频文件路径列表
 
         Returns:
-            np.ndarray: numpy数组
+            np.ndarray: float32特征矩阵，每行对应一个输入
         """
-        return x.cpu().numpy() if torch.is_tensor(x) else np.asarray(x)
+        if self._process_pool is not None:
+            return self._process_pool.infer(audios)
 
-    def extract_voiceprint(self, audio_path: str) -> np.ndarray:
+        # 检查pipeline是否可用
+        if self._replicas is None:
+            raise RuntimeError("声纹模型未初始化")
+
+        # 独占一个副本确保模型推理的线程安全
+        with self._replicas.acquire() as backend:
+            return backend.embed(audios)
+
+    def extract_voiceprints(self, audios: List[AudioInput]) -> List[np.ndarray]:
         """
-        从音频文件中提取声纹特征
+        批量提取声纹特征，多个音频在一次模型调用中完成
+
+        chunk策略下较长的波形先切分为多段一起推理，再对各段归一化后的特征取平均
 
         Args:
-            audio_path: 音频文件路径
+            audios: 16kHz波形或音频文件路径列表
 
         Returns:
-            np.ndarray: 声纹特征向量
+            List[np.ndarray]: 与输入顺序一致的声纹特征向量列表
         """
         start_time = time.time()
-        logger.start(f"提取声纹特征，音频文件: {audio_path}")
+        logger.start(f"批量提取声纹特征，音频数量: {len(audios)}")
 
-        try:
-            # 使用线程锁确保模型推理的线程安全
-            with self._pipeline_lock:
-                pipeline_start = time.time()
-                logger.debug("开始模型推理...")
-
-                # 检查pipeline是否可用
-                if self._pipeline is None:
-                    raise RuntimeError("声纹模型未初始化")
+        segments: List[AudioInput] = []
+        counts = []
+        for audio in audios:
+            chunks = audio_processor.split_chunks(audio)
+            segments.extend(chunks)
+            counts.append(len(chunks))
 
-                result = self._pipeline([audio_path], output_emb=True)
-                pipeline_time = time.time() - pipeline_start
-                logger.debug(f"模型推理完成，耗时: {pipeline_time:.3f}秒")
+        try:
+            pipeline_start = time.time()
+            logger.debug("开始模型推理...")
+            embs = self._infer(segments)
+            pipeline_time = time.time() - pipeline_start
+            logger.debug(f"模型推理完成，耗时: {pipeline_time:.3f}秒")
 
             convert_start = time.time()
-            emb = self._to_numpy(result["embs"][0]).astype(np.float32)
+            if len(segments) != len(audios):
+                # 各段特征归一化后按原音频求平均
+                starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                embs = np.add.reduceat(normalize_embeddings(embs), starts, axis=0)
+                embs /= np.asarray(counts, dtype=np.float32)[:, None]
+                logger.debug(
+                    f"分段推理完成，音频数量: {len(audios)}，片段数量: {len(segments)}"
+                )
+            embs = [embs[i] for i in range(len(audios))]
             convert_time = time.time() - convert_start
             logger.debug(f"数据转换完成，耗时: {convert_time:.3f}秒")
 
             total_time = time.time() - start_time
-            logger.complete(f"提取声纹特征，维度: {emb.shape}", total_time)
-            return emb
+            logger.complete(
+                f"批量提取声纹特征，数量: {len(embs)}，维度: {embs[0].shape}",
+                total_time,
+            )
+            return embs
         except Exception as e:
             total_time = time.time() - start_time
             logger.fail(f"声纹特征提取失败，总耗时: {total_time:.3f}秒，错误: {e}")
             raise
 
-    def calculate_similarity(self, emb1: np.ndarray, emb2: np.ndarray) -> float:
+    def extract_voiceprint(self, audio: AudioInput) -> np.ndarray:
         """
-        计算两个声纹特征的相似度
+        从音频中提取声纹特征
+
+        启用微批调度时与其他并发请求合并推理
 
         Args:
-            emb1: 声纹特征1
-            emb2: 声纹特征2
+            audio: 16kHz波形或音频文件路径
 
         Returns:
-            float: 相似度分数 (0-1)
+            np.ndarray: 声纹特征向量
+
+        Raises:
+            ExecutorBusyError: 微批调度排队任务已满
+        """
+        if self._batcher is None:
+            return self.extract_voiceprints([audio])[0]
+
+        duration = audio_processor.get_duration(audio)
+        return self._batcher.submit(audio, duration).result()
+
+    async def extract_voiceprint_async(self, audio: AudioInput) -> np.ndarray:
+        """
+        从音频中提取声纹特征（异步版本）
+
+        启用微批调度时直接等待批处理结果，不占用推理执行池线程
+
+        Args:
+            audio: 16kHz波形或音频文件路径
+
+        Returns:
+            np.ndarray: 声纹特征向量
+
+        Raises:
+            ExecutorBusyError: 推理执行池或微批调度排队任务已满
+        """
+        if self._batcher is None:
+            return await stage_executor.run("inference", self.extract_voiceprint, audio)
+
+        duration = audio_processor.get_duration(audio)
+        return await asyncio.wrap_future(self._batcher.submit(audio, duration))
+
+    def _extract_voiceprints_isolated(
+        self, audios: List[AudioInput]
+    ) -> List[Optional[np.ndarray]]:
+        """
+        批量提取声纹特征，整批失败时逐条重试，隔离出错的音频
+
+        Args:
+            audios: 16kHz波形或音频文件路径列表
+
+        Returns:
+            List[Optional[np.ndarray]]: 与输入顺序一致的声纹特征，提取失败的位置为None
         """
         try:
-            # 使用余弦相似度
-            similarity = np.dot(emb1, emb2) / (
-                np.linalg.norm(emb1) * np.linalg.norm(emb2)
+            return list(self.extract_voiceprints(audios))
+        except Exception:
+            if len(audios) == 1:
+                return [None]
+
+        embs: List[Optional[np.ndarray]] = []
+        for audio in audios:
+            try:
+                embs.append(self.extract_voiceprints([audio])[0])
+            except Exception:
+                embs.append(None)
+        return embs
+
+    def _score_candidates(
+        self, test_emb: np.ndarray, speaker_ids: Optional[List[str]], k: int = 2
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        计算待识别声纹与候选说话人的相似度
+
+        启用声纹库缓存时直接在内存矩阵上打分，否则查询数据库。
+        未指定候选说话人时在整个声纹库中检索。
+
+        Args:
+            test_emb: 待识别声纹特征
+            speaker_ids: 候选说话人ID列表，为空时检索全库
+            k: 全库检索时返回的数量
+
+        Returns:
+            Tuple[List[str], np.ndarray]: (说话人ID列表, 对应的相似度分数)
+        """
+        similarity_start = time.time()
+        if self._gallery_enabled and not speaker_ids:
+            ids, scores = voiceprint_gallery.search(test_emb, k)
+        elif self._gallery_enabled:
+            ids, scores = voiceprint_gallery.score(test_emb, speaker_ids)
+        else:
+            voiceprints = voiceprint_db.get_voiceprints(speaker_ids or None)
+            ids = list(voiceprints)
+            if ids:
+                matrix = np.stack([voiceprints[x] for x in ids])
+                norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(test_emb)
+                scores = (matrix @ test_emb) / np.maximum(norms, 1e-12)
+            else:
+                scores = np.empty(0, dtype=np.float32)
+        similarity_time = time.time() - similarity_start
+        logger.debug(
+            f"相似度计算完成，共计算{len(ids)}个，耗时: {similarity_time:.3f}秒"
+        )
+        return ids, scores
+
+    @staticmethod
+    def _split_scores(
+        ids: List[str],
+        scores: np.ndarray,
+        candidate_lists: List[Optional[List[str]]],
+    ) -> List[Tuple[List[str], np.ndarray]]:
+        """按各段的候选说话人从分数矩阵中取出对应的列，候选为空时保留全部列"""
+        columns = {speaker_id: col for col, speaker_id in enumerate(ids)}
+        results = []
+        for row, candidates in enumerate(candidate_lists):
+            if not candidates:
+                results.append((ids, scores[row]))
+                continue
+            cols = [columns[x] for x in dict.fromkeys(candidates) if x in columns]
+            results.append(([ids[col] for col in cols], scores[row, cols]))
+        return results
+
+    def _score_batch(
+        self,
+        test_embs: np.ndarray,
+        candidate_lists: List[Optional[List[str]]],
+        k: int = 2,
+    ) -> List[Tuple[List[str], np.ndarray]]:
+        """
+        批量计算多段声纹与各自候选说话人的相似度
+
+        指定了候选的各段先合并候选集合，一次矩阵乘法得到完整的N×M分数矩阵，
+        再按段取出各自的列；未指定候选的各段在整个声纹库中检索。
+
+        Args:
+            test_embs: 待识别声纹特征矩阵，形状为(N, dim)
+            candidate_lists: 每段的候选说话人ID列表，为空时检索全库
+            k: 全库检索时每段返回的数量
+
+        Returns:
+            List[Tuple[List[str], np.ndarray]]: 每段的(说话人ID列表, 对应的相似度分数)
+        """
+        similarity_start = time.time()
+        results: List[Optional[Tuple[List[str], np.ndarray]]] = [None] * len(
+            candidate_lists
+        )
+        listed = [i for i, x in enumerate(candidate_lists) if x]
+        full = [i for i, x in enumerate(candidate_lists) if not x]
+
+        if self._gallery_enabled:
+            if listed:
+                union = list(
+                    dict.fromkeys(x for i in listed for x in candidate_lists[i])
+                )
+                ids, scores = voiceprint_gallery.score_batch(test_embs[listed], union)
+                split = self._split_scores(
+                    ids, scores, [candidate_lists[i] for i in listed]
+                )
+                for i, item in zip(listed, split):
+                    results[i] = item
+            if full:
+                for i, item in zip(
+                    full, voiceprint_gallery.search_batch(test_embs[full], k)
+                ):
+                    results[i] = item
+        else:
+            union = (
+                None
+                if full
+                else list(dict.fromkeys(x for i in listed for x in candidate_lists[i]))
             )
-            return float(similarity)
-        except Exception as e:
-            logger.error(f"相似度计算失败: {e}")
-            return 0.0
+            voiceprints = voiceprint_db.get_voiceprints(union)
+            ids = list(voiceprints)
+            if ids:
+                matrix = normalize_embeddings(np.stack([voiceprints[x] for x in ids]))
+                scores = normalize_embeddings(test_embs) @ matrix.T
+            else:
+                scores = np.empty((len(candidate_lists), 0), dtype=np.float32)
+            results = self._split_scores(ids, scores, candidate_lists)
+
+        similarity_time = time.time() - similarity_start
+        logger.debug(
+            f"批量相似度计算完成，音频数量: {len(candidate_lists)}，耗时: {similarity_time:.3f}秒"
+        )
+        return results
+
+    def _rank_voiceprint(
+        self, ids: List[str], scores: np.ndarray, top_k: int = 1
+    ) -> IdentifyResult:
+        """
+        在候选打分结果中取前k个说话人，并计算第一名与第二名的分差
+
+        Args:
+            ids: 候选说话人ID列表
+            scores: 对应的相似度分数
+            top_k: 返回的候选数量
+
+        Returns:
+            IdentifyResult: 识别结果，最高分未超过阈值时说话人ID为空
+        """
+        if not ids:
+            logger.info("未找到候选说话人声纹")
+            return IdentifyResult()
+
+        # 部分排序，至少取前两名用于计算分差
+        top = top_k_indices(scores, max(top_k, 2))
+        ranked = [(ids[i], float(scores[i])) for i in top]
+        margin = ranked[0][1] - ranked[1][1] if len(ranked) > 1 else None
+        result = IdentifyResult(
+            speaker_id=ranked[0][0],
+            score=ranked[0][1],
+            candidates=ranked[:top_k],
+            margin=margin,
+        )
+
+        # 检查是否超过阈值
+        if result.score < self.similarity_threshold:
+            logger.info(
+                f"未识别到说话人，最高分: {result.score:.4f}，阈值: {self.similarity_threshold}"
+            )
+            result.speaker_id = ""
+            return result
+
+        logger.info(f"识别到说话人: {result.speaker_id}, 分数: {result.score:.4f}")
+        return result
+
+    def _save_voiceprint(self, speaker_id: str, emb: np.ndarray) -> bool:
+        """
+        保存声纹到数据库，并同步更新声纹库缓存
+
+        Args:
+            speaker_id: 说话人ID
+            emb: 声纹特征向量
+
+        Returns:
+            bool: 保存是否成功
+        """
+        success = voiceprint_db.save_voiceprint(speaker_id, emb)
+        if success and self._gallery_enabled:
+            voiceprint_gallery.upsert(speaker_id, emb)
+        return success
 
-    def register_voiceprint(self, speaker_id: str, audio_bytes: bytes) -> bool:
+    def _save_voiceprints(self, items: List[Tuple[str, np.ndarray]]) -> bool:
         """
-        注册声纹
+        在一个事务中批量保存声纹，并同步更新声纹库缓存
+
+        Args:
+            items: [(说话人ID, 声纹特征向量)]
+
+        Returns:
+            bool: 保存是否成功
+        """
+        success = voiceprint_db.save_voiceprints(items)
+        if success and self._gallery_enabled:
+            for speaker_id, emb in items:
+                voiceprint_gallery.upsert(speaker_id, emb)
+        return success
+
+    def _audio_key(self, audio_bytes: bytes) -> str:
+        """计算上传音频的内容哈希，启用缓存时与缓存键一致"""
+        if self._cache:
+            return self._cache.key(audio_bytes)
+        return hashlib.blake2b(audio_bytes, digest_size=20).hexdigest()
+
+    async def _embed_bytes_async(
+        self, audio_bytes: bytes, key: Optional[str] = None
+    ) -> Tuple[np.ndarray, Optional[float]]:
+        """
+        预处理上传的音频并提取声纹特征
+
+        相同内容的音频直接使用缓存；正在提取的相同音频直接等待其结果
+
+        Args:
+            audio_bytes: 音频字节数据
+            key: 音频内容哈希，为空时计算
+
+        Returns:
+            Tuple[np.ndarray, Optional[float]]: (声纹特征, 裁剪静音后的语音时长)
+
+        Raises:
+            ExecutorBusyError: 执行池排队任务已满
+        """
+        key = key or self._audio_key(audio_bytes)
+        cached = self._cache.get(key) if self._cache else None
+        if cached is not None:
+            logger.debug("声纹特征缓存命中")
+            return cached
+
+        if self._embed_flight is None:
+            return await self._compute_embedding_async(audio_bytes, key)
+        return await self._embed_flight.run(
+            key, lambda: self._compute_embedding_async(audio_bytes, key)
+        )
+
+    async def _compute_embedding_async(
+        self, audio_bytes: bytes, key: str
+    ) -> Tuple[np.ndarray, Optional[float]]:
+        """预处理音频并提取声纹特征，结果写入缓存"""
+        audio = await stage_executor.run(
+            "audio", audio_processor.prepare_audio, audio_bytes
+        )
+        try:
+            duration = audio_processor.get_duration(audio)
+            emb = await self.extract_voiceprint_async(audio)
+        finally:
+            audio_processor.release_audio(audio)
+        if self._cache:
+            self._cache.put(key, emb, duration)
+        return emb, duration
+
+    async def register_voiceprint_async(
+        self, speaker_id: str, audio_bytes: bytes
+    ) -> RegisterResult:
+        """
+        注册声纹（异步版本），各阶段在执行池中运行，不阻塞事件循环
 
         Args:
             speaker_id: 说话人ID
             audio_bytes: 音频字节数据
 
         Returns:
-            bool: 注册是否成功
+            RegisterResult: 注册结果
+
+        Raises:
+            ExecutorBusyError: 执行池排队任务已满
         """
-        audio_path = None
+        result = RegisterResult(speaker_id=speaker_id)
         try:
-            # 简化音频验证，只做基本检查
             if len(audio_bytes) < 1000:  # 文件太小
                 logger.warning(f"音频文件过小: {speaker_id}")
-                return False
-
-            # 处理音频文件
-            audio_path = audio_processor.ensure_16k_wav(audio_bytes)
-
-            # 提取声纹特征
-            emb = self.extract_voiceprint(audio_path)
+                result.msg = "音频文件过小"
+                return result
 
-            # 保存到数据库
-            success = voiceprint_db.save_voiceprint(speaker_id, emb)
+            emb, result.speech_duration = await self._embed_bytes_async(audio_bytes)
+            result.success = await stage_executor.run(
+                "db", self._save_voiceprint, speaker_id, emb
+            )
 
-            if success:
+            if result.success:
                 logger.info(f"声纹注册成功: {speaker_id}")
+                result.msg = f"已登记: {speaker_id}"
             else:
                 logger.error(f"声纹注册失败: {speaker_id}")
+                result.msg = "声纹保存失败"
 
-            return success
+            return result
 
+        except ExecutorBusyError:
+            raise
         except Exception as e:
             logger.error(f"声纹注册异常 {speaker_id}: {e}")
-            return False
-        finally:
-            # 清理临时文件
-            if audio_path:
-                audio_processor.cleanup_temp_file(audio_path)
+            result.msg = f"声纹注册异常: {e}"
+            return result
+
+    async def _extract_batch_async(
+        self, audio_list: List[bytes]
+    ) -> Tuple[List[Optional[np.ndarray]], List[str], List[Optional[float]]]:
+        """
+        批量预处理音频并提取声纹特征
+
+        命中缓存的音频直接使用缓存的特征，其余按微批大小分块：
+        块内音频并发预处理，再一次模型调用提取特征。
+
+        Args:
+            audio_list: 音频字节数据列表
+
+        Returns:
+            Tuple[List[Optional[np.ndarray]], List[str], List[Optional[float]]]:
+            (声纹特征列表, 失败原因列表, 语音时长列表)，失败位置的特征为None
+
+        Raises:
+            ExecutorBusyError: 执行池排队任务已满
+        """
+        embs: List[Optional[np.ndarray]] = [None] * len(audio_list)
+        errors = [""] * len(audio_list)
+        durations: List[Optional[float]] = [None] * len(audio_list)
+        chunk_size = int(settings.batching.get("max_batch_size", 8))
+
+        keys: List[Optional[str]] = [None] * len(audio_list)
+        pending = []
+        for i, audio_bytes in enumerate(audio_list):
+            if len(audio_bytes) < 1000:  # 文件太小
+                errors[i] = "音频文件过小"
+                continue
+            if self._cache:
+                keys[i] = self._cache.key(audio_bytes)
+                cached = self._cache.get(keys[i])
+                if cached is not None:
+                    embs[i], durations[i] = cached
+                    continue
+            pending.append(i)
+
+        for chunk_start in range(0, len(pending), chunk_size):
+            indices = pending[chunk_start : chunk_start + chunk_size]
+
+            prepared = await asyncio.gather(
+                *(
+                    stage_executor.run(
+                        "audio", audio_processor.prepare_audio, audio_list[i]
+                    )
+                    for i in indices
+                ),
+                return_exceptions=True,
+            )
+            audios = []
+            try:
+                for i, audio in zip(indices, prepared):
+                    if isinstance(audio, ExecutorBusyError):
+                        raise audio
+                    if isinstance(audio, Exception):
+                        logger.warning(f"音频处理失败，序号: {i}，错误: {audio}")
+                        errors[i] = f"音频处理失败: {audio}"
+                    else:
+                        audios.append((i, audio))
+                        durations[i] = audio_processor.get_duration(audio)
+
+                if audios:
+                    chunk_embs = await stage_executor.run(
+                        "inference",
+                        self._extract_voiceprints_isolated,
+                        [audio for _, audio in audios],
+                    )
+                    for (i, _), emb in zip(audios, chunk_embs):
+                        if emb is None:
+                            errors[i] = "声纹特征提取失败"
+                        elif self._cache:
+                            self._cache.put(keys[i], emb, durations[i])
+                        embs[i] = emb
+            finally:
+                for audio in prepared:
+                    if not isinstance(audio, BaseException):
+                        audio_processor.release_audio(audio)
+
+        return embs, errors, durations
+
+    async def register_voiceprints_batch_async(
+        self, items: List[Tuple[str, bytes]]
+    ) -> List[RegisterResult]:
+        """
+        批量注册声纹（异步版本）
+
+        批量提取特征后，用一次executemany在同一事务中写入数据库。
+
+        Args:
+            items: [(说话人ID, 音频字节数据)]
+
+        Returns:
+            List[RegisterResult]: 与输入顺序一致的逐条注册结果
+
+        Raises:
+            ExecutorBusyError: 执行池排队任务已满
+        """
+        start_time = time.time()
+        logger.start(f"批量注册声纹，数量: {len(items)}")
+
+        embs, errors, durations = await self._extract_batch_async(
+            [audio_bytes for _, audio_bytes in items]
+        )
+        results = [
+            RegisterResult(speaker_id=speaker_id, msg=error, speech_duration=duration)
+            for (speaker_id, _), error, duration in zip(items, errors, durations)
+        ]
+        ready = [(i, emb) for i, emb in enumerate(embs) if emb is not None]
+
+        if ready:
+            success = await stage_executor.run(
+                "db",
+                self._save_voiceprints,
+                [(items[i][0], emb) for i, emb in ready],
+            )
+            for i, _ in ready:
+                results[i].success = success
+                results[i].msg = f"已登记: {items[i][0]}" if success else "声纹保存失败"
+
+        succeeded = sum(1 for x in results if x.success)
+        logger.complete(
+            f"批量注册声纹，成功: {succeeded}/{len(items)}", time.time() - start_time
+        )
+        return results
+
+    async def identify_waveform_async(
+        self, speaker_ids: Optional[List[str]], audio: AudioInput, top_k: int = 1
+    ) -> IdentifyResult:
+        """
+        识别已预处理的音频：提取特征后与候选说话人打分
+
+        Args:
+            speaker_ids: 候选说话人ID列表，为空时检索全库
+            audio: 16kHz波形或音频文件路径
+            top_k: 返回的候选数量
+
+        Returns:
+            IdentifyResult: 识别结果
+
+        Raises:
+            ExecutorBusyError: 执行池排队任务已满
+        """
+        test_emb = await self.extract_voiceprint_async(audio)
+        result = await self._identify_embedding_async(speaker_ids, test_emb, top_k)
+        result.speech_duration = audio_processor.get_duration(audio)
+        return result
+
+    async def _identify_embedding_async(
+        self, speaker_ids: Optional[List[str]], test_emb: np.ndarray, top_k: int = 1
+    ) -> IdentifyResult:
+        """
+        把已提取的声纹特征与候选说话人打分并排序
+
+        Args:
+            speaker_ids: 候选说话人ID列表，为空时检索全库
+            test_emb: 待识别声纹特征
+            top_k: 返回的候选数量
 
-    def identify_voiceprint(
-        self, speaker_ids: List[str], audio_bytes: bytes
-    ) -> Tuple[str, float]:
+        Returns:
+            IdentifyResult: 识别结果
+
+        Raises:
+            ExecutorBusyError: 执行池排队任务已满
         """
-        识别声纹
+        ids, scores = await stage_executor.run(
+            "db", self._score_candidates, test_emb, speaker_ids, max(top_k, 2)
+        )
+        return self._rank_voiceprint(ids, scores, top_k)
+
+    async def identify_voiceprint_async(
+        self, speaker_ids: Optional[List[str]], audio_bytes: bytes, top_k: int = 1
+    ) -> IdentifyResult:
+        """
+        识别声纹（异步版本），各阶段在执行池中运行，不阻塞事件循环
 
         Args:
-            speaker_ids: 候选说话人ID列表
+            speaker_ids: 候选说话人ID列表，为空时检索全库
             audio_bytes: 音频字节数据
+            top_k: 返回的候选数量
 
         Returns:
-            Tuple[str, float]: (识别出的说话人ID, 相似度分数)
+            IdentifyResult: 识别结果
+
+        Raises:
+            ExecutorBusyError: 执行池排队任务已满
         """
         start_time = time.time()
-        logger.info(f"开始声纹识别流程，候选说话人数量: {len(speaker_ids)}")
+        logger.info(
+            f"开始声纹识别流程，候选说话人数量: {len(speaker_ids) if speaker_ids else '全库'}"
+        )
 
-        audio_path = None
         try:
-            # 简化音频验证
             if len(audio_bytes) < 1000:
                 logger.warning("音频文件过小")
-                return "", 0.0
-
-            # 处理音频文件
-            audio_process_start = time.time()
-            audio_path = audio_processor.ensure_16k_wav(audio_bytes)
-            audio_process_time = time.time() - audio_process_start
-            logger.debug(f"音频文件处理完成，耗时: {audio_process_time:.3f}秒")
-
-            # 提取声纹特征
-            extract_start = time.time()
-            logger.debug("开始提取声纹特征...")
-            test_emb = self.extract_voiceprint(audio_path)
-            extract_time = time.time() - extract_start
-            logger.debug(f"声纹特征提取完成，耗时: {extract_time:.3f}秒")
-
-            # 获取候选声纹特征
-            db_query_start = time.time()
-            logger.debug("开始查询数据库获取候选声纹特征...")
-            voiceprints = voiceprint_db.get_voiceprints(speaker_ids)
-            db_query_time = time.time() - db_query_start
-            logger.debug(
-                f"数据库查询完成，获取到{len(voiceprints)}个声纹特征，耗时: {db_query_time:.3f}秒"
-            )
-
-            if not voiceprints:
-                logger.info("未找到候选说话人声纹")
-                return "", 0.0
-
-            # 计算相似度
-            similarity_start = time.time()
-            logger.debug("开始计算相似度...")
-            similarities = {}
-            for name, emb in voiceprints.items():
-                similarity = self.calculate_similarity(test_emb, emb)
-                similarities[name] = similarity
-            similarity_time = time.time() - similarity_start
-            logger.debug(
-                f"相似度计算完成，共计算{len(similarities)}个，耗时: {similarity_time:.3f}秒"
-            )
-
-            # 找到最佳匹配
-            if not similarities:
-                return "", 0.0
+                return IdentifyResult()
 
-            match_name = max(similarities, key=similarities.get)
-            match_score = similarities[match_name]
-
-            # 检查是否超过阈值
-            if match_score < self.similarity_threshold:
-                logger.info(
-                    f"未识别到说话人，最高分: {match_score:.4f}，阈值: {self.similarity_threshold}"
+            audio_key = self._audio_key(audio_bytes)
+            if self._identify_flight is None:
+                result = await self._identify_bytes_async(
+                    speaker_ids, audio_bytes, top_k, audio_key
+                )
+            else:
+                # 相同音频、候选集合与top_k的并发请求共享一次识别结果
+                flight_key = (
+                    audio_key,
+                    tuple(sorted(set(speaker_ids))) if speaker_ids else None,
+                    top_k,
+                )
+                result = dataclasses.replace(
+                    await self._identify_flight.run(
+                        flight_key,
+                        lambda: self._identify_bytes_async(
+                            speaker_ids, audio_bytes, top_k, audio_key
+                        ),
+                    )
                 )
-                total_time = time.time() - start_time
-                logger.info(f"声纹识别流程完成，总耗时: {total_time:.3f}秒")
-                return "", match_score
-
             total_time = time.time() - start_time
-            logger.info(
-                f"识别到说话人: {match_name}, 分数: {match_score:.4f}, 总耗时: {total_time:.3f}秒"
-            )
-            return match_name, match_score
+            logger.info(f"声纹识别流程完成，总耗时: {total_time:.3f}秒")
+            return result
 
+        except ExecutorBusyError:
+            raise
         except Exception as e:
             total_time = time.time() - start_time
             logger.error(f"声纹识别异常，总耗时: {total_time:.3f}秒，错误: {e}")
-            return "", 0.0
-        finally:
-            # 清理临时文件
-            cleanup_start = time.time()
-            if audio_path:
-                audio_processor.cleanup_temp_file(audio_path)
-            cleanup_time = time.time() - cleanup_start
-            logger.debug(f"临时文件清理完成，耗时: {cleanup_time:.3f}秒")
+            return IdentifyResult()
+
+    async def _identify_bytes_async(
+        self,
+        speaker_ids: Optional[List[str]],
+        audio_bytes: bytes,
+        top_k: int,
+        audio_key: str,
+    ) -> IdentifyResult:
+        """提取上传音频的声纹特征并与候选说话人打分"""
+        test_emb, duration = await self._embed_bytes_async(audio_bytes, audio_key)
+        result = await self._identify_embedding_async(speaker_ids, test_emb, top_k)
+        result.speech_duration = duration
+        return result
+
+    async def identify_voiceprints_batch_async(
+        self,
+        candidate_lists: List[Optional[List[str]]],
+        audio_list: List[bytes],
+        top_k: int = 1,
+    ) -> List[IdentifyResult]:
+        """
+        批量识别声纹（异步版本）
+
+        批量提取特征后，一次矩阵乘法完成全部音频与候选说话人的打分。
+
+        Args:
+            candidate_lists: 每段音频的候选说话人ID列表，为空时检索全库
+            audio_list: 音频字节数据列表
+            top_k: 每段返回的候选数量
+
+        Returns:
+            List[IdentifyResult]: 与输入顺序一致的识别结果，失败的音频带有error
+
+        Raises:
+            ExecutorBusyError: 执行池排队任务已满
+        """
+        start_time = time.time()
+        logger.start(f"批量识别声纹，数量: {len(audio_list)}")
+
+        embs, errors, durations = await self._extract_batch_async(audio_list)
+        results = [IdentifyResult(error=error or None) for error in errors]
+        ready = [i for i, emb in enumerate(embs) if emb is not None]
+
+        if ready:
+            scored = await stage_executor.run(
+                "db",
+                self._score_batch,
+                np.stack([embs[i] for i in ready]),
+                [candidate_lists[i] for i in ready],
+                max(top_k, 2),
+            )
+            for i, (ids, scores) in zip(ready, scored):
+                results[i] = self._rank_voiceprint(ids, scores, top_k)
+                results[i].speech_duration = durations[i]
+
+        logger.complete(
+            f"批量识别声纹，成功: {len(ready)}/{len(audio_list)}",
+            time.time() - start_time,
+        )
+        return results
+
+    def get_gallery_stats(self) -> Dict[str, Any]:
+        """
+        获取声纹库缓存统计
+
+        Returns:
+            Dict[str, Any]: 统计信息，未启用缓存时为空
+        """
+        return voiceprint_gallery.get_stats() if self._gallery_enabled else {}
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        获取声纹特征缓存统计
+
+        Returns:
+            Dict[str, Any]: 统计信息，未启用缓存时为空
+        """
+        return self._cache.get_stats() if self._cache else {}
+
+    def get_coalescing_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        获取相同请求合并统计
+
+        Returns:
+            Dict[str, Dict[str, int]]: {合并层: 统计信息}，未启用合并时为空
+        """
+        if self._embed_flight is None:
+            return {}
+        return {
+            "embed": self._embed_flight.get_stats(),
+            "identify": self._identify_flight.get_stats(),
+        }
+
+    def get_startup_stats(self) -> Dict[str, Any]:
+        """
+        获取启动状态与各启动阶段耗时
+
+        Returns:
+            Dict[str, Any]: 是否就绪、启动错误及各阶段耗时（秒）
+        """
+        return {
+            "ready": self.ready,
+            "error": self.startup_error,
+            "phases": dict(self._startup_timings),
+        }
+
+    def get_batching_stats(self) -> Dict[str, float]:
+        """
+        获取微批调度统计
+
+        Returns:
+            Dict[str, float]: 统计信息，未启用微批时为空
+        """
+        return self._batcher.get_stats() if self._batcher else {}
+
+    def get_inference_stats(self) -> Dict[str, Any]:
+        """
+        获取推理统计：多进程模式下为工作进程状态，否则为模型副本池的使用与等待情况，
+        附带推理后端一致性校验与量化精度校验报告
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        if self._process_pool is not None:
+            stats = self._process_pool.get_stats()
+        else:
+            stats = self._replicas.get_stats() if self._replicas else {}
+        if self._backend_report:
+            stats["backend"] = self._backend_report
+        if self._quantization:
+            stats["quantization"] = self._quantization
+        return stats
+
+    def shutdown(self) -> None:
+        """停止微批调度器与推理工作进程"""
+        self.ready = False
+        voiceprint_gallery.stop_sync()
+        if self._batcher is not None:
+            self._batcher.shutdown()
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
 
     def delete_voiceprint(self, speaker_id: str) -> bool:
         """
@@ -341,7 +1098,10 @@ class VoiceprintService:
         Returns:
             bool: 删除是否成功
         """
-        return voiceprint_db.delete_voiceprint(speaker_id)
+        success = voiceprint_db.delete_voiceprint(speaker_id)
+        if self._gallery_enabled:
+            voiceprint_gallery.remove(speaker_id)
+        return success
 
     def get_voiceprint_count(self) -> int:
         """
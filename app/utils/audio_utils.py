@@ -1,15 +1,19 @@
+import io
 import os
 import tempfile
 import soundfile as sf
-import librosa
 import numpy as np
 import time
-from typing import Tuple
+from typing import List, Tuple, Union
 from ..core.config import settings
 from ..core.logger import get_logger
+from .resampler import resampler
 
 logger = get_logger(__name__)
 
+# 送入模型的音频：16kHz单声道float32波形，或16kHz wav临时文件路径
+AudioInput = Union[np.ndarray, str]
+
 
 class AudioProcessor:
     """音频处理工具类"""
@@ -17,9 +21,283 @@ class AudioProcessor:
     def __init__(self):
         self.target_sample_rate = settings.target_sample_rate
         self.tmp_dir = settings.tmp_dir
+        self.in_memory = settings.audio.get("in_memory", True)
+        self.channel_policy = settings.audio.get("channel_policy", "mean")
+        self.channel_index = int(settings.audio.get("channel_index", 0))
+        self.vad_enabled = settings.audio.get("vad_enabled", True)
+        self.vad_frame_ms = float(settings.audio.get("vad_frame_ms", 20))
+        self.vad_min_db = float(settings.audio.get("vad_min_db", -50))
+        self.vad_relative_db = float(settings.audio.get("vad_relative_db", 35))
+        self.vad_padding_ms = float(settings.audio.get("vad_padding_ms", 100))
+        self.vad_min_speech_seconds = float(
+            settings.audio.get("vad_min_speech_seconds", 0.5)
+        )
+        self.long_audio_policy = settings.audio.get("long_audio_policy", "chunk")
+        self.max_duration = float(settings.audio.get("max_duration", 10))
+        self.chunk_seconds = float(settings.audio.get("chunk_seconds", 5))
+        # 预先缓存常见客户端采样率的重采样滤波器
+        resampler.preload(
+            settings.audio.get("preload_sample_rates", [8000, 44100, 48000]),
+            self.target_sample_rate,
+        )
         # 确保临时目录存在
         os.makedirs(self.tmp_dir, exist_ok=True)
 
+    def prepare_audio(self, audio_bytes: bytes) -> AudioInput:
+        """
+        把上传的音频转换为模型输入
+
+        默认在内存中解码为波形；关闭audio.in_memory时回退到临时文件
+
+        Args:
+            audio_bytes: 音频字节数据
+
+        Returns:
+            AudioInput: 16kHz波形或临时文件路径，用完后调用release_audio释放
+        """
+        if self.in_memory:
+            return self.load_waveform(audio_bytes)
+        return self.ensure_16k_wav(audio_bytes)
+
+    def release_audio(self, audio: AudioInput) -> None:
+        """
+        释放prepare_audio返回的模型输入，临时文件会被删除
+
+        Args:
+            audio: 16kHz波形或临时文件路径
+        """
+        if isinstance(audio, str):
+            self.cleanup_temp_file(audio)
+
+    def _decode(self, audio_bytes: bytes) -> Tuple[np.ndarray, int]:
+        """
+        解码音频为float32数据，内存解码失败时经临时文件解码
+
+        Args:
+            audio_bytes: 音频字节数据
+
+        Returns:
+            Tuple[np.ndarray, int]: (音频数据, 采样率)
+        """
+        try:
+            return sf.read(io.BytesIO(memoryview(audio_bytes)), dtype="float32")
+        except Exception as e:
+            logger.debug(f"内存解码失败，改用临时文件解码: {e}")
+
+        with tempfile.NamedTemporaryFile(
+            delete=False, suffix=".wav", dir=self.tmp_dir
+        ) as tmpf:
+            tmpf.write(audio_bytes)
+            tmp_path = tmpf.name
+        try:
+            return sf.read(tmp_path, dtype="float32")
+        finally:
+            self.cleanup_temp_file(tmp_path)
+
+    def downmix(self, data: np.ndarray) -> np.ndarray:
+        """
+        按audio.channel_policy把多声道音频合并为单声道
+
+        mean: 各声道取平均；channel: 取channel_index指定的声道；
+        energy: 取能量最大的声道
+
+        Args:
+            data: 音频数据，形状为(samples,)或(samples, channels)
+
+        Returns:
+            np.ndarray: 单声道音频
+        """
+        if data.ndim == 1:
+            return data
+        if data.shape[1] == 1:
+            return data[:, 0]
+
+        if self.channel_policy == "channel":
+            channel = min(self.channel_index, data.shape[1] - 1)
+        elif self.channel_policy == "energy":
+            channel = int(np.argmax(np.einsum("ij,ij->j", data, data)))
+        else:
+            return data.mean(axis=1, dtype=np.float32)
+
+        logger.debug(f"多声道音频选取声道: {channel}/{data.shape[1]}")
+        return data[:, channel]
+
+    def trim_silence(self, waveform: np.ndarray) -> np.ndarray:
+        """
+        基于帧能量的语音活动检测，去掉首尾静音并压缩中间的长停顿
+
+        按vad_frame_ms分帧计算能量(dBFS)，高于vad_min_db且不低于最响帧
+        vad_relative_db以内的帧视为语音，语音帧前后各保留vad_padding_ms。
+        保留的语音不足vad_min_speech_seconds时返回原始音频。
+
+        Args:
+            waveform: 16kHz单声道float32波形
+
+        Returns:
+            np.ndarray: 只包含语音帧的波形
+        """
+        if not self.vad_enabled:
+            return waveform
+
+        frame = max(1, int(self.target_sample_rate * self.vad_frame_ms / 1000))
+        n_frames = waveform.shape[0] // frame
+        if n_frames == 0:
+            return waveform
+
+        frames = waveform[: n_frames * frame].reshape(n_frames, frame)
+        energy_db = 10 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame + 1e-10)
+        threshold = max(self.vad_min_db, float(energy_db.max()) - self.vad_relative_db)
+        speech = energy_db > threshold
+
+        padding = int(round(self.vad_padding_ms / self.vad_frame_ms))
+        if padding > 0:
+            kernel = np.ones(2 * padding + 1, dtype=np.int32)
+            speech = np.convolve(speech.astype(np.int32), kernel, mode="same") > 0
+
+        if speech.all():
+            return waveform
+        speech_seconds = speech.sum() * frame / self.target_sample_rate
+        if speech_seconds < self.vad_min_speech_seconds:
+            logger.debug(f"VAD检测到的语音过短({speech_seconds:.2f}秒)，使用原始音频")
+            return waveform
+
+        trimmed = frames[speech].reshape(-1)
+        if speech[-1] and waveform.shape[0] > n_frames * frame:
+            trimmed = np.concatenate([trimmed, waveform[n_frames * frame :]])
+        logger.debug(
+            f"VAD裁剪完成，原时长: {waveform.shape[0] / self.target_sample_rate:.2f}秒，"
+            f"语音时长: {trimmed.shape[0] / self.target_sample_rate:.2f}秒"
+        )
+        return np.ascontiguousarray(trimmed, dtype=np.float32)
+
+    def _window_energy(self, waveform: np.ndarray, window: int) -> np.ndarray:
+        """计算按window长度不重叠切分后每个窗口的能量"""
+        n_windows = waveform.shape[0] // window
+        blocks = waveform[: n_windows * window].reshape(n_windows, window)
+        return np.einsum("ij,ij->i", blocks, blocks)
+
+    def limit_duration(self, waveform: np.ndarray) -> np.ndarray:
+        """
+        按audio.long_audio_policy限制送入模型的音频时长，保证推理耗时有上限
+
+        crop: 截取能量最大的连续max_duration秒；
+        chunk: 按chunk_seconds切分，保留能量最大的若干段（总长不超过max_duration），
+        提取特征时逐段批量推理后取平均；none: 不限制
+
+        Args:
+            waveform: 16kHz单声道float32波形
+
+        Returns:
+            np.ndarray: 时长受限的波形
+        """
+        max_samples = int(self.max_duration * self.target_sample_rate)
+        if (
+            self.long_audio_policy not in ("crop", "chunk")
+            or max_samples <= 0
+            or waveform.shape[0] <= max_samples
+        ):
+            return waveform
+
+        original = waveform.shape[0] / self.target_sample_rate
+        hop = max(1, self.target_sample_rate // 100)
+        if self.long_audio_policy == "chunk":
+            # 片段长度不超过时长上限，否则一个片段都放不下
+            chunk = min(int(self.chunk_seconds * self.target_sample_rate), max_samples)
+            if chunk <= 0:
+                limited = waveform[:max_samples]
+            else:
+                n_keep = max(1, max_samples // chunk)
+                energy = self._window_energy(waveform, chunk)
+                keep = np.sort(np.argsort(-energy, kind="stable")[:n_keep])
+                blocks = waveform[: energy.shape[0] * chunk].reshape(-1, chunk)
+                limited = np.ascontiguousarray(blocks[keep].reshape(-1))
+        elif max_samples < hop:
+            # 时长上限不足一个步长时直接截取开头
+            limited = waveform[:max_samples]
+        else:
+            # 以10ms为步长滑动，用前缀和找能量最大的窗口
+            energy = np.concatenate(
+                ([0.0], np.cumsum(self._window_energy(waveform, hop)))
+            )
+            frames = max_samples // hop
+            start = int(np.argmax(energy[frames:] - energy[:-frames])) * hop
+            start = min(start, waveform.shape[0] - max_samples)
+            limited = waveform[start : start + max_samples]
+
+        logger.debug(
+            f"长音频已按{self.long_audio_policy}策略截取，原时长: {original:.2f}秒，"
+            f"截取后: {limited.shape[0] / self.target_sample_rate:.2f}秒"
+        )
+        return limited
+
+    def split_chunks(self, audio: AudioInput) -> List[AudioInput]:
+        """
+        chunk策略下把波形切分为chunk_seconds长的片段，用于批量提取后取平均
+
+        不足两段的波形和文件路径原样返回
+
+        Args:
+            audio: 16kHz波形或音频文件路径
+
+        Returns:
+            List[AudioInput]: 片段列表
+        """
+        if self.long_audio_policy != "chunk" or isinstance(audio, str):
+            return [audio]
+
+        chunk = int(self.chunk_seconds * self.target_sample_rate)
+        if chunk <= 0 or audio.shape[0] < 2 * chunk:
+            return [audio]
+
+        n_chunks = audio.shape[0] // chunk
+        chunks = [audio[i * chunk : (i + 1) * chunk] for i in range(n_chunks)]
+        if audio.shape[0] - n_chunks * chunk >= chunk // 2:
+            chunks.append(audio[-chunk:])
+        return chunks
+
+    def load_waveform(self, audio_bytes: bytes) -> np.ndarray:
+        """
+        在内存中解码音频并重采样为16kHz单声道float32波形
+
+        Args:
+            audio_bytes: 音频字节数据
+
+        Returns:
+            np.ndarray: 16kHz单声道float32波形
+        """
+        start_time = time.time()
+        logger.debug(f"开始内存音频处理，输入大小: {len(audio_bytes)}字节")
+
+        try:
+            read_start = time.time()
+            data, sr = self._decode(audio_bytes)
+            read_time = time.time() - read_start
+            logger.debug(
+                f"音频解码完成，采样率: {sr}Hz，时长: {len(data)/sr:.2f}秒，耗时: {read_time:.3f}秒"
+            )
+
+            # 先合并为单声道再重采样
+            data = self.downmix(data)
+
+            if sr != self.target_sample_rate:
+                resample_start = time.time()
+                data = resampler.resample(data, sr, self.target_sample_rate)
+                resample_time = time.time() - resample_start
+                logger.debug(
+                    f"音频重采样完成: {sr}Hz -> {self.target_sample_rate}Hz，耗时: {resample_time:.3f}秒"
+                )
+
+            waveform = self.trim_silence(np.ascontiguousarray(data, dtype=np.float32))
+            waveform = self.limit_duration(waveform)
+            total_time = time.time() - start_time
+            logger.debug(f"内存音频处理完成，总耗时: {total_time:.3f}秒")
+            return waveform
+
+        except Exception as e:
+            total_time = time.time() - start_time
+            logger.error(f"音频处理失败，总耗时: {total_time:.3f}秒，错误: {e}")
+            raise
+
     def ensure_16k_wav(self, audio_bytes: bytes) -> str:
         """
         将任意采样率的wav bytes转为16kHz wav临时文件
@@ -42,41 +320,35 @@ class AudioProcessor:
         try:
             # 读取原采样率
             read_start = time.time()
-            data, sr = sf.read(tmp_path)
+            data, sr = sf.read(tmp_path, dtype="float32")
             read_time = time.time() - read_start
             logger.debug(
                 f"音频文件读取完成，采样率: {sr}Hz，时长: {len(data)/sr:.2f}秒，耗时: {read_time:.3f}秒"
             )
 
+            # 多声道先合并为单声道，再重采样、裁剪静音与写入
+            changed = data.ndim > 1 or sr != self.target_sample_rate
+            data = self.downmix(data)
+
             if sr != self.target_sample_rate:
-                # librosa重采样，支持多通道
+                # 多相重采样
                 resample_start = time.time()
                 logger.debug(f"开始音频重采样: {sr}Hz -> {self.target_sample_rate}Hz")
 
-                if data.ndim == 1:
-                    data_rs = librosa.resample(
-                        data, orig_sr=sr, target_sr=self.target_sample_rate
-                    )
-                else:
-                    data_rs = np.vstack(
-                        [
-                            librosa.resample(
-                                data[:, ch],
-                                orig_sr=sr,
-                                target_sr=self.target_sample_rate,
-                            )
-                            for ch in range(data.shape[1])
-                        ]
-                    ).T
+                data = resampler.resample(data, sr, self.target_sample_rate)
 
                 resample_time = time.time() - resample_start
                 logger.debug(f"音频重采样完成，耗时: {resample_time:.3f}秒")
 
-                # 写入重采样后的音频
+            trimmed = self.limit_duration(self.trim_silence(data))
+            changed = changed or trimmed is not data
+
+            if changed:
+                # 写入处理后的音频
                 write_start = time.time()
-                sf.write(tmp_path, data_rs, self.target_sample_rate)
+                sf.write(tmp_path, trimmed, self.target_sample_rate)
                 write_time = time.time() - write_start
-                logger.debug(f"重采样音频写入完成，耗时: {write_time:.3f}秒")
+                logger.debug(f"处理后音频写入完成，耗时: {write_time:.3f}秒")
 
             total_time = time.time() - start_time
             logger.debug(f"音频处理完成，总耗时: {total_time:.3f}秒")
@@ -90,6 +362,20 @@ class AudioProcessor:
             logger.error(f"音频处理失败，总耗时: {total_time:.3f}秒，错误: {e}")
             raise
 
+    def get_duration(self, audio: AudioInput) -> float:
+        """
+        获取模型输入的时长，文件只读取文件头
+
+        Args:
+            audio: 16kHz波形或音频文件路径
+
+        Returns:
+            float: 音频时长（秒）
+        """
+        if isinstance(audio, str):
+            return sf.info(audio).duration
+        return len(audio) / self.target_sample_rate
+
     def validate_audio_file(self, audio_bytes: bytes) -> bool:
         """
         验证音频文件格式是否有效（简化版本）
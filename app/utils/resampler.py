@@ -0,0 +1,108 @@
+import threading
+import time
+import numpy as np
+from math import gcd
+from typing import Dict, Iterable, Optional, Tuple
+from scipy.signal import firwin, resample_poly
+from ..core.config import settings
+from ..core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 质量档位: (滤波器每侧零交叉数, kaiser窗beta)
+QUALITY_PRESETS = {
+    "fast": (4, 5.0),
+    "hq": (10, 5.0),
+}
+
+
+class Resampler:
+    """多相重采样器，按(原采样率, 目标采样率)缓存低通滤波器，全程float32"""
+
+    def __init__(self, quality: Optional[str] = None):
+        quality = quality or settings.audio.get("resample_quality", "fast")
+        if quality not in QUALITY_PRESETS:
+            logger.warning(f"未知的重采样质量档位: {quality}，使用fast")
+            quality = "fast"
+        self.quality = quality
+        self._filters: Dict[Tuple[int, int], Tuple[int, int, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _design(self, src_rate: int, dst_rate: int) -> Tuple[int, int, np.ndarray]:
+        """设计(原采样率, 目标采样率)对应的低通滤波器"""
+        divisor = gcd(src_rate, dst_rate)
+        up = dst_rate // divisor
+        down = src_rate // divisor
+        zero_crossings, beta = QUALITY_PRESETS[self.quality]
+        max_rate = max(up, down)
+        taps = firwin(
+            2 * zero_crossings * max_rate + 1,
+            1.0 / max_rate,
+            window=("kaiser", beta),
+        )
+        return up, down, taps.astype(np.float32)
+
+    def get_filter(self, src_rate: int, dst_rate: int) -> Tuple[int, int, np.ndarray]:
+        """
+        获取缓存的滤波器，不存在时设计并缓存
+
+        Args:
+            src_rate: 原采样率
+            dst_rate: 目标采样率
+
+        Returns:
+            Tuple[int, int, np.ndarray]: (上采样倍数, 下采样倍数, 滤波器系数)
+        """
+        key = (src_rate, dst_rate)
+        cached = self._filters.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            cached = self._filters.get(key)
+            if cached is None:
+                start_time = time.time()
+                cached = self._design(src_rate, dst_rate)
+                self._filters[key] = cached
+                logger.debug(
+                    f"重采样滤波器已缓存: {src_rate}Hz -> {dst_rate}Hz，"
+                    f"长度: {len(cached[2])}，耗时: {time.time() - start_time:.3f}秒"
+                )
+            return cached
+
+    def preload(self, src_rates: Iterable[int], dst_rate: int) -> None:
+        """
+        预先设计常用采样率的滤波器
+
+        Args:
+            src_rates: 原采样率列表
+            dst_rate: 目标采样率
+        """
+        for src_rate in src_rates:
+            if int(src_rate) != dst_rate:
+                self.get_filter(int(src_rate), dst_rate)
+
+    def resample(self, data: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+        """
+        重采样音频，多声道数据沿第0维（时间）处理
+
+        Args:
+            data: 音频数据，形状为(samples,)或(samples, channels)
+            src_rate: 原采样率
+            dst_rate: 目标采样率
+
+        Returns:
+            np.ndarray: 重采样后的float32音频
+        """
+        data = np.asarray(data, dtype=np.float32)
+        if src_rate == dst_rate:
+            return data
+
+        up, down, taps = self.get_filter(src_rate, dst_rate)
+        return resample_poly(data, up, down, axis=0, window=taps).astype(
+            np.float32, copy=False
+        )
+
+
+# 全局重采样器实例
+resampler = Resampler()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+模型导出脚本 - 把CAM++网络导出为TorchScript与ONNX
+
+导出的图输入为(batch, 帧数, 80)的fbank特征，输出为声纹特征向量，
+批大小与帧数均为动态维度。配置inference.backend为torchscript或onnx后，
+服务直接加载导出的文件，不再导入modelscope。
+
+用法:
+    python export_model.py                      # 导出两种格式到inference.export_dir
+    python export_model.py --format onnx --output models/campplus.onnx
+    python export_model.py --atol 1e-4 --check-frames 80 200 800
+
+导出后在多种批大小与帧数上与原模型比较，误差超过--atol时不写入模型文件并以非零状态退出。
+"""
+
+# 导入统一日志模块（会自动执行早期日志设置）
+from app.core.logger import setup_logging, get_logger
+
+setup_logging()
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import torch
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.services.model_loader import (
+    EXPORTED_BACKENDS,
+    exported_model_path,
+    load_backend,
+)
+
+logger = get_logger(__name__)
+
+
+def export_torchscript(module: torch.nn.Module, example: torch.Tensor, path: str):
+    """用trace导出TorchScript"""
+    traced = torch.jit.trace(module, example, check_trace=False)
+    traced.save(path)
+
+
+def export_onnx(
+    module: torch.nn.Module, example: torch.Tensor, path: str, opset: int
+) -> None:
+    """导出ONNX，批大小与帧数为动态维度"""
+    torch.onnx.export(
+        module,
+        example,
+        path,
+        input_names=["features"],
+        output_names=["embedding"],
+        dynamic_axes={"features": {0: "batch", 1: "frames"}, "embedding": {0: "batch"}},
+        opset_version=opset,
+    )
+
+
+def verify(
+    name: str, path: str, module: torch.nn.Module, lengths: List[int], atol: float
+) -> float:
+    """
+    加载导出的模型，在多种批大小与帧数上与原模型的输出比较
+
+    Returns:
+        float: 所有输入上的最大绝对误差
+    """
+    backend = EXPORTED_BACKENDS[name][0].load(path, "cpu")
+    max_diff = 0.0
+    for batch_size in (1, 2):
+        for frames in lengths:
+            features = torch.randn(batch_size, frames, backend.feature_dim)
+            with torch.inference_mode():
+                reference = module(features).numpy()
+                embs = np.asarray(backend._forward(features), dtype=np.float32)
+            if embs.shape != reference.shape:
+                raise RuntimeError(
+                    f"输出形状不一致: {embs.shape} != {reference.shape}"
+                    f"（批大小: {batch_size}，帧数: {frames}）"
+                )
+            diff = float(np.abs(embs - reference).max())
+            logger.debug(
+                f"{name}校验 批大小: {batch_size}，帧数: {frames}，误差: {diff:.6f}"
+            )
+            max_diff = max(max_diff, diff)
+    logger.info(
+        f"{name}导出校验完成，与原模型输出的最大绝对误差: {max_diff:.6f}（容差: {atol}）"
+    )
+    return max_diff
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="导出CAM++声纹模型")
+    parser.add_argument(
+        "--format",
+        choices=["all", *EXPORTED_BACKENDS],
+        default="all",
+        help="导出格式",
+    )
+    parser.add_argument(
+        "--output", default="", help="输出文件路径，只在导出单一格式时有效"
+    )
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset版本")
+    parser.add_argument("--frames", type=int, default=300, help="示例输入的帧数")
+    parser.add_argument(
+        "--atol", type=float, default=1e-3, help="校验允许的最大绝对误差"
+    )
+    parser.add_argument(
+        "--check-frames",
+        type=int,
+        nargs="+",
+        default=[57, 150, 300, 613],
+        help="校验使用的帧数，应包含与示例输入不同的长度以检查动态维度",
+    )
+    args = parser.parse_args()
+
+    start_time = time.time()
+    logger.start("导出声纹模型")
+
+    backend, _ = load_backend("cpu", "direct")
+    module = backend.module.eval()
+    example = torch.randn(1, args.frames, backend.feature_dim)
+
+    failed = []
+    formats = list(EXPORTED_BACKENDS) if args.format == "all" else [args.format]
+    for name in formats:
+        if len(formats) == 1:
+            path = args.output or exported_model_path(name)
+        else:
+            path = os.path.join(
+                settings.inference.get("export_dir", "models"),
+                EXPORTED_BACKENDS[name][1],
+            )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 先导出到临时文件，校验通过后才替换正式文件
+        tmp_path = f"{path}.tmp"
+        export_start = time.time()
+        try:
+            if name == "torchscript":
+                export_torchscript(module, example, tmp_path)
+            else:
+                export_onnx(module, example, tmp_path, args.opset)
+            logger.info(f"{name}模型已导出，耗时: {time.time() - export_start:.3f}秒")
+            diff = verify(name, tmp_path, module, args.check_frames, args.atol)
+            if diff > args.atol:
+                raise RuntimeError(f"最大绝对误差{diff:.6f}超过容差{args.atol}")
+        except Exception as e:
+            logger.fail(f"{name}导出校验未通过，未写入{path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            failed.append(name)
+            continue
+        os.replace(tmp_path, path)
+        logger.info(f"{name}模型已写入: {path}")
+
+    if failed:
+        logger.fail(f"导出失败的格式: {', '.join(failed)}")
+        sys.exit(1)
+    logger.complete("导出声纹模型", time.time() - start_time)
+
+
+if __name__ == "__main__":
+    main()
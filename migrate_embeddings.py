@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+声纹特征迁移脚本 - 把数据库中已有的声纹特征转换为带版本头的存储格式
+
+按说话人ID分页读取，旧的原始float32数据（以及类型与embedding_storage.dtype不同的数据）
+重新编码后写回，保留原记录的L2范数。已是目标格式的记录不做改动；由其他模型提取的记录
+不会被改写为当前模型的标识，只统计并输出。只更新内容仍为旧值的记录，服务运行期间也可以执行。
+
+用法:
+    python migrate_embeddings.py                 # 按embedding_storage.dtype迁移
+    python migrate_embeddings.py --dtype int8 --dry-run
+"""
+
+# 导入统一日志模块（会自动执行早期日志设置）
+from app.core.logger import setup_logging, get_logger
+
+setup_logging()
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from app.database.connection import db_connection
+from app.core.config import MODEL_ID
+from app.database.embedding_codec import DTYPES, decode_embedding, model_tag
+from app.database.voiceprint_db import voiceprint_db
+
+logger = get_logger(__name__)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="迁移声纹特征存储格式")
+    parser.add_argument(
+        "--dtype",
+        choices=list(DTYPES),
+        default=voiceprint_db.dtype,
+        help="目标存储类型，默认为embedding_storage.dtype",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批记录数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不写回数据库")
+    args = parser.parse_args()
+
+    voiceprint_db.dtype = args.dtype
+    start_time = time.time()
+    logger.start(f"迁移声纹特征存储格式，目标类型: {args.dtype}")
+    db_connection.open()
+
+    stats = {
+        "scanned": 0,
+        "converted": 0,
+        "skipped": 0,
+        "mismatched": 0,
+        "failed": 0,
+    }
+    current_tag = model_tag(MODEL_ID)
+    bytes_before = bytes_after = 0
+    after = ""
+    try:
+        while True:
+            rows = voiceprint_db.scan_raw_voiceprints(after, args.batch_size)
+            if not rows:
+                break
+            after = rows[-1][0]
+            items = []
+            for speaker_id, data in rows:
+                stats["scanned"] += 1
+                try:
+                    decoded = decode_embedding(data, voiceprint_db.dim)
+                except ValueError as e:
+                    logger.warning(f"跳过无法解析的声纹特征 {speaker_id}: {e}")
+                    stats["failed"] += 1
+                    continue
+                if decoded.model_tag is not None and decoded.model_tag != current_tag:
+                    logger.warning(f"跳过其他模型提取的声纹特征: {speaker_id}")
+                    stats["mismatched"] += 1
+                    continue
+                if decoded.dtype == args.dtype:
+                    stats["skipped"] += 1
+                    continue
+                # 旧数据未归一化，编码时计算范数；新格式数据已归一化，沿用记录的原始范数
+                encoded = voiceprint_db.encode(decoded.vector, decoded.norm)
+                items.append((speaker_id, data, encoded))
+                bytes_before += len(data)
+                bytes_after += len(encoded)
+
+            if not args.dry_run:
+                updated = voiceprint_db.replace_feature_vectors(items)
+                # 迁移期间被重新写入的记录已是新格式，不再覆盖
+                stats["skipped"] += len(items) - updated
+                stats["converted"] += updated
+            else:
+                stats["converted"] += len(items)
+            logger.info(
+                f"已处理{stats['scanned']}条，转换{stats['converted']}条，"
+                f"跳过{stats['skipped']}条，其他模型{stats['mismatched']}条，"
+                f"失败{stats['failed']}条"
+            )
+    finally:
+        db_connection.close()
+
+    if stats["mismatched"]:
+        logger.warning(
+            f"{stats['mismatched']}条声纹特征由其他模型提取，未迁移，需要用当前模型重新注册"
+        )
+    ratio = bytes_before / bytes_after if bytes_after else 0.0
+    logger.info(
+        f"转换数据体积: {bytes_before} -> {bytes_after} 字节"
+        + (f"，压缩比 {ratio:.2f}x" if bytes_after else "")
+        + ("（试运行，未写回数据库）" if args.dry_run else "")
+    )
+    logger.complete("迁移声纹特征存储格式", time.time() - start_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+模型打包脚本 - 把CAM++网络打包为离线模型包
+
+模型包包含清单(manifest.json)与序列化的权重(weights.pt)。配置inference.backend为bundle后，
+服务只导入CAM++网络类，内存映射权重文件，不经过modelscope hub解析，也不访问网络。
+在能访问模型仓库的机器上打包，再把模型包目录复制到离线节点即可。
+
+用法:
+    python pack_model.py                          # 打包到inference.bundle_dir
+    python pack_model.py --output /opt/models/campplus_bundle
+    python pack_model.py --atol 1e-5 --check-frames 80 200 800
+
+先打包到临时目录，在多种批大小与帧数上与原模型比较，误差超过--atol时删除临时目录、
+保留原有模型包并以非零状态退出。
+"""
+
+# 导入统一日志模块（会自动执行早期日志设置）
+from app.core.logger import setup_logging, get_logger
+
+setup_logging()
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import torch
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from app.services.model_loader import (
+    BundleBackend,
+    bundle_path,
+    load_backend,
+    save_bundle,
+)
+
+logger = get_logger(__name__)
+
+
+def verify(
+    path: str, module: torch.nn.Module, lengths: List[int], atol: float
+) -> float:
+    """
+    加载模型包，测量加载耗时并在多种批大小与帧数上与原模型的输出比较
+
+    Returns:
+        float: 所有输入上的最大绝对误差
+    """
+    start_time = time.time()
+    backend = BundleBackend.load(path, "cpu")
+    load_time = time.time() - start_time
+
+    max_diff = 0.0
+    for batch_size in (1, 2):
+        for frames in lengths:
+            features = torch.randn(batch_size, frames, backend.feature_dim)
+            with torch.inference_mode():
+                reference = module(features).numpy()
+                embs = np.asarray(backend._forward(features), dtype=np.float32)
+            if embs.shape != reference.shape:
+                raise RuntimeError(
+                    f"输出形状不一致: {embs.shape} != {reference.shape}"
+                    f"（批大小: {batch_size}，帧数: {frames}）"
+                )
+            max_diff = max(max_diff, float(np.abs(embs - reference).max()))
+    logger.info(
+        f"模型包校验完成，加载耗时: {load_time:.3f}秒，"
+        f"与原模型输出的最大绝对误差: {max_diff:.6f}（容差: {atol}）"
+    )
+    return max_diff
+
+
+def replace_dir(src: str, dst: str) -> None:
+    """用src目录替换dst目录，旧目录在新目录就位后删除"""
+    old = f"{dst}.old"
+    if os.path.exists(old):
+        shutil.rmtree(old)
+    if os.path.exists(dst):
+        os.replace(dst, old)
+    os.replace(src, dst)
+    if os.path.exists(old):
+        shutil.rmtree(old)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="打包CAM++声纹模型为离线模型包")
+    parser.add_argument(
+        "--output", default="", help="模型包目录，默认为inference.bundle_dir"
+    )
+    parser.add_argument(
+        "--atol", type=float, default=1e-5, help="校验允许的最大绝对误差"
+    )
+    parser.add_argument(
+        "--check-frames",
+        type=int,
+        nargs="+",
+        default=[57, 157, 300, 613],
+        help="校验使用的帧数",
+    )
+    args = parser.parse_args()
+
+    start_time = time.time()
+    logger.start("打包声纹模型")
+
+    backend, _ = load_backend("cpu", "direct")
+    if backend.name != "direct":
+        raise RuntimeError("无法从pipeline中取得CAM++网络，打包失败")
+    module = backend.module.eval()
+
+    path = os.path.normpath(args.output or bundle_path())
+    # 先打包到临时目录，校验通过后才替换正式模型包
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    try:
+        manifest = save_bundle(backend, tmp_path)
+        diff = verify(tmp_path, module, args.check_frames, args.atol)
+        if diff > args.atol:
+            raise RuntimeError(f"最大绝对误差{diff:.6f}超过容差{args.atol}")
+    except Exception as e:
+        logger.fail(f"模型包校验未通过，未写入{path}: {e}")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        sys.exit(1)
+    replace_dir(tmp_path, path)
+    logger.info(
+        f"模型包已写入: {path}，网络: {manifest['network']}，"
+        f"特征维度: {manifest['embedding_dim']}"
+    )
+
+    logger.complete("打包声纹模型", time.time() - start_time)
+
+
+if __name__ == "__main__":
+    main()
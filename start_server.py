@@ -42,6 +42,52 @@ def signal_handler(signum, frame):
     sys.exit(0)
 
 
+def use_prefork() -> bool:
+    """是否使用预派生多进程模式"""
+    if int(settings.server.get("workers", 1)) <= 1:
+        return False
+    if not settings.server.get("prefork", True):
+        logger.warning("未开启server.prefork，workers配置被忽略，使用单进程模式")
+        return False
+    if not hasattr(os, "fork"):
+        logger.warning("当前平台不支持fork，使用单进程模式")
+        return False
+    if (
+        settings.gallery.get("enabled", True)
+        and float(settings.gallery.get("sync_interval_seconds", 1.0)) <= 0
+    ):
+        # 各工作进程的声纹库缓存无法感知其他进程的注册与删除
+        raise RuntimeError(
+            "多个HTTP工作进程需要开启gallery.sync_interval_seconds，或关闭gallery.enabled"
+        )
+    if int(settings.inference.get("process_workers", 0)) > 0:
+        # 推理进程池在每个HTTP进程中各自启动，模型无法共享
+        logger.warning(
+            "inference.process_workers与预派生模式不能同时使用，使用单进程模式"
+        )
+        return False
+    return True
+
+
+def run_prefork(options: dict) -> None:
+    """主进程加载一次模型与声纹库缓存，fork多个HTTP工作进程共享"""
+    from app.application import app
+    from app.core.prefork import PreforkServer
+    from app.services.model_loader import split_threads
+    from app.services.voiceprint_service import voiceprint_service
+
+    server = PreforkServer(app, options)
+
+    def preload():
+        # 按HTTP工作进程数平分torch线程，避免进程间线程争抢
+        threads = split_threads(server.workers)
+        logger.info(f"每个HTTP工作进程torch线程数: {threads}")
+        voiceprint_service.preload_model()
+        voiceprint_service.preload_gallery()
+
+    server.run(preload)
+
+
 def main():
     """主函数"""
     # 注册信号处理器
@@ -60,22 +106,31 @@ def main():
         )
         logger.info("=" * 60)
 
-        # 使用Uvicorn启动，配置优化
-        uvicorn.run(
-            "app.application:app",
+        # Uvicorn配置优化
+        options = dict(
             host=settings.host,
             port=settings.port,
-            reload=False,  # 生产环境关闭热重载
-            workers=1,  # 单进程模式，避免模型重复加载
             access_log=False,  # 关闭uvicorn自带access日志
             log_level="info",
             timeout_keep_alive=30,  # keep-alive超时
             timeout_graceful_shutdown=300,  # 优雅关闭超时
             limit_concurrency=1000,  # 并发连接限制
-            limit_max_requests=1000,  # 最大请求数限制
+            limit_max_requests=int(
+                settings.server.get("max_requests", 1000)
+            ),  # 最大请求数限制
             backlog=2048,  # 连接队列大小
         )
 
+        if use_prefork():
+            run_prefork(options)
+        else:
+            uvicorn.run(
+                "app.application:app",
+                reload=False,  # 生产环境关闭热重载
+                workers=1,  # 单进程模式，避免模型重复加载
+                **options,
+            )
+
     except KeyboardInterrupt:
         logger.info("收到中断信号，正在退出服务。")
     except Exception as e:
@@ -0,0 +1,18 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+# 配置按当前目录下的data/.voiceprint.yaml加载，该文件不纳入版本控制；
+# 测试在临时目录中使用仓库的配置模板运行，不依赖也不改动本地配置
+_workdir = Path(tempfile.mkdtemp(prefix="voiceprint-tests-"))
+(_workdir / "data").mkdir()
+shutil.copy(project_root / "voiceprint.yaml", _workdir / "data" / ".voiceprint.yaml")
+os.chdir(_workdir)
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
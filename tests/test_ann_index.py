@@ -0,0 +1,80 @@
+"""
+IVF近似最近邻索引测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.services.ann_index import IVFIndex, top_k_indices
+
+
+def _normalize(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def _clustered(n: int = 4000, dim: int = 32, centers: int = 40, seed: int = 0):
+    """围绕若干中心分布的归一化向量，接近声纹特征按说话人聚集的情况"""
+    rng = np.random.default_rng(seed)
+    means = _normalize(rng.standard_normal((centers, dim)))
+    labels = rng.integers(0, centers, n)
+    vectors = means[labels] + 0.15 * rng.standard_normal((n, dim))
+    return _normalize(vectors).astype(np.float32), rng
+
+
+def _build(vectors, nlist: int = 40, nprobe: int = 8) -> IVFIndex:
+    index = IVFIndex(nlist=nlist, nprobe=nprobe, seed=0)
+    index.train(vectors)
+    index.build(vectors)
+    return index
+
+
+def test_top_k_indices_sorted():
+    scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3], dtype=np.float32)
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 4, 0]
+    assert top_k_indices(scores, 0).size == 0
+
+
+def test_recall_against_exact_search():
+    """nprobe个簇内的top-1与全量精确检索的top-1基本一致"""
+    vectors, rng = _clustered()
+    index = _build(vectors)
+    assert index.ntotal == vectors.shape[0]
+
+    queries = _normalize(
+        vectors[rng.choice(vectors.shape[0], 200, replace=False)]
+        + 0.05 * rng.standard_normal((200, vectors.shape[1]))
+    ).astype(np.float32)
+    hits = 0
+    for query in queries:
+        exact = int(np.argmax(vectors @ query))
+        rows = index.candidates(query)
+        approx = int(rows[np.argmax(vectors[rows] @ query)])
+        hits += exact == approx
+    assert hits / len(queries) >= 0.95
+
+
+def test_full_probe_returns_all_rows():
+    vectors, _ = _clustered(n=500)
+    index = _build(vectors, nlist=10)
+    rows = index.candidates(vectors[0], nprobe=10)
+    assert sorted(rows.tolist()) == list(range(500))
+
+
+def test_add_remove_move():
+    """增删与行号移动后，全量探测的候选行号与声纹库保持一致"""
+    vectors, rng = _clustered(n=500)
+    index = _build(vectors, nlist=10)
+
+    extra = _normalize(rng.standard_normal(vectors.shape[1])).astype(np.float32)
+    index.add(500, extra)
+    assert 500 in index.candidates(extra).tolist()
+
+    # 模拟声纹库删除第3行：最后一行移到第3行
+    index.remove(3)
+    index.move(500, 3)
+    rows = index.candidates(vectors[0], nprobe=10).tolist()
+    assert sorted(rows) == list(range(500))
+    assert index.ntotal == 500
+    assert 3 in index.candidates(extra).tolist()
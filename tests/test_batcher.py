@@ -0,0 +1,88 @@
+"""
+声纹微批调度器测试
+"""
+
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.core.executor import ExecutorBusyError
+from app.services.batcher import EmbeddingBatcher
+
+
+def _echo(audios):
+    return [np.array([audio], dtype=np.float32) for audio in audios]
+
+
+def test_results_match_requests():
+    batcher = EmbeddingBatcher(_echo, max_batch_size=8, max_wait_ms=20)
+    try:
+        futures = [batcher.submit(i, 1.0 + i * 0.1) for i in range(6)]
+        assert [f.result(timeout=5)[0] for f in futures] == list(range(6))
+    finally:
+        batcher.shutdown()
+
+
+def test_buckets_by_duration_ratio():
+    calls = []
+
+    def extract(audios):
+        calls.append(list(audios))
+        return _echo(audios)
+
+    # 凑满4个请求立即成批，等待时间足够长保证四个请求进入同一批
+    batcher = EmbeddingBatcher(
+        extract, max_batch_size=4, max_wait_ms=1000, bucket_ratio=1.5
+    )
+    try:
+        futures = [
+            batcher.submit(name, duration)
+            for name, duration in ((0, 1.0), (1, 4.0), (2, 1.2), (3, 5.0))
+        ]
+        for f in futures:
+            f.result(timeout=5)
+    finally:
+        batcher.shutdown()
+    assert sorted(sorted(call) for call in calls) == [[0, 2], [1, 3]]
+    assert batcher.get_stats()["buckets"] == 2
+
+
+def test_max_pending_rejects_and_recovers():
+    gate = threading.Event()
+
+    def extract(audios):
+        gate.wait(5)
+        return _echo(audios)
+
+    batcher = EmbeddingBatcher(extract, max_batch_size=1, max_wait_ms=1, max_pending=3)
+    try:
+        futures = [batcher.submit(i, 1.0) for i in range(3)]
+        with pytest.raises(ExecutorBusyError):
+            batcher.submit(3, 1.0)
+        assert batcher.get_stats()["rejected"] == 1
+
+        gate.set()
+        for f in futures:
+            f.result(timeout=5)
+        # 完成的请求释放名额后可以继续提交
+        assert batcher.submit(4, 1.0).result(timeout=5)[0] == 4
+        assert batcher.get_stats()["pending"] == 0
+    finally:
+        gate.set()
+        batcher.shutdown()
+
+
+def test_extract_error_fails_bucket():
+    def extract(audios):
+        raise RuntimeError("model failed")
+
+    batcher = EmbeddingBatcher(extract, max_batch_size=4, max_wait_ms=1)
+    try:
+        future = batcher.submit(0, 1.0)
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(timeout=5)
+        assert batcher.get_stats()["pending"] == 0
+    finally:
+        batcher.shutdown()
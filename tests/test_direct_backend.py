@@ -0,0 +1,99 @@
+"""
+direct推理后端的一致性测试
+
+test_direct_matches_pipeline需要加载CAM++模型，设置VOICEPRINT_MODEL_TESTS=1时才运行
+"""
+
+import os
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchaudio")
+
+from app.core.config import settings
+from app.services.model_loader import DirectBackend, PipelineBackend, check_parity
+
+
+class _StatsPoolNet(torch.nn.Module):
+    """卷积加时间维统计池化的小网络，输出与输入帧数相关，结构上与CAM++类似"""
+
+    def __init__(self, feature_dim: int = 80, channels: int = 16):
+        super().__init__()
+        torch.manual_seed(0)
+        self.conv = torch.nn.Conv1d(feature_dim, channels, 3, padding=1)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        h = torch.relu(self.conv(x.transpose(1, 2)))
+        return torch.cat([h.mean(dim=-1), h.std(dim=-1)], dim=-1)
+
+
+def _audios():
+    rng = np.random.default_rng(0)
+    return [
+        rng.standard_normal(int(16000 * seconds)).astype(np.float32) * 0.1
+        for seconds in (1.0, 2.5, 1.0, 4.0, 1.7)
+    ]
+
+
+def _cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.einsum("ij,ij->i", a, b)
+
+
+def test_equal_length_batch_matches_single():
+    """pad_ratio为1时只拼接等长片段，与逐条推理完全一致"""
+    backend = DirectBackend(_StatsPoolNet().eval(), pad_ratio=1.0)
+    audios = _audios()
+    batched = backend.embed(audios)
+    single = np.concatenate([backend.embed([audio]) for audio in audios])
+    np.testing.assert_allclose(batched, single, rtol=1e-5, atol=1e-5)
+
+
+def test_mixed_length_batch_single_forward():
+    """帧数相近的不等长片段填充后一次前向，与逐条推理的特征在容差内一致"""
+    backend = DirectBackend(_StatsPoolNet().eval(), pad_ratio=1.5)
+    rng = np.random.default_rng(1)
+    audios = [
+        rng.standard_normal(int(16000 * seconds)).astype(np.float32) * 0.1
+        for seconds in (2.0, 2.3, 2.65, 2.9)
+    ]
+    batched = backend.embed(audios)
+    assert backend.forward_calls == 1
+    single = np.concatenate([backend.embed([audio]) for audio in audios])
+    assert _cosine(batched, single).min() > 0.999
+
+
+def test_length_ratio_splits_groups():
+    backend = DirectBackend(_StatsPoolNet().eval(), pad_ratio=1.5)
+    backend.embed(_audios())
+    # 1.0/1.0、1.7/2.5、4.0秒三组
+    assert backend.forward_calls == 3
+
+
+def test_batch_order_preserved():
+    backend = DirectBackend(_StatsPoolNet().eval())
+    audios = _audios()
+    forward = backend.embed(audios)
+    reverse = backend.embed(audios[::-1])[::-1]
+    np.testing.assert_allclose(forward, reverse, rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.skipif(
+    not os.environ.get("VOICEPRINT_MODEL_TESTS"),
+    reason="需要CAM++模型，设置VOICEPRINT_MODEL_TESTS=1后运行",
+)
+def test_direct_matches_pipeline():
+    """direct后端与modelscope pipeline逐条提取的特征一致"""
+    pytest.importorskip("modelscope")
+    from app.services.model_loader import load_pipeline
+
+    pipeline = load_pipeline("cpu")
+    report = check_parity(
+        DirectBackend.from_pipeline(pipeline), PipelineBackend(pipeline), _audios()
+    )
+    max_drift = float(settings.inference.get("direct_max_drift", 0.01))
+    assert report["mean_cosine_drift"] <= max_drift
+    assert report["max_cosine_drift"] <= max_drift * 5
+    assert report["batched_cosine_drift"] <= max_drift
@@ -0,0 +1,81 @@
+"""
+声纹特征存储格式测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.database.embedding_codec import (
+    DTYPES,
+    decode_embedding,
+    encode_embedding,
+    model_tag,
+)
+
+MODEL = "iic/speech_campplus_sv_zh-cn_3dspeaker_16k"
+
+
+def _embedding(dim: int = 192):
+    return np.random.default_rng(0).standard_normal(dim).astype(np.float32) * 3
+
+
+@pytest.mark.parametrize(
+    "dtype,atol", [("float32", 1e-7), ("float16", 1e-3), ("int8", 1e-2)]
+)
+def test_round_trip(dtype, atol):
+    emb = _embedding()
+    decoded = decode_embedding(encode_embedding(emb, dtype, MODEL), 192)
+    assert decoded.dtype == dtype
+    assert decoded.model_tag == model_tag(MODEL)
+    assert decoded.norm == pytest.approx(float(np.linalg.norm(emb)), rel=1e-6)
+    np.testing.assert_allclose(decoded.vector, emb / np.linalg.norm(emb), atol=atol)
+
+
+def test_encoded_size():
+    emb = _embedding()
+    sizes = {dtype: len(encode_embedding(emb, dtype, MODEL)) for dtype in DTYPES}
+    assert sizes["float32"] - sizes["float16"] == 192 * 2
+    assert sizes["float16"] - sizes["int8"] == 192
+
+
+def test_explicit_norm_preserved():
+    """重新编码已归一化的向量时沿用原来的范数"""
+    emb = _embedding()
+    first = decode_embedding(encode_embedding(emb, "float32", MODEL))
+    second = decode_embedding(encode_embedding(first.vector, "int8", MODEL, first.norm))
+    assert second.norm == pytest.approx(first.norm)
+
+
+def test_legacy_float32():
+    """不带版本头的旧数据按原始float32解析"""
+    emb = _embedding()
+    decoded = decode_embedding(emb.tobytes(), 192)
+    assert decoded.dtype == "legacy"
+    assert decoded.model_tag is None and decoded.norm is None
+    np.testing.assert_array_equal(decoded.vector, emb)
+
+
+def test_legacy_dimension_mismatch():
+    with pytest.raises(ValueError):
+        decode_embedding(_embedding(128).tobytes(), 192)
+    with pytest.raises(ValueError):
+        decode_embedding(b"\x00" * 7)
+
+
+def test_header_dimension_mismatch():
+    data = encode_embedding(_embedding(128), "float16", MODEL)
+    assert decode_embedding(data).vector.shape == (128,)
+    with pytest.raises(ValueError):
+        decode_embedding(data, 192)
+
+
+def test_corrupted_payload():
+    data = encode_embedding(_embedding(), "float16", MODEL)
+    with pytest.raises(ValueError):
+        decode_embedding(data[:-2])
+
+
+def test_unknown_dtype():
+    with pytest.raises(ValueError):
+        encode_embedding(_embedding(), "bfloat16", MODEL)
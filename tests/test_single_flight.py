@@ -0,0 +1,92 @@
+"""
+相同请求合并测试
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def main():
+        flight = SingleFlight("test")
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return object()
+
+        waiters = [asyncio.ensure_future(flight.run("a", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert flight.get_stats() == {"leaders": 1, "followers": 4, "in_flight": 0}
+
+    asyncio.run(main())
+
+
+def test_different_keys_run_separately():
+    async def main():
+        flight = SingleFlight("test")
+
+        async def work(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(
+            flight.run("a", lambda: work(1)), flight.run("b", lambda: work(2))
+        )
+        assert results == [1, 2]
+
+    asyncio.run(main())
+
+
+def test_error_propagates_to_all_waiters():
+    async def main():
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *[flight.run("a", fail) for _ in range(3)], return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.get_stats()["in_flight"] == 0
+
+        # 失败后的相同请求重新执行
+        async def succeed():
+            return "ok"
+
+        assert await flight.run("a", succeed) == "ok"
+
+    asyncio.run(main())
+
+
+def test_leader_cancellation_does_not_affect_follower():
+    async def main():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        leader = asyncio.ensure_future(flight.run("a", work))
+        follower = asyncio.ensure_future(flight.run("a", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+        assert await follower == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(main())
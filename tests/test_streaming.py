@@ -0,0 +1,94 @@
+"""
+流式识别会话缓冲区测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from app.core.config import settings
+from app.services.streaming import StreamingSession, prepare_waveform
+
+
+@pytest.fixture(autouse=True)
+def stream_config(monkeypatch):
+    monkeypatch.setitem(
+        settings._config,
+        "stream",
+        {
+            "min_seconds": 1.0,
+            "interval_seconds": 0.5,
+            "max_buffer_seconds": 1.0,
+            "max_seconds": 30,
+            "early_stop_margin": 0.1,
+        },
+    )
+
+
+def _session(sample_rate: int = 16000) -> StreamingSession:
+    return StreamingSession(sample_rate)
+
+
+def _pcm(start: int, count: int) -> bytes:
+    """采样值依次递增的PCM16数据，便于检查缓冲区内容"""
+    return (np.arange(start, start + count) % 30000).astype("<i2").tobytes()
+
+
+def test_split_sample_across_chunks():
+    """一个采样点的两个字节分在两块中时不丢数据"""
+    session = _session()
+    data = _pcm(0, 100)
+    session.append(data[:51])
+    session.append(data[51:])
+    assert session.total_samples == 100
+    expected = np.arange(100, dtype=np.float32) / 32768.0
+    np.testing.assert_array_equal(session.snapshot(), expected)
+
+
+def test_rolling_window_keeps_latest_audio():
+    session = _session(8000)
+    for i in range(25):
+        session.append(_pcm(i * 1000, 1000))
+    snapshot = session.snapshot()
+    assert snapshot.shape[0] == 8000
+    expected = (np.arange(17000, 25000) % 30000).astype(np.float32) / 32768.0
+    np.testing.assert_array_equal(snapshot, expected)
+    assert session.received_seconds == pytest.approx(25000 / 8000)
+
+
+def test_oversized_chunk_keeps_tail():
+    session = _session(8000)
+    session.append(_pcm(0, 12000))
+    snapshot = session.snapshot()
+    assert snapshot.shape[0] == 8000
+    assert snapshot[0] == pytest.approx(4000 / 32768.0)
+
+
+def test_due_after_interval():
+    session = _session()
+    session.append(_pcm(0, 12000))
+    assert not session.is_due()
+    session.append(_pcm(0, 8000))
+    assert session.is_due()
+    session.snapshot()
+    assert not session.is_due()
+    session.append(_pcm(0, 8000))
+    assert session.is_due()
+    assert session.evaluations == 1
+
+
+def test_should_stop():
+    session = _session()
+    assert not session.should_stop("", 0.5)
+    assert session.should_stop("alice", None)
+    assert session.should_stop("alice", 0.2)
+    assert not session.should_stop("alice", 0.05)
+
+
+def test_prepare_waveform_resamples():
+    t = np.arange(16000) / 8000
+    waveform = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    prepared = prepare_waveform(waveform, 8000)
+    assert prepared.dtype == np.float32
+    assert prepared.shape[0] == 32000
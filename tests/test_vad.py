@@ -0,0 +1,74 @@
+"""
+基于帧能量的静音裁剪测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from app.utils.audio_utils import AudioProcessor
+
+SR = 16000
+
+
+def _processor() -> AudioProcessor:
+    processor = AudioProcessor()
+    processor.target_sample_rate = SR
+    processor.vad_enabled = True
+    processor.vad_frame_ms = 20
+    processor.vad_min_db = -50
+    processor.vad_relative_db = 35
+    processor.vad_padding_ms = 100
+    processor.vad_min_speech_seconds = 0.5
+    return processor
+
+
+def _tone(seconds: float, amplitude: float = 0.3):
+    t = np.arange(int(SR * seconds)) / SR
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def _silence(seconds: float):
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(SR * seconds)) * 1e-4).astype(np.float32)
+
+
+def test_trims_leading_and_trailing_silence():
+    waveform = np.concatenate([_silence(1.0), _tone(2.0), _silence(1.0)])
+    trimmed = _processor().trim_silence(waveform)
+    # 语音2秒，前后各保留100ms
+    assert 2.0 <= trimmed.shape[0] / SR <= 2.25
+    assert trimmed.dtype == np.float32
+
+
+def test_compresses_long_pause():
+    waveform = np.concatenate(
+        [_silence(0.5), _tone(1.0), _silence(2.0), _tone(1.0), _silence(0.5)]
+    )
+    trimmed = _processor().trim_silence(waveform)
+    assert 2.0 <= trimmed.shape[0] / SR <= 2.5
+
+
+def test_short_speech_keeps_original():
+    """语音不足vad_min_speech_seconds时不裁剪"""
+    waveform = np.concatenate([_silence(1.5), _tone(0.2), _silence(1.5)])
+    trimmed = _processor().trim_silence(waveform)
+    assert trimmed.shape == waveform.shape
+
+
+def test_silence_only_keeps_original():
+    waveform = _silence(2.0)
+    assert _processor().trim_silence(waveform).shape == waveform.shape
+
+
+def test_continuous_speech_unchanged():
+    waveform = _tone(3.0)
+    np.testing.assert_array_equal(_processor().trim_silence(waveform), waveform)
+
+
+def test_disabled():
+    processor = _processor()
+    processor.vad_enabled = False
+    waveform = np.concatenate([_silence(1.0), _tone(1.0)])
+    assert processor.trim_silence(waveform) is waveform